@@ -0,0 +1,94 @@
+"""阿里云表格OCR本地桩服务
+
+回放录制的接口响应，用于离线测试吞吐量和延迟。录制目录中的每个文件是一次完整的
+接口响应（设置 ALIYUN_OCR_RECORD_DIR 后由 AliyunOCRClient 自动保存，文件名为
+图片的sha256）。请求图片有对应录制时返回该响应，否则轮流返回目录中的响应。
+
+用法:
+    python aliyun_ocr_stub.py --record-dir tests/test_data/aliyun --port 8900 \
+        --latency 0.3 --jitter 0.1 --error-rate 0.05
+
+客户端指向桩服务:
+    ALIYUN_ENDPOINT=127.0.0.1:8900 ALIYUN_OCR_PROTOCOL=http
+"""
+import argparse
+import asyncio
+import glob
+import hashlib
+import itertools
+import json
+import os
+import random
+from aiohttp import web
+
+DEFAULT_RECORD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tests", "test_data", "aliyun")
+
+
+def load_records(record_dir: str) -> dict:
+    """读取录制目录，返回 {文件名(不含扩展名): 响应JSON}"""
+    records = {}
+    for path in sorted(glob.glob(os.path.join(record_dir, "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            records[os.path.splitext(os.path.basename(path))[0]] = json.load(f)
+    if not records:
+        raise ValueError(f"录制目录中没有响应文件: {record_dir}")
+    return records
+
+
+def create_app(record_dir: str = DEFAULT_RECORD_DIR, latency: float = 0.0, jitter: float = 0.0,
+               error_rate: float = 0.0, seed: int = None) -> web.Application:
+    """创建桩服务应用
+
+    Args:
+        record_dir: 录制响应所在目录
+        latency: 每个请求的基础延迟（秒）
+        jitter: 在基础延迟上增加的均匀随机延迟上限（秒）
+        error_rate: 返回503限流错误的概率
+        seed: 随机数种子
+    """
+    records = load_records(record_dir)
+    cycle = itertools.cycle(list(records.values()))
+    rng = random.Random(seed)
+    stats = {"requests": 0, "errors": 0, "in_flight": 0, "max_in_flight": 0}
+
+    async def handle(request: web.Request) -> web.Response:
+        body = await request.read()
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        try:
+            delay = latency + rng.uniform(0, jitter)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if rng.random() < error_rate:
+                stats["errors"] += 1
+                return web.json_response(
+                    {"Code": "ServiceUnavailable", "Message": "stub injected error"}, status=503
+                )
+            record = records.get(hashlib.sha256(body).hexdigest()) or next(cycle)
+            return web.json_response(record)
+        finally:
+            stats["in_flight"] -= 1
+
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app["stats"] = stats
+    app.router.add_post("/", handle)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="阿里云表格OCR本地桩服务")
+    parser.add_argument("--record-dir", default=DEFAULT_RECORD_DIR)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    app = create_app(args.record_dir, args.latency, args.jitter, args.error_rate)
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
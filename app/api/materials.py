@@ -1,12 +1,27 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File
 from typing import List, Dict
-import pandas as pd
+from collections import Counter
 import io
-from app.models.material import MaterialBase, MaterialCreate
+import time
+from app.models.material import (
+    BatchMatchRequest, BatchMatchResponse, BatchMatchResult, MaterialBase, MaterialCreate
+)
+from app.core.config import settings
 from app.core.database import Database, COLLECTIONS
+from app.services.matcher.catalog_index import material_catalog
+from app.services.matcher.material_service import MaterialService
 
 router = APIRouter()
 db = Database.get_db()
+_matcher = None
+
+def get_matcher():
+    """获取物料匹配器（首次调用时创建）"""
+    global _matcher
+    if _matcher is None:
+        from app.services.matcher.matcher import MaterialMatcher
+        _matcher = MaterialMatcher()
+    return _matcher
 
 @router.post("/materials/import")
 async def import_materials_from_excel(file: UploadFile = File(...)):
@@ -14,6 +29,8 @@ async def import_materials_from_excel(file: UploadFile = File(...)):
     if not file.filename.endswith(('.xls', '.xlsx')):
         raise HTTPException(status_code=400, detail="File must be an Excel file")
     
+    import pandas as pd
+    
     try:
         contents = await file.read()
         df = pd.read_excel(io.BytesIO(contents))
@@ -67,11 +84,13 @@ async def import_materials_from_excel(file: UploadFile = File(...)):
             # 使用物料编码作为唯一标识，如果存在则更新，不存在则插入
             collection = db[COLLECTIONS["materials"]]
             for material in materials:
+                MaterialService.stamp_for_upsert(material)
                 await collection.update_one(
                     {"material_code": material["material_code"]},
                     {"$set": material},
                     upsert=True
                 )
+            await material_catalog.refresh(collection)
         
         return {
             "status": "success",
@@ -95,6 +114,48 @@ async def get_all_materials():
         materials.append(MaterialBase(**doc))
     return materials
 
+@router.post("/materials/match", response_model=BatchMatchResponse)
+async def match_materials(request: BatchMatchRequest):
+    """
+    批量匹配询价表中的物料
+    
+    参数:
+    - rows: 各行的物料名称、规格型号、数量和单位
+    
+    返回:
+    - results: 与rows一一对应的匹配结果
+    - stats: 各匹配类型的行数、去重后的行数和耗时
+    """
+    if len(request.rows) > settings.MATCH_BATCH_MAX_ROWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"一次最多匹配{settings.MATCH_BATCH_MAX_ROWS}行"
+        )
+    
+    start = time.perf_counter()
+    matches = await get_matcher().match_batch(
+        [(row.material_name, row.specification) for row in request.rows]
+    )
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    
+    return BatchMatchResponse(
+        results=[
+            BatchMatchResult(row_index=i, quantity=row.quantity, unit=row.unit, match=match)
+            for i, (row, match) in enumerate(zip(request.rows, matches))
+        ],
+        stats={
+            "rows": len(request.rows),
+            "unique_rows": len({(row.material_name, row.specification) for row in request.rows}),
+            "match_types": dict(Counter(match.match_type for match in matches)),
+            "elapsed_ms": round(elapsed_ms, 1)
+        }
+    )
+
+@router.get("/materials/index/stats")
+async def get_material_index_stats():
+    """获取进程内物料索引的条数、刷新水位和内存占用"""
+    return material_catalog.stats()
+
 @router.get("/materials/{material_code}", response_model=MaterialBase)
 async def get_material(material_code: str):
     """获取单个物料信息"""
@@ -1,12 +1,26 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from typing import List
 from app.models.ocr import OCRResponse, TaskStatus
-from app.utils.file_handler import is_valid_file, save_upload_file, get_file_type
-from app.services.ocr.ocr_service import OCRService
+from app.utils.file_handler import (
+    UploadTooLargeError, get_file_type, is_valid_file, remove_files, save_upload_file
+)
+from app.core.config import settings
+from app.services.ocr.worker_pool import ocr_worker_pool
+from app.services.ocr.engine_router import ocr_engine_router
+from app.services.ocr.aliyun_client import aliyun_ocr_client
+from app.services.ocr.result_cache import ocr_result_cache
 import uuid
 
 router = APIRouter()
-ocr_service = OCRService()
+_ocr_service = None
+
+def get_ocr_service():
+    """获取OCR服务（首次调用时创建，避免导入时加载cv2等识别依赖）"""
+    global _ocr_service
+    if _ocr_service is None:
+        from app.services.ocr.ocr_service import OCRService
+        _ocr_service = OCRService()
+    return _ocr_service
 
 @router.post("/upload", response_model=OCRResponse)
 async def upload_files(files: List[UploadFile] = File(...)):
@@ -22,8 +36,16 @@ async def upload_files(files: List[UploadFile] = File(...)):
     - message: 处理消息
     """
     # 验证文件数量
-    if len(files) > 5:
-        raise HTTPException(status_code=400, detail="一次最多上传5个文件")
+    if len(files) > settings.MAX_FILES_PER_REQUEST:
+        raise HTTPException(
+            status_code=400,
+            detail=f"一次最多上传{settings.MAX_FILES_PER_REQUEST}个文件"
+        )
+    
+    # 识别队列已满且无法溢出到云端时拒绝新任务
+    if not ocr_worker_pool.has_capacity(len(files)) and \
+            not ocr_engine_router.can_spill(aliyun_ocr_client.configured):
+        raise HTTPException(status_code=503, detail="识别队列已满，请稍后重试")
     
     # 验证每个文件
     for file in files:
@@ -33,19 +55,20 @@ async def upload_files(files: List[UploadFile] = File(...)):
                 detail=f"文件 {file.filename} 格式不正确或超出大小限制"
             )
     
-    # 保存文件并创建OCR任务
+    # 分块保存文件并创建OCR任务
     saved_files = []
     file_types = []
+    file_hashes = []
     
     try:
         for file in files:
-            file_path = await save_upload_file(file)
-            file_type = get_file_type(file.filename)
-            saved_files.append(file_path)
-            file_types.append(file_type)
+            saved = await save_upload_file(file)
+            saved_files.append(saved.file_path)
+            file_types.append(get_file_type(file.filename))
+            file_hashes.append(saved.sha256)
         
         # 创建OCR任务
-        task_id = await ocr_service.create_task(saved_files, file_types)
+        task_id = await get_ocr_service().create_task(saved_files, file_types, file_hashes)
         
         return OCRResponse(
             task_id=task_id,
@@ -53,8 +76,11 @@ async def upload_files(files: List[UploadFile] = File(...)):
             message="文件上传成功，开始处理"
         )
         
+    except UploadTooLargeError as e:
+        remove_files(saved_files)
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        # TODO: 清理已上传的文件
+        remove_files(saved_files)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/task/{task_id}", response_model=OCRResponse)
@@ -69,9 +95,10 @@ async def get_task_status(task_id: str):
     - task_id: 任务ID
     - status: 任务状态
     - message: 处理消息
-    - result: 识别结果（如果完成）
+    - result: 所有文件合并后的识别结果（如果完成）
+    - files: 每个文件的处理状态和识别结果（处理中也会返回已完成文件的结果）
     """
-    task = await ocr_service.get_task_status(task_id)
+    task = await get_ocr_service().get_task_status(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
         
@@ -86,5 +113,43 @@ async def get_task_status(task_id: str):
         task_id=task_id,
         status=task.status,
         message=message,
-        result=task.result
-    ) 
\ No newline at end of file
+        result=task.result,
+        files=task.files
+    )
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    获取OCR结果缓存统计
+    
+    返回:
+    - hits/misses: 命中和未命中次数
+    - entries/bytes: 本地缓存条目数和占用空间
+    """
+    return await ocr_result_cache.stats()
+
+@router.get("/router/stats")
+async def get_router_stats():
+    """
+    获取OCR引擎路由统计
+    
+    返回:
+    - decisions: 按"引擎:原因"统计的路由次数
+    - fallbacks: 引擎切换次数
+    - 近期本地/云端p95耗时和云端错误率
+    """
+    return ocr_engine_router.status()
+
+@router.post("/warmup")
+async def warm_up_workers():
+    """
+    预热OCR工作进程：加载模型并执行一次推理
+    
+    返回:
+    - 进程池就绪状态
+    """
+    try:
+        await ocr_worker_pool.warm_up()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"预热失败: {str(e)}")
+    return ocr_worker_pool.status()
@@ -1,6 +1,5 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File
 from typing import List, Optional
-import pandas as pd
 import io
 
 from app.models.material import SynonymGroup, SynonymCreate
@@ -25,6 +24,8 @@ async def import_synonyms_from_excel(file: UploadFile = File(...)):
     if not file.filename.endswith(('.xls', '.xlsx')):
         raise HTTPException(status_code=400, detail="File must be an Excel file")
     
+    import pandas as pd
+    
     try:
         contents = await file.read()
         df = pd.read_excel(io.BytesIO(contents))
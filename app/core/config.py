@@ -16,6 +16,15 @@ class Settings(BaseSettings):
     ALIYUN_ACCESS_KEY_ID: str = os.getenv("ALIYUN_ACCESS_KEY_ID", "")
     ALIYUN_ACCESS_KEY_SECRET: str = os.getenv("ALIYUN_ACCESS_KEY_SECRET", "")
     ALIYUN_ENDPOINT: str = os.getenv("ALIYUN_ENDPOINT", "")
+    ALIYUN_OCR_PROTOCOL: str = os.getenv("ALIYUN_OCR_PROTOCOL", "https")
+    ALIYUN_OCR_MAX_CONCURRENCY: int = int(os.getenv("ALIYUN_OCR_MAX_CONCURRENCY", "8"))  # 同时进行的请求数上限
+    ALIYUN_OCR_POOL_SIZE: int = int(os.getenv("ALIYUN_OCR_POOL_SIZE", "16"))  # 长连接池大小
+    ALIYUN_OCR_CONNECT_TIMEOUT: float = float(os.getenv("ALIYUN_OCR_CONNECT_TIMEOUT", "5.0"))
+    ALIYUN_OCR_READ_TIMEOUT: float = float(os.getenv("ALIYUN_OCR_READ_TIMEOUT", "20.0"))
+    ALIYUN_OCR_MAX_RETRIES: int = int(os.getenv("ALIYUN_OCR_MAX_RETRIES", "3"))
+    ALIYUN_OCR_BACKOFF_BASE: float = float(os.getenv("ALIYUN_OCR_BACKOFF_BASE", "0.5"))  # 指数退避的初始上限（秒）
+    ALIYUN_OCR_BACKOFF_MAX: float = float(os.getenv("ALIYUN_OCR_BACKOFF_MAX", "8.0"))
+    ALIYUN_OCR_RECORD_DIR: str = os.getenv("ALIYUN_OCR_RECORD_DIR", "")  # 非空时保存原始响应，供桩服务回放
 
     # MongoDB配置
     MONGODB_URL: str = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
@@ -56,11 +65,91 @@ class Settings(BaseSettings):
     OCR_TABLE_MAX_LEN: int = int(os.getenv("OCR_TABLE_MAX_LEN", "488"))
     OCR_TABLE_MODEL: str = os.getenv("OCR_TABLE_MODEL", "TableStructure")
 
+    # OCR工作进程池配置
+    OCR_POOL_SIZE: int = int(os.getenv("OCR_POOL_SIZE", "0"))  # 0表示按CPU核数自动计算
+    OCR_WORKER_THREADS: int = int(os.getenv("OCR_WORKER_THREADS", "1"))
+    OCR_MAX_QUEUED_JOBS: int = int(os.getenv("OCR_MAX_QUEUED_JOBS", "20"))
+    OCR_WARMUP_ON_START: bool = os.getenv("OCR_WARMUP_ON_START", "False").lower() == "true"  # 仅OCR节点需要开启
+
+    # OCR引擎路由配置（local/cloud/auto）
+    OCR_ENGINE_MODE: str = os.getenv("OCR_ENGINE_MODE", "auto")
+    OCR_ROUTER_WINDOW: int = int(os.getenv("OCR_ROUTER_WINDOW", "50"))  # 统计p95和错误率的最近调用数
+    OCR_ROUTER_MIN_SAMPLES: int = int(os.getenv("OCR_ROUTER_MIN_SAMPLES", "5"))  # 样本不足时使用先验耗时
+    OCR_ROUTER_LOCAL_PRIOR_SECONDS_PER_MP: float = float(os.getenv("OCR_ROUTER_LOCAL_PRIOR_SECONDS_PER_MP", "1.5"))
+    OCR_ROUTER_CLOUD_PRIOR_SECONDS: float = float(os.getenv("OCR_ROUTER_CLOUD_PRIOR_SECONDS", "2.0"))
+    OCR_ROUTER_CLOUD_MAX_ERROR_RATE: float = float(os.getenv("OCR_ROUTER_CLOUD_MAX_ERROR_RATE", "0.3"))
+    OCR_ROUTER_CLOUD_MAX_BYTES: int = int(os.getenv("OCR_ROUTER_CLOUD_MAX_BYTES", str(10 * 1024 * 1024)))
+    OCR_ROUTER_CLOUD_MAX_SIDE: int = int(os.getenv("OCR_ROUTER_CLOUD_MAX_SIDE", "8192"))
+    OCR_ROUTER_LOCAL_TIMEOUT: float = float(os.getenv("OCR_ROUTER_LOCAL_TIMEOUT", "300"))  # 0表示不限
+    OCR_ROUTER_CLOUD_TIMEOUT: float = float(os.getenv("OCR_ROUTER_CLOUD_TIMEOUT", "60"))
+
+    # 物料目录索引配置
+    MATERIAL_INDEX_REFRESH_SECONDS: float = float(os.getenv("MATERIAL_INDEX_REFRESH_SECONDS", "30"))
+    MATERIAL_INDEX_REFRESH_OVERLAP_SECONDS: float = float(os.getenv("MATERIAL_INDEX_REFRESH_OVERLAP_SECONDS", "300"))  # 增量刷新时水位回退的秒数，覆盖其他进程延迟落库的写入
+    MATERIAL_INDEX_RECONCILE_SECONDS: float = float(os.getenv("MATERIAL_INDEX_RECONCILE_SECONDS", "3600"))  # 全量对账物料编码（发现删除和无updated_at的物料）的间隔
+    MATERIAL_FUZZY_SCORER: str = os.getenv("MATERIAL_FUZZY_SCORER", "ratio")  # ratio/partial_ratio/token_sort_ratio/token_set_ratio/QRatio/WRatio
+    MATERIAL_FUZZY_THRESHOLD: float = float(os.getenv("MATERIAL_FUZZY_THRESHOLD", "60"))  # 0-100
+    MATERIAL_FUZZY_WORKERS: int = int(os.getenv("MATERIAL_FUZZY_WORKERS", "-1"))  # 批量打分线程数，-1表示全部CPU
+    MATERIAL_NGRAM_MIN_ENTRIES: int = int(os.getenv("MATERIAL_NGRAM_MIN_ENTRIES", "20000"))  # 目录少于此条数时模糊匹配全量打分
+    MATERIAL_NGRAM_CANDIDATES: int = int(os.getenv("MATERIAL_NGRAM_CANDIDATES", "500"))  # 每个查询精确打分的候选数
+    MATERIAL_NGRAM_MAX_POSTING: int = int(os.getenv("MATERIAL_NGRAM_MAX_POSTING", "20000"))  # 出现次数超过此值的n-gram不参与候选生成
+    MATERIAL_NGRAM_SNAPSHOT: str = os.getenv("MATERIAL_NGRAM_SNAPSHOT", "")  # n-gram索引快照路径，为空时每次启动重建
+    MATCH_BATCH_MAX_ROWS: int = int(os.getenv("MATCH_BATCH_MAX_ROWS", "1000"))  # 批量匹配接口单次最多行数
+    MATCH_SYNONYM_CACHE_SECONDS: float = float(os.getenv("MATCH_SYNONYM_CACHE_SECONDS", "60"))  # 同义词字典缓存时间
+
+    # PDF处理配置
+    OCR_PDF_DPI: int = int(os.getenv("OCR_PDF_DPI", "200"))
+    OCR_PDF_MAX_PAGES: int = int(os.getenv("OCR_PDF_MAX_PAGES", "200"))
+
+    # 表格区域定位配置
+    OCR_TABLE_REGION_ENABLED: bool = os.getenv("OCR_TABLE_REGION_ENABLED", "True").lower() == "true"
+    OCR_TABLE_REGION_PADDING: int = int(os.getenv("OCR_TABLE_REGION_PADDING", "10"))
+    OCR_TABLE_REGION_MAX_RATIO: float = float(os.getenv("OCR_TABLE_REGION_MAX_RATIO", "0.95"))  # 区域占比超过该值时不裁剪
+
+    # 大图分块识别配置
+    OCR_TILE_ENABLED: bool = os.getenv("OCR_TILE_ENABLED", "True").lower() == "true"
+    OCR_TILE_MAX_SIDE: int = int(os.getenv("OCR_TILE_MAX_SIDE", "1440"))  # 超过该边长的坐标轴才切分
+    OCR_TILE_SIZE: int = int(os.getenv("OCR_TILE_SIZE", "960"))
+    OCR_TILE_OVERLAP: int = int(os.getenv("OCR_TILE_OVERLAP", "96"))  # 应大于最高文本行的高度
+
+    # OCR结果缓存配置
+    OCR_CACHE_ENABLED: bool = os.getenv("OCR_CACHE_ENABLED", "True").lower() == "true"
+    OCR_CACHE_DIR: str = os.getenv("OCR_CACHE_DIR", "./ocr_cache")
+    OCR_CACHE_MAX_BYTES: int = int(os.getenv("OCR_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+    OCR_CACHE_USE_DB: bool = os.getenv("OCR_CACHE_USE_DB", "False").lower() == "true"
+
+    # 图像预处理配置（none/fast/full）
+    OCR_PREPROCESS_PROFILE: str = os.getenv("OCR_PREPROCESS_PROFILE", "full")
+    OCR_FAST_NOISE_THRESHOLD: float = float(os.getenv("OCR_FAST_NOISE_THRESHOLD", "3.0"))
+    OCR_FAST_CONTRAST_THRESHOLD: float = float(os.getenv("OCR_FAST_CONTRAST_THRESHOLD", "45.0"))
+    OCR_FAST_SHARPNESS_THRESHOLD: float = float(os.getenv("OCR_FAST_SHARPNESS_THRESHOLD", "150.0"))
+
+    # 倾斜校正配置
+    OCR_DESKEW_MAX_SIDE: int = int(os.getenv("OCR_DESKEW_MAX_SIDE", "1000"))  # 估计角度时的缩略图最长边
+    OCR_DESKEW_MIN_ANGLE: float = float(os.getenv("OCR_DESKEW_MIN_ANGLE", "0.5"))
+
+    # 多轮识别策略配置
+    # single: 只识别一次; cells: 只对低置信度单元格批量重新识别;
+    # adaptive: 按首轮评分仅对低质量区域补充识别; full: 三轮全图识别
+    OCR_PASS_MODE: str = os.getenv("OCR_PASS_MODE", "cells")
+    OCR_PASS_MIN_MEAN_CONFIDENCE: float = float(os.getenv("OCR_PASS_MIN_MEAN_CONFIDENCE", "0.85"))
+    OCR_PASS_LOW_CONFIDENCE: float = float(os.getenv("OCR_PASS_LOW_CONFIDENCE", "0.75"))
+    OCR_PASS_MAX_LOW_RATIO: float = float(os.getenv("OCR_PASS_MAX_LOW_RATIO", "0.1"))
+    OCR_PASS_MIN_GRID_COVERAGE: float = float(os.getenv("OCR_PASS_MIN_GRID_COVERAGE", "0.7"))
+    OCR_PASS_REGION_PADDING: int = int(os.getenv("OCR_PASS_REGION_PADDING", "8"))
+    OCR_PASS_MAX_REGION_RATIO: float = float(os.getenv("OCR_PASS_MAX_REGION_RATIO", "0.5"))
+    OCR_CELL_RETRY_CONFIDENCE: float = float(os.getenv("OCR_CELL_RETRY_CONFIDENCE", "0.75"))  # 单元格平均置信度低于此值时重新识别
+    OCR_CELL_RETRY_UPSCALE: float = float(os.getenv("OCR_CELL_RETRY_UPSCALE", "2.0"))
+    OCR_CELL_RETRY_MAX_BOXES: int = int(os.getenv("OCR_CELL_RETRY_MAX_BOXES", "300"))
+    OCR_NMS_IOU_THRESHOLD: float = float(os.getenv("OCR_NMS_IOU_THRESHOLD", "0.5"))  # 多轮结果合并时判定为重复框的IoU
+
     # 表格识别配置
     TABLE_MIN_ROW_HEIGHT: int = int(os.getenv("TABLE_MIN_ROW_HEIGHT", "20"))
     TABLE_MIN_COL_WIDTH: int = int(os.getenv("TABLE_MIN_COL_WIDTH", "40"))
     TABLE_MERGE_CELLS_THRESHOLD: int = int(os.getenv("TABLE_MERGE_CELLS_THRESHOLD", "5"))
     TABLE_HEADER_ROWS: int = int(os.getenv("TABLE_HEADER_ROWS", "1"))
+    TABLE_HEADER_SCAN_ROWS: int = int(os.getenv("TABLE_HEADER_SCAN_ROWS", "5"))  # 在前几行中查找表头
+    TABLE_LINE_DETECTOR: str = os.getenv("TABLE_LINE_DETECTOR", "morphology")  # morphology/hough
 
     class Config:
         env_file = env_path
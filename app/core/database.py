@@ -42,6 +42,8 @@ async def create_indexes():
     # 物料集合索引
     await db[COLLECTIONS["materials"]].create_index("material_code", unique=True)
     await db[COLLECTIONS["materials"]].create_index("material_name")
+    await db[COLLECTIONS["materials"]].create_index("updated_at")
+    await db[COLLECTIONS["materials"]].create_index("spec_key")
     
     # 同义词集合索引
     await db[COLLECTIONS["synonyms"]].create_index("group_id", unique=True)
@@ -55,6 +57,7 @@ async def create_indexes():
     
     # OCR结果集合索引
     await db[COLLECTIONS["ocr_results"]].create_index("created_at")
+    await db[COLLECTIONS["ocr_results"]].create_index("cache_key", unique=True, sparse=True)
     
     # 性能指标集合索引
     await db[COLLECTIONS["metrics"]].create_index([
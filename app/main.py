@@ -1,6 +1,15 @@
+import asyncio
+import logging
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from app.api import ocr, materials, synonyms
 from app.core.config import settings
+from app.services.ocr.worker_pool import ocr_worker_pool
+from app.services.ocr.aliyun_client import aliyun_ocr_client
+from app.services.matcher.catalog_index import material_catalog
+from app.core.database import Database, COLLECTIONS
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title=settings.PROJECT_NAME)
 
@@ -9,6 +18,36 @@ app.include_router(ocr.router, prefix="/api", tags=["OCR"])
 app.include_router(materials.router, prefix="/api", tags=["Materials"])
 app.include_router(synonyms.router, prefix="/api", tags=["Synonyms"])
 
+def _log_warm_up_failure(future: asyncio.Future):
+    """后台预热失败时记录日志，失败原因同时在 /ready 的 warm_up_error 中返回"""
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"OCR工作进程预热失败: {ocr_worker_pool.warm_up_error}")
+
+@app.on_event("startup")
+async def startup():
+    # 后台预热OCR工作进程，不阻塞应用启动
+    if settings.OCR_WARMUP_ON_START:
+        app.state.ocr_warm_up = asyncio.ensure_future(ocr_worker_pool.warm_up())
+        app.state.ocr_warm_up.add_done_callback(_log_warm_up_failure)
+    # 加载物料索引并在后台定期增量刷新
+    app.state.catalog_refresh = asyncio.ensure_future(
+        material_catalog.run_refresh_loop(Database.get_db()[COLLECTIONS["materials"]])
+    )
+
+@app.on_event("shutdown")
+async def shutdown():
+    app.state.catalog_refresh.cancel()
+    # 关闭OCR工作进程池
+    ocr_worker_pool.shutdown()
+    # 关闭阿里云OCR连接池
+    await aliyun_ocr_client.close()
+
 @app.get("/")
 async def root():
-    return {"message": "Welcome to Pricing Agent OCR System"} 
\ No newline at end of file
+    return {"message": "Welcome to Pricing Agent OCR System"}
+
+@app.get("/ready")
+async def ready():
+    """OCR模型已加载并完成预热推理时返回200，否则返回503"""
+    status = ocr_worker_pool.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
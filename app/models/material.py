@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, List
+from typing import Any, Optional, Dict, List
 from datetime import datetime
 
 class MaterialBase(BaseModel):
@@ -16,6 +16,7 @@ class MaterialCreate(MaterialBase):
 
 class MaterialInDB(MaterialBase):
     id: str = Field(..., alias="_id")
+    spec_key: Optional[str] = Field(None, description="结构化规格键")
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -29,6 +30,26 @@ class MaterialMatch(BaseModel):
     match_type: str = Field(..., description="匹配类型")
     material_info: Optional[MaterialBase] = Field(None, description="匹配到的物料信息")
 
+class BatchMatchRow(BaseModel):
+    """批量匹配请求中的一行"""
+    material_name: str = Field(..., description="物料名称")
+    specification: str = Field("", description="规格型号")
+    quantity: Optional[float] = Field(None, description="数量")
+    unit: str = Field("", description="单位")
+
+class BatchMatchRequest(BaseModel):
+    rows: List[BatchMatchRow] = Field(..., description="询价表中的各行")
+
+class BatchMatchResult(BaseModel):
+    row_index: int = Field(..., description="行在请求中的下标")
+    quantity: Optional[float] = Field(None, description="数量")
+    unit: str = Field("", description="单位")
+    match: MaterialMatch = Field(..., description="匹配结果")
+
+class BatchMatchResponse(BaseModel):
+    results: List[BatchMatchResult] = Field(..., description="与请求各行一一对应的匹配结果")
+    stats: Dict[str, Any] = Field(default_factory=dict, description="各匹配类型的行数和耗时")
+
 class SynonymGroup(BaseModel):
     """同义词组模型"""
     group_id: str = Field(..., description="同义词组ID")
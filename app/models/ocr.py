@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel
 
 class FileType(str, Enum):
@@ -24,6 +24,26 @@ class TableCell(BaseModel):
     col_span: int = 1
     confidence: float = 0.0
 
+class TableRow(BaseModel):
+    """按表头字段映射后的一行数据"""
+    row_index: int
+    material_name: str = ""
+    specification: str = ""
+    quantity: Optional[float] = None
+    unit: str = ""
+    connection: str = ""
+    remarks: str = ""
+    confidence: float = 0.0
+
+class TableStructure(BaseModel):
+    """表格结构识别结果"""
+    headers: Dict[str, int] = {}
+    cells: List[TableCell] = []
+    merged_cells: List[Dict[str, int]] = []
+    column_roles: Dict[str, int] = {}  # 字段 -> 列下标
+    data_rows: List[TableRow] = []
+    stats: Dict[str, Any] = {}
+
 class OCRResult(BaseModel):
     """OCR识别结果"""
     cells: List[TableCell]
@@ -31,11 +51,33 @@ class OCRResult(BaseModel):
     raw_text: str
     file_type: FileType
 
+class SavedUpload(BaseModel):
+    """已保存的上传文件"""
+    file_path: str
+    size: int
+    sha256: str
+
+class TaskFile(BaseModel):
+    """任务中的单个文件"""
+    file_path: str
+    file_type: FileType
+    sha256: Optional[str] = None  # 上传时计算的内容哈希，用于结果缓存
+    status: TaskStatus = TaskStatus.PENDING
+    result: Optional[TableStructure] = None
+    error_message: Optional[str] = None
+
+class OCRResponse(BaseModel):
+    """OCR接口响应"""
+    task_id: str
+    status: TaskStatus
+    message: str
+    result: Optional[TableStructure] = None
+    files: List[TaskFile] = []
+
 class OCRTask(BaseModel):
     """OCR任务"""
     task_id: str
-    file_path: str
-    file_type: FileType
+    files: List[TaskFile] = []
     status: TaskStatus
-    result: Optional[OCRResult] = None
+    result: Optional[TableStructure] = None
     error_message: Optional[str] = None 
\ No newline at end of file
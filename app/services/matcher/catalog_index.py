@@ -0,0 +1,370 @@
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+import numpy as np
+from app.core.config import settings
+from app.models.material import MaterialBase
+from app.services.matcher.fuzzy import best_match_among, get_scorer
+from app.services.matcher.ngram_index import NgramIndex
+from app.utils.spec_parser import spec_key
+from app.utils.text_normalizer import match_key
+
+# 构建索引只需要的字段
+_PROJECTION = {
+    "_id": 0, "material_code": 1, "material_name": 1, "specification": 1, "unit": 1,
+    "category": 1, "attributes": 1, "status": 1, "updated_at": 1,
+    "category_level1": 1, "category_level2": 1, "attr_price": 1
+}
+
+
+def _text(value: Any) -> str:
+    """数据库中的空值（None/NaN）按空字符串处理"""
+    if value is None or value != value:
+        return ""
+    return str(value)
+
+
+def _category(doc: Dict) -> Dict[str, str]:
+    """兼容嵌套的category和导入脚本写入的category_level1/2平铺字段"""
+    category = doc.get("category")
+    if isinstance(category, dict):
+        return {key: _text(value) for key, value in category.items()}
+    return {
+        key: _text(doc[field])
+        for key, field in (("level1", "category_level1"), ("level2", "category_level2"))
+        if field in doc
+    }
+
+
+def _attributes(doc: Dict) -> Dict[str, str]:
+    """兼容嵌套的attributes和attr_前缀的平铺字段"""
+    attributes = doc.get("attributes")
+    if isinstance(attributes, dict):
+        return {key: _text(value) for key, value in attributes.items()}
+    return {key[5:]: _text(value) for key, value in doc.items() if key.startswith("attr_")}
+
+
+def _deep_size(obj: Any, seen: set) -> int:
+    """递归统计对象及其包含的容器、字符串占用的字节数"""
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_size(key, seen) + _deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(_deep_size(item, seen) for item in obj)
+    return size
+
+
+class FuzzyView(NamedTuple):
+    """模糊匹配用到的目录字段
+
+    在事件循环中取出后交给线程打分。全量重新加载会替换这些列表而不是原地修改，
+    线程中得到的下标始终对应取出时的目录，应在线程内换算为物料编码再返回。
+    """
+    name_keys: List[str]
+    codes: List[str]
+    ngrams: Optional[NgramIndex]  # 目录较小时为None，表示对全部物料打分
+
+
+class MaterialCatalog:
+    """进程内物料目录索引
+
+    各字段按列存放在并行的列表中（同一下标为同一物料），另外维护编码、名称、规格到
+    下标的哈希表，以及结构化规格键到下标的哈希表，精确查找不访问数据库。启动时全量加载一次，之后按 updated_at
+    增量刷新；数据库中已没有索引中的某个物料编码时（有物料被删除）重新全量加载。
+    全量加载在线程中构建新索引，完成后在事件循环中整体替换。
+    名称另建n-gram倒排索引，目录较大时模糊匹配只对候选打分；配置了快照路径时
+    全量加载优先从快照恢复n-gram索引。
+    """
+
+    def __init__(self):
+        self._reset()
+        self.loaded = False
+        self.refreshed_at: Optional[float] = None
+        self.reconciled_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def _reset(self):
+        self.codes: List[str] = []
+        self.names: List[str] = []
+        self.specs: List[str] = []
+        self.units: List[str] = []
+        self.categories: List[Dict[str, str]] = []  # 相同分类共用同一个字典，不可修改
+        self.attributes: List[Tuple[Tuple[str, str], ...]] = []
+        self.statuses: List[bool] = []
+        self.name_keys: List[str] = []  # match_key(名称)，模糊匹配使用
+        self.spec_keys: List[Optional[str]] = []  # 结构化规格键，无法解析时为None
+        self.by_code: Dict[str, int] = {}
+        self.by_name: Dict[str, List[int]] = {}
+        self.by_spec: Dict[str, List[int]] = {}
+        self.by_spec_key: Dict[str, List[int]] = {}
+        self.ngrams = NgramIndex(settings.MATERIAL_NGRAM_MAX_POSTING)
+        self.watermark: Optional[datetime] = None  # 已加载的最大updated_at
+        self._shared_categories: Dict[Tuple, Dict[str, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.by_code)
+
+    @staticmethod
+    def _unlink(index: Dict[str, List[int]], key: str, slot: int):
+        slots = index.get(key)
+        if slots and slot in slots:
+            slots.remove(slot)
+            if not slots:
+                del index[key]
+
+    def upsert(self, doc: Dict):
+        """按物料编码新增或覆盖一条物料"""
+        slot = self._upsert(doc)
+        if slot is not None:
+            self.ngrams.add(slot, self.name_keys[slot])
+
+    def _upsert(self, doc: Dict) -> Optional[int]:
+        code = _text(doc.get("material_code"))
+        if not code:
+            return None
+        name = _text(doc.get("material_name"))
+        spec = sys.intern(_text(doc.get("specification")))
+
+        slot = self.by_code.get(code)
+        if slot is None:
+            slot = len(self.codes)
+            self.by_code[code] = slot
+            for column in (self.codes, self.names, self.specs, self.units, self.categories,
+                           self.attributes, self.statuses, self.name_keys, self.spec_keys):
+                column.append(None)
+        else:
+            self._unlink(self.by_name, self.names[slot], slot)
+            self._unlink(self.by_spec, self.specs[slot], slot)
+            if self.spec_keys[slot]:
+                self._unlink(self.by_spec_key, self.spec_keys[slot], slot)
+
+        self.codes[slot] = code
+        self.names[slot] = name
+        self.specs[slot] = spec
+        self.units[slot] = sys.intern(_text(doc.get("unit")))
+        category = _category(doc)
+        self.categories[slot] = self._shared_categories.setdefault(tuple(sorted(category.items())), category)
+        self.attributes[slot] = tuple((sys.intern(key), value) for key, value in _attributes(doc).items())
+        self.statuses[slot] = bool(doc.get("status", True))
+        key = match_key(name)
+        self.name_keys[slot] = name if key == name else key
+        self.by_name.setdefault(name, []).append(slot)
+        self.by_spec.setdefault(spec, []).append(slot)
+        # 数据库中保存的spec_key可能由旧版解析器生成，索引中总是按当前解析器重新计算
+        self.spec_keys[slot] = spec_key(spec)
+        if self.spec_keys[slot]:
+            self.by_spec_key.setdefault(self.spec_keys[slot], []).append(slot)
+
+        updated_at = doc.get("updated_at")
+        if isinstance(updated_at, datetime) and (self.watermark is None or updated_at > self.watermark):
+            self.watermark = updated_at
+        return slot
+
+    def build(self, docs: Iterable[Dict]):
+        """由物料文档全量构建索引"""
+        self._reset()
+        for doc in docs:
+            self._upsert(doc)
+        self._build_ngrams(settings.MATERIAL_NGRAM_SNAPSHOT)
+        self.loaded = True
+        self.refreshed_at = self.reconciled_at = time.time()
+
+    def _build_ngrams(self, snapshot: str):
+        """从快照恢复n-gram索引（与当前目录对齐），没有可用快照时全量构建"""
+        changed = None
+        if snapshot and os.path.exists(snapshot):
+            changed = self.ngrams.load(snapshot, self.by_code, self.name_keys)
+        if changed is None:
+            self.ngrams.build(enumerate(self.name_keys))
+        if snapshot and changed != 0:
+            try:
+                self.ngrams.save(snapshot, self.codes)
+            except OSError as e:
+                print(f"保存n-gram索引快照失败: {str(e)}")
+
+    def fuzzy_view(self) -> FuzzyView:
+        """当前目录的模糊匹配视图，须在事件循环中调用"""
+        ngrams = self.ngrams if len(self) >= settings.MATERIAL_NGRAM_MIN_ENTRIES else None
+        return FuzzyView(self.name_keys, self.codes, ngrams)
+
+    def fuzzy_candidates(self, key: str) -> Optional[np.ndarray]:
+        """模糊匹配的候选下标（升序）；目录较小时返回None，表示对全部物料打分"""
+        if len(self) < settings.MATERIAL_NGRAM_MIN_ENTRIES:
+            return None
+        return self.ngrams.candidates(key, settings.MATERIAL_NGRAM_CANDIDATES)
+
+    def material(self, slot: int) -> MaterialBase:
+        """按下标构造MaterialBase（只在返回匹配结果时创建）"""
+        return MaterialBase(
+            material_code=self.codes[slot],
+            material_name=self.names[slot],
+            specification=self.specs[slot],
+            unit=self.units[slot],
+            category=self.categories[slot],
+            attributes=dict(self.attributes[slot]),
+            status=self.statuses[slot]
+        )
+
+    def get(self, code: str) -> Optional[MaterialBase]:
+        """按物料编码查找"""
+        slot = self.by_code.get(code)
+        return self.material(slot) if slot is not None else None
+
+    def find_by_name(self, name: str) -> Optional[MaterialBase]:
+        """按名称精确查找"""
+        slots = self.by_name.get(name)
+        return self.material(slots[0]) if slots else None
+
+    def find_by_spec(self, text: str, spec: str) -> Optional[MaterialBase]:
+        """规格匹配：结构化规格键相同（无法解析时规格文本相同）的物料中按名称取最相近的一项
+
+        名称包含text的物料优先；都不包含时需达到模糊匹配阈值。
+        """
+        key = spec_key(spec)
+        slots = self.by_spec_key.get(key, ()) if key else self.by_spec.get(spec, ())
+        needle = match_key(text)
+        if not slots or not needle:
+            return None
+        contained = [slot for slot in slots if needle in self.name_keys[slot]]
+        match = best_match_among(needle, self.name_keys, sorted(contained or slots), get_scorer(),
+                                 score_cutoff=0 if contained else None)
+        return self.material(match[0]) if match else None
+
+    @staticmethod
+    def _built(docs: List[Dict]) -> "MaterialCatalog":
+        catalog = MaterialCatalog()
+        catalog.build(docs)
+        return catalog
+
+    async def _fetch_all(self, collection):
+        docs = [doc async for doc in collection.find({}, _PROJECTION)]
+        # 大目录构建耗时较长，在线程中构建新索引，查询继续使用旧索引
+        fresh = await asyncio.to_thread(self._built, docs)
+        # 在事件循环中一次性替换全部字段，查询不会看到新旧混合的索引
+        state = dict(vars(fresh))
+        del state["_lock"]
+        vars(self).update(state)
+
+    async def load(self, collection):
+        """从数据库全量加载"""
+        async with self._lock:
+            await self._fetch_all(collection)
+
+    async def ensure_loaded(self, collection):
+        """尚未加载时全量加载，并发调用只加载一次"""
+        if self.loaded:
+            return
+        async with self._lock:
+            if not self.loaded:
+                await self._fetch_all(collection)
+
+    def _is_new(self, doc: Dict, watermark: datetime) -> bool:
+        updated_at = doc.get("updated_at")
+        return _text(doc.get("material_code")) not in self.by_code or \
+            (isinstance(updated_at, datetime) and updated_at > watermark)
+
+    def _reconcile_due(self) -> bool:
+        return self.reconciled_at is None or \
+            time.time() - self.reconciled_at >= settings.MATERIAL_INDEX_RECONCILE_SECONDS
+
+    async def refresh(self, collection, reconcile: Optional[bool] = None) -> int:
+        """增量刷新，返回新增和更新的条数
+
+        其他进程（如导入脚本）写入的updated_at可能早于落库时间，查询从水位回退
+        MATERIAL_INDEX_REFRESH_OVERLAP_SECONDS，重复覆盖是幂等的。
+
+        按updated_at查询发现不了删除和没有updated_at的新物料，这两类变化由对账处理：
+        读取全部物料编码，有编码已被删除时重新全量加载，缺少的编码按编码补充加载。
+        对账的开销与目录大小成正比，默认每 MATERIAL_INDEX_RECONCILE_SECONDS 执行一次。
+
+        Args:
+            reconcile: 是否对账，None表示距上次对账超过间隔时对账
+        """
+        if not self.loaded:
+            await self.ensure_loaded(collection)
+            return len(self)
+        async with self._lock:
+            if reconcile is None:
+                reconcile = self._reconcile_due()
+            codes: Set[str] = set()
+            if reconcile:
+                # 只取编码逐条读取，不受distinct结果16MB的限制
+                codes = {_text(doc.get("material_code")) async for doc in
+                         collection.find({}, {"_id": 0, "material_code": 1})}
+                codes.discard("")
+                if any(code not in codes for code in self.by_code):
+                    await self._fetch_all(collection)
+                    return len(self)
+                self.reconciled_at = time.time()
+            
+            previous = self.watermark
+            if previous:
+                since = previous - timedelta(seconds=settings.MATERIAL_INDEX_REFRESH_OVERLAP_SECONDS)
+                query = {"updated_at": {"$gte": since}}
+            else:
+                query = {"updated_at": {"$exists": True}}
+            docs = [doc async for doc in collection.find(query, _PROJECTION)]
+            seen = {_text(doc.get("material_code")) for doc in docs}
+            missing = [code for code in codes if code not in self.by_code and code not in seen]
+            if missing:
+                docs += [doc async for doc in collection.find({"material_code": {"$in": missing}}, _PROJECTION)]
+            
+            # 重叠区间内已加载过的物料不计入变化条数
+            changed = sum(1 for doc in docs if previous is None or self._is_new(doc, previous))
+            for doc in docs:
+                self.upsert(doc)
+            self.refreshed_at = time.time()
+            return changed
+
+    async def run_refresh_loop(self, collection, interval: Optional[float] = None):
+        """后台定期增量刷新"""
+        interval = interval or settings.MATERIAL_INDEX_REFRESH_SECONDS
+        while True:
+            try:
+                updated = await self.refresh(collection)
+                if updated:
+                    print(f"物料索引已刷新: {updated}条更新, 共{len(self)}条")
+            except Exception as e:
+                print(f"物料索引刷新失败: {str(e)}")
+            await asyncio.sleep(interval)
+
+    def memory_usage(self) -> Dict[str, int]:
+        """索引各部分占用的内存（字节）"""
+        seen = set()
+        columns = {
+            name: _deep_size(getattr(self, name), seen)
+            for name in ("codes", "names", "specs", "units", "categories", "attributes",
+                         "statuses", "name_keys", "spec_keys")
+        }
+        maps = {name: _deep_size(getattr(self, name), seen)
+                for name in ("by_code", "by_name", "by_spec", "by_spec_key")}
+        maps["shared_categories"] = _deep_size(self._shared_categories, seen)
+        maps["ngrams"] = self.ngrams.memory_usage()
+        total = sum(columns.values()) + sum(maps.values())
+        return {
+            "entries": len(self),
+            "columns_bytes": sum(columns.values()),
+            "maps_bytes": sum(maps.values()),
+            "total_bytes": total,
+            "bytes_per_entry": total // max(1, len(self)),
+            **{f"{name}_bytes": size for name, size in {**columns, **maps}.items()}
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "entries": len(self),
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+            "refreshed_at": self.refreshed_at,
+            "reconciled_at": self.reconciled_at,
+            "memory": self.memory_usage()
+        }
+
+
+material_catalog = MaterialCatalog()
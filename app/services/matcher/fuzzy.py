@@ -0,0 +1,91 @@
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from rapidfuzz import fuzz, process
+from app.core.config import settings
+
+# 可选的相似度算法（MATERIAL_FUZZY_SCORER）
+SCORERS: Dict[str, Callable] = {
+    "ratio": fuzz.ratio,
+    "partial_ratio": fuzz.partial_ratio,
+    "token_sort_ratio": fuzz.token_sort_ratio,
+    "token_set_ratio": fuzz.token_set_ratio,
+    "QRatio": fuzz.QRatio,
+    "WRatio": fuzz.WRatio
+}
+
+# 批量打分时每块得分矩阵的最大元素数（float32，约64MB）
+_MAX_MATRIX_CELLS = 16 * 1024 * 1024
+
+
+def get_scorer(name: Optional[str] = None) -> Callable:
+    """按名称取相似度算法，默认使用配置中的算法"""
+    name = name or settings.MATERIAL_FUZZY_SCORER
+    if name not in SCORERS:
+        raise ValueError(f"Unknown fuzzy scorer: {name}, expected one of {', '.join(SCORERS)}")
+    return SCORERS[name]
+
+
+def best_match(query: str, choices: Sequence[str], scorer: Optional[Callable] = None,
+               score_cutoff: Optional[float] = None) -> Optional[Tuple[int, float]]:
+    """在choices中找出与query得分最高的一项
+
+    choices应为预先规范化（match_key）的文本。得分相同时返回下标最小的一项。
+
+    Returns:
+        (下标, 得分)，没有达到score_cutoff的项时返回None
+    """
+    if not query or not choices:
+        return None
+    cutoff = settings.MATERIAL_FUZZY_THRESHOLD if score_cutoff is None else score_cutoff
+    result = process.extractOne(query, choices, scorer=scorer or get_scorer(), score_cutoff=cutoff)
+    if result is None:
+        return None
+    return result[2], float(result[1])
+
+
+def best_match_among(query: str, choices: Sequence[str], candidates: Sequence[int],
+                     scorer: Optional[Callable] = None,
+                     score_cutoff: Optional[float] = None) -> Optional[Tuple[int, float]]:
+    """只对choices中candidates指定的项打分，找出得分最高的一项
+
+    candidates应按升序排列，得分相同时与best_match一样返回下标最小的一项。
+
+    Returns:
+        (choices中的下标, 得分)，没有达到score_cutoff的项时返回None
+    """
+    match = best_match(query, [choices[i] for i in candidates], scorer, score_cutoff)
+    if match is None:
+        return None
+    return int(candidates[match[0]]), match[1]
+
+
+def best_matches(queries: Sequence[str], choices: Sequence[str], scorer: Optional[Callable] = None,
+                 score_cutoff: Optional[float] = None,
+                 workers: Optional[int] = None) -> List[Optional[Tuple[int, float]]]:
+    """一次本地调用为一批query在choices中各找出得分最高的一项
+
+    使用process.cdist多线程计算得分矩阵，query较多时分块计算以限制矩阵内存。
+    结果与逐个调用best_match相同。
+    """
+    results: List[Optional[Tuple[int, float]]] = [None] * len(queries)
+    if not choices:
+        return results
+    cutoff = settings.MATERIAL_FUZZY_THRESHOLD if score_cutoff is None else score_cutoff
+    scorer = scorer or get_scorer()
+    workers = settings.MATERIAL_FUZZY_WORKERS if workers is None else workers
+
+    # 空查询不参与打分
+    positions = [i for i, query in enumerate(queries) if query]
+    chunk = max(1, _MAX_MATRIX_CELLS // len(choices))
+    for start in range(0, len(positions), chunk):
+        batch = positions[start:start + chunk]
+        scores = process.cdist([queries[i] for i in batch], choices, scorer=scorer,
+                               score_cutoff=cutoff, dtype=np.float32, workers=workers)
+        best = scores.argmax(axis=1)
+        for row, (position, index) in enumerate(zip(batch, best)):
+            # cdist将低于score_cutoff的得分置为0；最终得分按双精度重新计算
+            if scores[row, index] > 0:
+                score = scorer(queries[position], choices[index])
+                if score >= cutoff:
+                    results[position] = int(index), float(score)
+    return results
@@ -1,15 +1,22 @@
-from typing import List, Optional, Dict
-from rapidfuzz import fuzz
+from typing import List, Optional, Dict, Tuple
+import asyncio
 from app.models.material import MaterialBase, MaterialMatch
+from app.models.ocr import TableRow
+from app.core.config import settings
 from app.core.database import Database, COLLECTIONS
 from app.services.matcher.synonym_service import SynonymService
+from app.services.matcher.catalog_index import FuzzyView, MaterialCatalog, material_catalog
+from app.services.matcher.fuzzy import best_match, best_match_among, best_matches, get_scorer
+from app.utils.text_normalizer import match_key
 
 class MaterialMatcher:
-    def __init__(self):
+    def __init__(self, catalog: Optional[MaterialCatalog] = None):
         self.db = Database.get_db()
         self.collection = self.db[COLLECTIONS["materials"]]
         self.min_confidence = 0.5
         self.synonym_service = SynonymService()
+        # 物料查找使用进程内索引，不访问数据库
+        self.catalog = catalog or material_catalog
 
     async def match_material(self, text: str, spec: Optional[str] = None) -> MaterialMatch:
         """
@@ -22,6 +29,8 @@ class MaterialMatcher:
         返回:
             MaterialMatch对象
         """
+        await self.catalog.ensure_loaded(self.collection)
+        
         # 1. 尝试完全匹配
         exact_match = await self._exact_match(text)
         if exact_match:
@@ -76,12 +85,92 @@ class MaterialMatcher:
             material_info=None
         )
 
+    def _result(self, text: str, match_type: str, confidence: float,
+                material: Optional[MaterialBase]) -> MaterialMatch:
+        return MaterialMatch(
+            original_text=text,
+            matched_code=material.material_code if material else "",
+            confidence=confidence,
+            match_type=match_type,
+            material_info=material
+        )
+
+    async def match_batch(self, items: List[Tuple[str, Optional[str]]]) -> List[MaterialMatch]:
+        """
+        批量匹配物料，每个匹配阶段对整批只执行一次
+        
+        依次为：精确名称查找、同义词字典（一次加载）、规格查找、对剩余文本的一次向量化模糊匹配。
+        名称和规格相同的项只匹配一次。
+        
+        参数:
+            items: (物料名称, 规格) 列表
+            
+        返回:
+            与items一一对应的MaterialMatch列表
+        """
+        await self.catalog.ensure_loaded(self.collection)
+        keys = [(name, spec or None) for name, spec in items]
+        results: Dict[Tuple[str, Optional[str]], MaterialMatch] = {}
+        
+        # 1. 精确匹配
+        pending = []
+        for key in dict.fromkeys(keys):
+            material = self.catalog.find_by_name(key[0])
+            if material:
+                results[key] = self._result(key[0], "exact", 1.0, material)
+            else:
+                pending.append(key)
+        
+        # 2. 同义词匹配
+        if pending:
+            lookup = await self.synonym_service.load_lookup(category="material_name")
+            # 未精确命中的文本要与全部同义词模糊打分，在线程中执行
+            codes = await asyncio.to_thread(lookup.find_many, [name for name, _ in pending])
+            rest = []
+            for key, code in zip(pending, codes):
+                material = self.catalog.get(code) if code else None
+                if material:
+                    results[key] = self._result(key[0], "synonym", 0.9, material)
+                else:
+                    rest.append(key)
+            pending = rest
+        
+        # 3. 规格匹配
+        rest = []
+        for key in pending:
+            material = self.catalog.find_by_spec(*key) if key[1] else None
+            if material:
+                results[key] = self._result(key[0], "specification", 0.8, material)
+            else:
+                rest.append(key)
+        pending = rest
+        
+        # 4. 模糊匹配
+        if pending:
+            fuzzy_matches = await self._fuzzy_match_many([name for name, _ in pending])
+            for key, match in zip(pending, fuzzy_matches):
+                if match:
+                    results[key] = self._result(key[0], "fuzzy", match["confidence"], match["material"])
+                else:
+                    results[key] = self._result(key[0], "none", 0.0, None)
+        
+        return [results[key] for key in keys]
+
+    async def match_rows(self, rows: List[TableRow]) -> List[MaterialMatch]:
+        """
+        匹配表格识别结果中的结构化行
+        
+        参数:
+            rows: TableStructure.data_rows
+            
+        返回:
+            与rows一一对应的MaterialMatch列表，名称和规格相同的行只匹配一次
+        """
+        return await self.match_batch([(row.material_name, row.specification) for row in rows])
+
     async def _exact_match(self, text: str) -> Optional[MaterialBase]:
         """完全匹配"""
-        doc = await self.collection.find_one({"material_name": text})
-        if doc:
-            return MaterialBase(**doc)
-        return None
+        return self.catalog.find_by_name(text)
 
     async def _synonym_match(self, text: str) -> Optional[MaterialBase]:
         """同义词匹配"""
@@ -89,35 +178,58 @@ class MaterialMatcher:
         synonym_group = await self.synonym_service.find_synonym(text, category="material_name")
         if synonym_group:
             # 获取关联的物料信息
-            doc = await self.collection.find_one({"material_code": synonym_group.material_code})
-            if doc:
-                return MaterialBase(**doc)
+            return self.catalog.get(synonym_group.material_code)
         return None
 
     async def _spec_match(self, text: str, spec: str) -> Optional[MaterialBase]:
-        """规格匹配"""
-        cursor = self.collection.find({
-            "material_name": {"$regex": text, "$options": "i"},
-            "specification": spec
-        })
-        async for doc in cursor:
-            return MaterialBase(**doc)
-        return None
+        """规格匹配：结构化规格键相同的物料中按名称相似度取最优"""
+        return self.catalog.find_by_spec(text, spec)
+
+    def _fuzzy_result(self, match: Optional[Tuple[str, float]]) -> Optional[Dict]:
+        """按物料编码取物料；打分期间物料已被删除时视为未匹配"""
+        if match is None:
+            return None
+        code, score = match
+        material = self.catalog.get(code)
+        if material is None:
+            return None
+        return {
+            "material": material,
+            "confidence": score / 100,
+            "material_code": code
+        }
+
+    def _fuzzy_search(self, key: str, scorer, view: FuzzyView) -> Optional[Tuple[str, float]]:
+        """目录较大时只对n-gram候选打分，否则对整个物料目录打分，返回 (物料编码, 得分)"""
+        if view.ngrams is None:
+            match = best_match(key, view.name_keys, scorer)
+        else:
+            candidates = view.ngrams.candidates(key, settings.MATERIAL_NGRAM_CANDIDATES)
+            match = best_match_among(key, view.name_keys, candidates, scorer)
+        # 下标只在打分所用的目录中有效，在线程内换算为编码
+        return (view.codes[match[0]], match[1]) if match else None
 
     async def _fuzzy_match(self, text: str) -> Optional[Dict]:
-        """模糊匹配"""
-        best_match = None
-        highest_ratio = 0
-
-        cursor = self.collection.find({})
-        async for doc in cursor:
-            ratio = fuzz.ratio(text.lower(), doc["material_name"].lower())
-            if ratio > highest_ratio and ratio >= 60:  # 60%的相似度阈值
-                highest_ratio = ratio
-                best_match = {
-                    "material": MaterialBase(**doc),
-                    "confidence": ratio / 100,
-                    "material_code": doc["material_code"]
-                }
-
-        return best_match if highest_ratio >= 60 else None 
\ No newline at end of file
+        """模糊匹配：在线程中一次本地调用完成候选生成和打分"""
+        match = await asyncio.to_thread(
+            self._fuzzy_search, match_key(text), get_scorer(), self.catalog.fuzzy_view()
+        )
+        return self._fuzzy_result(match)
+
+    def _fuzzy_search_many(self, keys: List[str], scorer,
+                           view: FuzzyView) -> List[Optional[Tuple[str, float]]]:
+        if view.ngrams is None:
+            return [
+                (view.codes[match[0]], match[1]) if match else None
+                for match in best_matches(keys, view.name_keys, scorer)
+            ]
+        return [self._fuzzy_search(key, scorer, view) for key in keys]
+
+    async def _fuzzy_match_many(self, texts: List[str]) -> List[Optional[Dict]]:
+        """批量模糊匹配：目录较小时一次cdist调用计算所有文本与物料目录的得分，
+        较大时逐个文本只对n-gram候选打分"""
+        matches = await asyncio.to_thread(
+            self._fuzzy_search_many, [match_key(text) for text in texts], get_scorer(),
+            self.catalog.fuzzy_view()
+        )
+        return [self._fuzzy_result(match) for match in matches]
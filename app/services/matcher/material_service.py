@@ -1,8 +1,10 @@
 from typing import List, Optional, Dict
 from app.core.database import Database, COLLECTIONS
 from app.models.material import MaterialBase, MaterialCreate, MaterialInDB
+from app.utils.spec_parser import spec_key
 import pandas as pd
 from datetime import datetime
+import re
 import uuid
 
 class MaterialService:
@@ -10,6 +12,16 @@ class MaterialService:
         self.db = Database.get_db()
         self.collection = self.db[COLLECTIONS["materials"]]
     
+    @staticmethod
+    def stamp_for_upsert(material: Dict) -> Dict:
+        """按物料编码更新前补充索引字段
+
+        updated_at用于物料索引增量刷新，spec_key用于按结构化规格查询
+        """
+        material["updated_at"] = datetime.utcnow()
+        material["spec_key"] = spec_key(str(material.get("specification", "")))
+        return material
+    
     async def import_from_excel(self, df: pd.DataFrame) -> Dict[str, int]:
         """从Excel导入物料数据"""
         total = len(df)
@@ -38,6 +50,7 @@ class MaterialService:
                 material_db = MaterialInDB(
                     **material.dict(),
                     _id=str(uuid.uuid4()),
+                    spec_key=spec_key(material.specification),
                     created_at=datetime.utcnow(),
                     updated_at=datetime.utcnow()
                 )
@@ -65,17 +78,19 @@ class MaterialService:
         """搜索物料"""
         query = {}
         
+        # 关键字按字面匹配，DN100*80、(碳钢) 等不作为正则解释
         if keyword:
+            pattern = re.escape(keyword)
             query["$or"] = [
-                {"material_code": {"$regex": keyword, "$options": "i"}},
-                {"material_name": {"$regex": keyword, "$options": "i"}}
+                {"material_code": {"$regex": pattern, "$options": "i"}},
+                {"material_name": {"$regex": pattern, "$options": "i"}}
             ]
         
         if category:
             query["category.level1"] = category
             
         if specification:
-            query["specification"] = {"$regex": specification, "$options": "i"}
+            query["specification"] = {"$regex": re.escape(specification), "$options": "i"}
             
         cursor = self.collection.find(query)
         materials = []
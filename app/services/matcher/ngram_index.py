@@ -0,0 +1,225 @@
+import os
+import re
+import threading
+from array import array
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set
+import numpy as np
+
+# 规格等字母数字词元（已规范化为小写），如 dn100、pn16、316l、100*80
+_ALNUM_PATTERN = re.compile(r"[a-z0-9]+(?:[./*\-][a-z0-9]+)*")
+_SEPARATOR_PATTERN = re.compile(r"[*/\-]")
+# 连续的中文字符
+_CJK_PATTERN = re.compile(r"[一-鿿]+")
+
+SNAPSHOT_VERSION = 1
+
+
+def tokenize(key: str) -> Set[str]:
+    """将match_key规范化后的文本切分为n-gram
+
+    中文按连续字符生成二元和三元组（单个字符的片段保留单字），字母数字部分按完整词元
+    及以*/-分隔的各段。
+    """
+    grams = set()
+    for token in _ALNUM_PATTERN.findall(key):
+        grams.add(token)
+        # 复合规格（如 80*40*2.75）同时按各段索引，OCR漏识别其中一段时仍能召回
+        grams.update(_SEPARATOR_PATTERN.split(token))
+    for run in _CJK_PATTERN.findall(key):
+        if len(run) == 1:
+            grams.add(run)
+            continue
+        for n in (2, 3):
+            grams.update(run[i:i + n] for i in range(len(run) - n + 1))
+    return grams
+
+
+class NgramIndex:
+    """n-gram倒排索引，用于模糊匹配的候选生成
+
+    每个n-gram对应一个int32倒排表（array，追加O(1)，查询时零拷贝转换为numpy数组）。
+    条目使用内部编号，外部编号（物料目录下标）更新时旧条目只做标记删除，
+    删除条目超过一定比例时整体重建倒排表。
+    出现次数超过max_posting的n-gram区分度太低，查询时忽略，使查询耗时不随目录规模增长。
+    查询在线程中执行、更新在事件循环中执行，两者由一个锁串行化：查询期间倒排表被
+    numpy零拷贝引用，此时追加会抛出BufferError，更新到一半的编号也会错位。
+    """
+
+    def __init__(self, max_posting: int = 20000, compact_ratio: float = 0.25):
+        self.max_posting = max_posting
+        self.compact_ratio = compact_ratio
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self):
+        self.postings: Dict[str, array] = {}
+        self._keys: List[str] = []          # 内部编号 -> 文本
+        self._external = array("i")         # 内部编号 -> 外部编号
+        self._alive = bytearray()           # 内部编号 -> 是否有效
+        self._by_external: Dict[int, int] = {}
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._by_external)
+
+    def _insert(self, external: int, key: str):
+        internal = len(self._keys)
+        self._keys.append(key)
+        self._external.append(external)
+        self._alive.append(1)
+        self._by_external[external] = internal
+        for gram in tokenize(key):
+            posting = self.postings.get(gram)
+            if posting is None:
+                posting = self.postings[gram] = array("i")
+            posting.append(internal)
+
+    def add(self, external: int, key: str):
+        """新增条目；外部编号已存在时替换原条目"""
+        with self._lock:
+            internal = self._by_external.get(external)
+            if internal is not None:
+                if self._keys[internal] == key:
+                    return
+                self._kill(internal)
+            self._insert(external, key)
+
+    def remove(self, external: int):
+        """删除条目"""
+        with self._lock:
+            internal = self._by_external.pop(external, None)
+            if internal is not None:
+                self._alive[internal] = 0
+                self._dead += 1
+                self._maybe_compact()
+
+    def _kill(self, internal: int):
+        del self._by_external[self._external[internal]]
+        self._alive[internal] = 0
+        self._dead += 1
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        if self._dead > max(1000, self.compact_ratio * len(self._keys)):
+            self.compact()
+
+    def compact(self):
+        """去掉已删除的条目并重建倒排表"""
+        with self._lock:
+            entries = [(self._external[i], self._keys[i]) for i in range(len(self._keys)) if self._alive[i]]
+            self.build(entries)
+
+    def build(self, entries: Iterable):
+        """由 (外部编号, 文本) 全量构建"""
+        with self._lock:
+            self._clear()
+            for external, key in entries:
+                self._insert(external, key)
+
+    def candidates(self, key: str, limit: int) -> np.ndarray:
+        """按共有n-gram数从多到少取前limit个候选，返回按外部编号升序排列的数组"""
+        grams = tokenize(key)
+        with self._lock:
+            postings = [self.postings[gram] for gram in grams if gram in self.postings]
+            if not postings:
+                return np.empty(0, dtype=np.int32)
+            selective = [p for p in postings if len(p) <= self.max_posting]
+            if not selective:
+                # 全部是高频n-gram时只用其中最少见的一个
+                selective = [min(postings, key=len)]
+            ids = np.concatenate([np.frombuffer(p, dtype=np.int32) for p in selective])
+            ids, counts = np.unique(ids, return_counts=True)
+            if self._dead:
+                alive = np.frombuffer(self._alive, dtype=np.uint8)[ids].astype(bool)
+                ids, counts = ids[alive], counts[alive]
+            if len(ids) > limit:
+                # 共有数相同时优先内部编号小的条目，结果与输入顺序无关
+                order = np.lexsort((ids, -counts))[:limit]
+                ids = ids[order]
+            external = np.frombuffer(self._external, dtype=np.int32)[ids]
+        return np.sort(external)
+
+    def save(self, path: str, codes: Sequence[str]):
+        """保存快照：倒排表连同各条目的物料编码和文本
+
+        Args:
+            codes: 外部编号 -> 物料编码，用于加载时对应到新的目录下标
+        """
+        with self._lock:
+            alive = [i for i in range(len(self._keys)) if self._alive[i]]
+            remap = np.full(len(self._keys), -1, dtype=np.int32)
+            remap[alive] = np.arange(len(alive), dtype=np.int32)
+
+            grams, offsets, flat = [], [0], []
+            for gram, posting in self.postings.items():
+                ids = remap[np.frombuffer(posting, dtype=np.int32)]
+                ids = ids[ids >= 0]
+                if len(ids):
+                    grams.append(gram)
+                    flat.append(ids)
+                    offsets.append(offsets[-1] + len(ids))
+            entry_codes = [codes[self._external[i]] for i in alive]
+            keys = [self._keys[i] for i in alive]
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            version=np.array([SNAPSHOT_VERSION]),
+            codes=np.array(entry_codes, dtype=object),
+            keys=np.array(keys, dtype=object),
+            grams=np.array(grams, dtype=object),
+            offsets=np.array(offsets, dtype=np.int64),
+            postings=np.concatenate(flat) if flat else np.empty(0, dtype=np.int32)
+        )
+        os.replace(tmp_path, path)
+
+    def load(self, path: str, slots: Mapping[str, int], keys: Sequence[str]) -> Optional[int]:
+        """加载快照并与当前物料目录对齐
+
+        快照中的条目按物料编码对应到当前目录下标；编码不存在或文本已变化的条目删除，
+        快照中没有的物料增量加入。
+
+        Args:
+            slots: 物料编码 -> 当前目录下标
+            keys: 当前目录下标 -> 文本
+
+        Returns:
+            与快照相比删除和新增的条目数，快照不可用时返回None
+        """
+        try:
+            with np.load(path, allow_pickle=True) as data:
+                if int(data["version"][0]) != SNAPSHOT_VERSION:
+                    return None
+                codes, snap_keys = data["codes"], data["keys"]
+                grams, offsets, flat = data["grams"], data["offsets"], data["postings"]
+        except (OSError, KeyError, ValueError):
+            return None
+
+        with self._lock:
+            self._clear()
+            self._keys = list(snap_keys)
+            self._external = array("i", (slots.get(code, -1) for code in codes))
+            self._alive = bytearray(len(self._keys))
+            for internal, (external, key) in enumerate(zip(self._external, self._keys)):
+                if external >= 0 and keys[external] == key and external not in self._by_external:
+                    self._alive[internal] = 1
+                    self._by_external[external] = internal
+            self._dead = changed = len(self._keys) - len(self._by_external)
+            flat = flat.astype(np.int32, copy=False)
+            for i, gram in enumerate(grams):
+                self.postings[gram] = array("i", flat[offsets[i]:offsets[i + 1]].tobytes())
+
+            for external, key in enumerate(keys):
+                if external not in self._by_external:
+                    self._insert(external, key)
+                    changed += 1
+            self._maybe_compact()
+            return changed
+
+    def memory_usage(self) -> int:
+        """倒排表及条目占用的字节数（近似）"""
+        with self._lock:
+            postings = sum(p.buffer_info()[1] * p.itemsize + 64 for p in self.postings.values())
+            grams = sum(len(gram) * 4 + 80 for gram in self.postings)
+            return postings + grams + self._external.buffer_info()[1] * 4 + len(self._alive) + 8 * len(self._keys)
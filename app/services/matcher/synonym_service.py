@@ -1,10 +1,73 @@
-from typing import List, Optional, Dict
+import asyncio
+from typing import Iterable, List, Optional, Dict
 from uuid import uuid4
-from app.models.material import SynonymGroup, SynonymCreate
+from app.models.material import MaterialBase, SynonymGroup, SynonymCreate
 from app.core.database import Database, COLLECTIONS
 from app.core.monitoring import monitor_performance
+from app.utils.text_normalizer import match_key, match_keys
+from app.services.matcher.fuzzy import best_matches
+from app.core.config import settings
 from rapidfuzz import fuzz
 import re
+import time
+
+
+class SynonymLookup:
+    """同义词字典
+
+    由一次查询得到的同义词组构建，批量匹配时先按标准名称、再按同义词精确查找，
+    剩余文本一次性与所有标准名称和同义词做模糊匹配。
+    """
+
+    def __init__(self, docs: Iterable[Dict], min_confidence: float):
+        self.min_confidence = min_confidence
+        self.material_codes: List[str] = []
+        self.by_standard: Dict[str, int] = {}
+        self.by_synonym: Dict[str, int] = {}
+        names: List[str] = []
+        self._groups: List[int] = []  # 模糊匹配候选对应的同义词组
+        for group, doc in enumerate(docs):
+            self.material_codes.append(doc["material_code"])
+            self.by_standard.setdefault(doc["standard_name"], group)
+            for synonym in doc.get("synonyms", []):
+                self.by_synonym.setdefault(synonym, group)
+            for name in [doc["standard_name"], *doc.get("synonyms", [])]:
+                names.append(name)
+                self._groups.append(group)
+        self._keys = match_keys(names)
+
+    def __len__(self) -> int:
+        return len(self.material_codes)
+
+    def find_many(self, texts: List[str]) -> List[Optional[str]]:
+        """返回每个文本匹配到的同义词组关联的物料编码"""
+        codes: List[Optional[str]] = [None] * len(texts)
+        pending = []
+        for i, text in enumerate(texts):
+            if not text.strip():
+                continue
+            group = self.by_standard.get(text, self.by_synonym.get(text))
+            if group is not None:
+                codes[i] = self.material_codes[group]
+            else:
+                pending.append(i)
+
+        if pending and self._keys:
+            matches = best_matches(match_keys([texts[i] for i in pending]), self._keys,
+                                   fuzz.ratio, self.min_confidence * 100)
+            for i, match in zip(pending, matches):
+                if match is not None:
+                    codes[i] = self.material_codes[self._groups[match[0]]]
+        return codes
+
+
+# 同义词字典缓存：类别 -> (构建时间, SynonymLookup)，本进程修改同义词时清空
+_lookup_cache: Dict[Optional[str], tuple] = {}
+
+
+def invalidate_synonym_lookup():
+    _lookup_cache.clear()
+
 
 class SynonymService:
     def __init__(self):
@@ -24,6 +87,7 @@ class SynonymService:
             status=True
         )
         await self.collection.insert_one(group.model_dump())
+        invalidate_synonym_lookup()
         return group
 
     @monitor_performance("batch_create_synonyms")
@@ -71,6 +135,7 @@ class SynonymService:
             {"group_id": group_id},
             {"$set": {"synonyms": list(set(synonyms))}}  # 去重
         )
+        invalidate_synonym_lookup()
         if result.modified_count:
             return await self.get_synonym_group(group_id)
         return None
@@ -79,6 +144,7 @@ class SynonymService:
     async def delete_synonym_group(self, group_id: str) -> bool:
         """删除同义词组"""
         result = await self.collection.delete_one({"group_id": group_id})
+        invalidate_synonym_lookup()
         return bool(result.deleted_count)
 
     @monitor_performance("find_synonym")
@@ -111,11 +177,12 @@ class SynonymService:
         # 2. 尝试模糊匹配
         best_match = None
         highest_ratio = 0
+        key = match_key(text)
         
         cursor = self.collection.find(query)
         async for doc in cursor:
             # 检查标准名称
-            ratio = fuzz.ratio(text.lower(), doc["standard_name"].lower())
+            ratio = fuzz.ratio(key, match_key(doc["standard_name"]))
             if ratio > highest_ratio and ratio >= self.min_confidence * 100:
                 highest_ratio = ratio
                 best_match = doc
@@ -123,7 +190,7 @@ class SynonymService:
 
             # 检查同义词列表
             for synonym in doc["synonyms"]:
-                ratio = fuzz.ratio(text.lower(), synonym.lower())
+                ratio = fuzz.ratio(key, match_key(synonym))
                 if ratio > highest_ratio and ratio >= self.min_confidence * 100:
                     highest_ratio = ratio
                     best_match = doc
@@ -131,6 +198,26 @@ class SynonymService:
 
         return SynonymGroup(**best_match) if best_match else None
 
+    @monitor_performance("load_synonym_lookup")
+    async def load_lookup(self, category: Optional[str] = None) -> SynonymLookup:
+        """一次查询加载启用的同义词组，构建批量匹配用的同义词字典
+
+        结果缓存 MATCH_SYNONYM_CACHE_SECONDS 秒（其他进程修改的同义词在过期后生效）。
+        """
+        cached = _lookup_cache.get(category)
+        if cached and time.monotonic() - cached[0] < settings.MATCH_SYNONYM_CACHE_SECONDS:
+            return cached[1]
+
+        query = {"status": True}
+        if category:
+            query["category"] = category
+        cursor = self.collection.find(query, {"_id": 0, "standard_name": 1, "synonyms": 1, "material_code": 1})
+        docs = [doc async for doc in cursor]
+        # 规范化全部名称的开销随同义词数量增长，在线程中构建
+        lookup = await asyncio.to_thread(SynonymLookup, docs, self.min_confidence)
+        _lookup_cache[category] = (time.monotonic(), lookup)
+        return lookup
+
     @monitor_performance("get_all_synonyms")
     async def get_all_synonyms(self, category: Optional[str] = None) -> List[SynonymGroup]:
         """获取所有同义词组"""
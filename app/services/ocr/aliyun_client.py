@@ -0,0 +1,191 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from urllib.parse import quote
+import aiohttp
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENDPOINT = "ocr-api.cn-shanghai.aliyuncs.com"
+API_VERSION = "2021-07-07"
+SIGNATURE_ALGORITHM = "ACS3-HMAC-SHA256"
+
+# 可重试的HTTP状态码和错误码前缀
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+_RETRY_CODES = ("Throttling", "ServiceUnavailable", "InternalError")
+
+
+class AliyunOCRError(Exception):
+    """阿里云OCR调用失败"""
+
+    def __init__(self, message: str, code: str = "", status: int = 0, retryable: bool = False):
+        super().__init__(message)
+        self.code = code
+        self.status = status
+        self.retryable = retryable
+
+
+def _percent_encode(value: str) -> str:
+    return quote(value, safe="-_.~")
+
+
+def sign_request(method: str, host: str, query: Dict[str, str], headers: Dict[str, str],
+                 body: bytes, access_key_id: str, access_key_secret: str) -> Dict[str, str]:
+    """按阿里云V3签名（ACS3-HMAC-SHA256）为请求添加签名头，返回新的请求头"""
+    headers = {key.lower(): value for key, value in headers.items()}
+    headers["host"] = host
+    headers["x-acs-content-sha256"] = hashlib.sha256(body).hexdigest()
+
+    signed = sorted(key for key in headers if key in ("host", "content-type") or key.startswith("x-acs-"))
+    canonical_headers = "".join(f"{key}:{headers[key].strip()}\n" for key in signed)
+    canonical_query = "&".join(
+        f"{_percent_encode(key)}={_percent_encode(value)}" for key, value in sorted(query.items())
+    )
+    canonical_request = "\n".join([
+        method.upper(), "/", canonical_query, canonical_headers,
+        ";".join(signed), headers["x-acs-content-sha256"]
+    ])
+    string_to_sign = f"{SIGNATURE_ALGORITHM}\n" + hashlib.sha256(canonical_request.encode()).hexdigest()
+    signature = hmac.new(access_key_secret.encode(), string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+    headers["authorization"] = (
+        f"{SIGNATURE_ALGORITHM} Credential={access_key_id},"
+        f"SignedHeaders={';'.join(signed)},Signature={signature}"
+    )
+    return headers
+
+
+class AliyunOCRClient:
+    """阿里云OCR异步客户端
+
+    所有请求共用一个aiohttp会话，TCP连接保持长连接并复用；同时进行的请求数由信号量
+    限制；连接失败、超时、限流和5xx错误按带随机抖动的指数退避重试。
+    图片以二进制请求体发送，不做base64编码。
+    """
+
+    def __init__(self, endpoint: Optional[str] = None, protocol: Optional[str] = None,
+                 access_key_id: Optional[str] = None, access_key_secret: Optional[str] = None,
+                 max_concurrency: Optional[int] = None, pool_size: Optional[int] = None,
+                 connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None,
+                 max_retries: Optional[int] = None, record_dir: Optional[str] = None):
+        self.host = endpoint or settings.ALIYUN_ENDPOINT or DEFAULT_ENDPOINT
+        self.protocol = protocol or settings.ALIYUN_OCR_PROTOCOL
+        self.access_key_id = settings.ALIYUN_ACCESS_KEY_ID if access_key_id is None else access_key_id
+        self.access_key_secret = (settings.ALIYUN_ACCESS_KEY_SECRET
+                                  if access_key_secret is None else access_key_secret)
+        self.max_concurrency = max_concurrency or settings.ALIYUN_OCR_MAX_CONCURRENCY
+        self.pool_size = pool_size or settings.ALIYUN_OCR_POOL_SIZE
+        self.timeout = aiohttp.ClientTimeout(
+            sock_connect=connect_timeout or settings.ALIYUN_OCR_CONNECT_TIMEOUT,
+            sock_read=read_timeout or settings.ALIYUN_OCR_READ_TIMEOUT
+        )
+        self.max_retries = settings.ALIYUN_OCR_MAX_RETRIES if max_retries is None else max_retries
+        self.record_dir = settings.ALIYUN_OCR_RECORD_DIR if record_dir is None else record_dir
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {"requests": 0, "retries": 0, "errors": 0}
+
+    @property
+    def configured(self) -> bool:
+        """是否配置了访问密钥"""
+        return bool(self.access_key_id and self.access_key_secret)
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        """在当前事件循环中创建（或复用）会话和信号量"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._session
+
+    async def close(self):
+        """关闭会话及其连接池"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _backoff(self, attempt: int) -> float:
+        """完全抖动的指数退避时间（秒）"""
+        ceiling = min(settings.ALIYUN_OCR_BACKOFF_MAX, settings.ALIYUN_OCR_BACKOFF_BASE * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    async def call(self, action: str, body: bytes, query: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """调用OCR接口，返回响应JSON"""
+        session = self._ensure_session()
+        query = {key: str(value) for key, value in (query or {}).items()}
+        url = f"{self.protocol}://{self.host}/"
+
+        attempt = 0
+        while True:
+            headers = sign_request("POST", self.host, query, {
+                "content-type": "application/octet-stream",
+                "x-acs-action": action,
+                "x-acs-version": API_VERSION,
+                "x-acs-date": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "x-acs-signature-nonce": uuid.uuid4().hex
+            }, body, self.access_key_id, self.access_key_secret)
+            self.stats["requests"] += 1
+            try:
+                async with self._semaphore:
+                    async with session.post(url, params=query, data=body, headers=headers) as response:
+                        payload = await response.read()
+                        return self._parse_response(response.status, payload)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = AliyunOCRError(f"{type(e).__name__}: {e}", retryable=True)
+            except AliyunOCRError as e:
+                error = e
+
+            if not error.retryable or attempt >= self.max_retries:
+                self.stats["errors"] += 1
+                raise error
+            delay = self._backoff(attempt)
+            attempt += 1
+            self.stats["retries"] += 1
+            logger.warning(f"阿里云OCR请求失败，{delay:.2f}秒后第{attempt}次重试: {error}")
+            await asyncio.sleep(delay)
+
+    def _parse_response(self, status: int, payload: bytes) -> Dict[str, Any]:
+        """解析响应体，接口返回错误时抛出AliyunOCRError"""
+        try:
+            data = json.loads(payload) if payload else {}
+        except ValueError:
+            raise AliyunOCRError(f"Invalid response ({status}): {payload[:200]!r}",
+                                 status=status, retryable=status in _RETRY_STATUS)
+
+        if status >= 400 or ("Code" in data and "Data" not in data):
+            code = str(data.get("Code", ""))
+            raise AliyunOCRError(
+                f"{code or status}: {data.get('Message', '')}", code=code, status=status,
+                retryable=status in _RETRY_STATUS or code.startswith(_RETRY_CODES)
+            )
+        return data
+
+    async def recognize_table(self, image: bytes, **options) -> Dict[str, Any]:
+        """表格识别，返回解析后的Data字段"""
+        data = await self.call("RecognizeTableOcr", image, options)
+        if self.record_dir:
+            await asyncio.to_thread(self._record, image, data)
+        result = data.get("Data")
+        return json.loads(result) if isinstance(result, str) else (result or {})
+
+    def _record(self, image: bytes, data: Dict[str, Any]):
+        """保存原始响应，供本地桩服务回放"""
+        os.makedirs(self.record_dir, exist_ok=True)
+        path = os.path.join(self.record_dir, hashlib.sha256(image).hexdigest() + ".json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+
+# 全局客户端（API进程内共享连接池）
+aliyun_ocr_client = AliyunOCRClient()
@@ -1,43 +1,26 @@
-import os
-import base64
-import json
+import asyncio
 import logging
 import time
 from typing import Optional, Dict, Any
-from alibabacloud_ocr_api20210707.client import Client
-from alibabacloud_tea_openapi import models as open_api_models
-from alibabacloud_ocr_api20210707 import models as ocr_models
-from alibabacloud_tea_util import models as util_models
 from app.core.config import settings
-from app.models.ocr import OCRResult, TableCell, FileType
+from app.models.ocr import OCRResult, TableCell, TableStructure, FileType
+from app.services.ocr.aliyun_client import AliyunOCRClient, AliyunOCRError, aliyun_ocr_client
+from app.services.ocr.column_mapping import build_rows, resolve_columns
+from app.utils.text_normalizer import normalize_text
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class AliyunOCRService:
-    def __init__(self):
-        """初始化阿里云OCR客户端"""
-        try:
-            logger.info("正在初始化阿里云OCR服务...")
-            logger.info(f"Access Key ID: {settings.ALIYUN_ACCESS_KEY_ID}")
-            logger.info(f"Access Key Secret: {'*' * len(settings.ALIYUN_ACCESS_KEY_SECRET)}")
-            
-            # 创建配置
-            config = open_api_models.Config(
-                access_key_id=settings.ALIYUN_ACCESS_KEY_ID,
-                access_key_secret=settings.ALIYUN_ACCESS_KEY_SECRET,
-                endpoint="ocr-api.cn-shanghai.aliyuncs.com"
-            )
-            logger.info("已创建SDK配置")
-            
-            # 创建客户端
-            self.client = Client(config)
-            logger.info("已创建OCR客户端")
-                
-        except Exception as e:
-            logger.error(f"初始化OCR服务失败: {str(e)}")
-            raise
+    def __init__(self, client: Optional[AliyunOCRClient] = None):
+        """初始化阿里云OCR服务，默认使用进程内共享的异步客户端"""
+        self.client = client or aliyun_ocr_client
+
+    @property
+    def configured(self) -> bool:
+        """是否配置了访问密钥"""
+        return self.client.configured
 
     def _read_image_file(self, image_path: str) -> bytes:
         """读取图片文件
@@ -66,102 +49,99 @@ class AliyunOCRService:
         """
         try:
             logger.info(f"开始处理图片: {image_path}")
-            
-            # 读取并编码图片
-            image_data = self._read_image_file(image_path)
-            image_base64 = base64.b64encode(image_data).decode('utf-8')
-            logger.info("图片编码完成")
-            
-            # 创建请求
-            req = ocr_models.RecognizeTableOcrRequest(
-                image_url=image_base64,
-                need_sort=False,
-                skip_detection=False
-            )
-            logger.info("已创建识别请求")
-            
-            # 创建运行时选项
-            runtime = util_models.RuntimeOptions(
-                read_timeout=10000,
-                connect_timeout=10000,
-                retry_times=3
-            )
-            logger.info("已创建运行时选项")
+            image_data = await asyncio.to_thread(self._read_image_file, image_path)
             
             # 发送请求
             try:
-                logger.info("正在发送API请求...")
-                response = self.client.recognize_table_ocr_with_options(req, runtime)
-                logger.info("API请求成功")
-                logger.debug(f"API响应: {response.body.data}")
-            except Exception as e:
+                result = await self.client.recognize_table(image_data, NeedRotate="false")
+            except AliyunOCRError as e:
                 logger.error(f"API请求失败: {str(e)}")
                 return None
             
-            # 解析响应
-            if not response or not response.body or not response.body.data:
-                logger.error("响应数据为空")
-                return None
-            
-            try:
-                result = json.loads(response.body.data)
-            except Exception as e:
-                logger.error(f"解析响应数据失败: {str(e)}")
-                return None
-            
-            # 提取表格数据
-            tables = result.get("tables", [])
-            if not tables:
-                logger.warning("未检测到表格")
-                return None
-            
-            # 使用第一个表格
-            table = tables[0]
-            cells = []
-            
-            # 解析单元格数据
-            try:
-                for row_idx, row in enumerate(table.get("cells", [])):
-                    for col_idx, cell in enumerate(row):
-                        text = cell.get("text", "")
-                        confidence = float(cell.get("score", 0.0))
-                        row_span = cell.get("row_span", 1)
-                        col_span = cell.get("col_span", 1)
-                        
-                        cells.append(TableCell(
-                            text=text,
-                            row=row_idx,
-                            column=col_idx,
-                            row_span=row_span,
-                            col_span=col_span,
-                            confidence=confidence
-                        ))
-                logger.info(f"成功解析 {len(cells)} 个单元格")
-            except Exception as e:
-                logger.error(f"解析单元格数据失败: {str(e)}")
-                return None
-            
-            # 提取表头信息
-            headers = []
-            if cells:
-                try:
-                    header_cells = [cell for cell in cells if cell.row == 0]
-                    headers = [cell.text for cell in sorted(header_cells, key=lambda x: x.column)]
-                    logger.info(f"成功提取 {len(headers)} 个表头")
-                except Exception as e:
-                    logger.error(f"提取表头信息失败: {str(e)}")
-            
-            logger.info(f"成功解析表格: {len(cells)}个单元格, {len(headers)}个表头")
-            
-            return OCRResult(
-                cells=cells,
-                headers=headers,
-                raw_text=result.get("content", ""),
-                file_type=FileType.IMAGE
-            )
+            return self._parse_result(result)
             
         except Exception as e:
             logger.error(f"OCR识别失败: {str(e)}")
             import traceback
             logger.error(f"错误堆栈: {traceback.format_exc()}")
-            return None
\ No newline at end of file
+            return None
+
+    async def recognize_table_structure(self, image_path: str) -> TableStructure:
+        """识别表格并转换为与本地引擎相同的TableStructure，失败时抛出异常"""
+        image_data = await asyncio.to_thread(self._read_image_file, image_path)
+        start = time.perf_counter()
+        result = self._parse_result(await self.client.recognize_table(image_data, NeedRotate="false"))
+        if result is None:
+            raise ValueError("Aliyun OCR returned no table")
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+        return self.to_table_structure(result, {"engine": "aliyun", "timings_ms": {"cloud": elapsed_ms}})
+
+    def to_table_structure(self, result: OCRResult, stats: Optional[Dict[str, Any]] = None) -> TableStructure:
+        """将OCRResult转换为TableStructure：规范化文本、记录合并单元格并映射表头字段"""
+        cells = [cell.copy(update={"text": normalize_text(cell.text)}) for cell in result.cells]
+        headers = {cell.text: cell.column for cell in cells if cell.row < settings.TABLE_HEADER_ROWS}
+        merged_cells = [
+            {
+                "start_row": cell.row,
+                "end_row": cell.row + cell.row_span - 1,
+                "start_col": cell.column,
+                "end_col": cell.column + cell.col_span - 1
+            }
+            for cell in cells if cell.row_span > 1 or cell.col_span > 1
+        ]
+        roles, header_end = resolve_columns(cells, settings.TABLE_HEADER_SCAN_ROWS)
+        return TableStructure(
+            headers=headers,
+            cells=cells,
+            merged_cells=merged_cells,
+            column_roles=roles,
+            data_rows=build_rows(cells, roles, header_end),
+            stats=stats or {}
+        )
+
+    def _parse_result(self, result: Dict[str, Any]) -> Optional[OCRResult]:
+        """将接口返回的Data解析为OCRResult"""
+        # 提取表格数据
+        tables = result.get("tables", [])
+        if not tables:
+            logger.warning("未检测到表格")
+            return None
+        
+        # 使用第一个表格
+        table = tables[0]
+        cells = []
+        
+        # 解析单元格数据
+        try:
+            for row_idx, row in enumerate(table.get("cells", [])):
+                for col_idx, cell in enumerate(row):
+                    text = cell.get("text", "")
+                    confidence = float(cell.get("score", 0.0))
+                    row_span = cell.get("row_span", 1)
+                    col_span = cell.get("col_span", 1)
+                    
+                    cells.append(TableCell(
+                        text=text,
+                        row=row_idx,
+                        column=col_idx,
+                        row_span=row_span,
+                        col_span=col_span,
+                        confidence=confidence
+                    ))
+            logger.info(f"成功解析 {len(cells)} 个单元格")
+        except Exception as e:
+            logger.error(f"解析单元格数据失败: {str(e)}")
+            return None
+        
+        # 提取表头信息
+        header_cells = [cell for cell in cells if cell.row == 0]
+        headers = [cell.text for cell in sorted(header_cells, key=lambda x: x.column)]
+        
+        logger.info(f"成功解析表格: {len(cells)}个单元格, {len(headers)}个表头")
+        
+        return OCRResult(
+            cells=cells,
+            headers=headers,
+            raw_text=result.get("content", ""),
+            file_type=FileType.IMAGE
+        )
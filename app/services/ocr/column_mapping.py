@@ -0,0 +1,173 @@
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from app.models.ocr import TableCell, TableRow
+from app.utils.text_normalizer import full_to_half
+
+# 表头关键字 -> 字段，同一字段下越具体的写法放在越前面
+COLUMN_KEYWORDS: Dict[str, List[str]] = {
+    "material_name": ["货物(劳务)名称", "物料名称", "产品名称", "材料名称", "货物名称", "品名", "名称",
+                      "material_name"],
+    "specification": ["规格及型号", "规格型号", "规格", "型号", "口径", "specification"],
+    "quantity": ["订货数量", "数量", "quantity"],
+    "unit": ["计量单位", "基本单位", "单位", "unit"],
+    "connection": ["连接方式", "connection"],
+    "remarks": ["备注", "说明", "注", "remarks"]
+}
+
+# 表头行至少要匹配的字段数，避免把含“注”“型号”等字样的数据行当作表头
+MIN_HEADER_ROLES = 2
+
+_NUMBER_PATTERN = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def _header_key(text: str) -> str:
+    """表头比较用的键：全角转半角、去掉空白、转小写"""
+    return "".join(full_to_half(text).split()).lower()
+
+
+class ColumnKeywordMatcher:
+    """表头关键字匹配器
+
+    所有关键字编译为一个按长度降序排列的正则交替式，一次扫描即可找出文本中的全部关键字，
+    较长的关键字（如“物料名称”）优先于其中包含的短关键字（“名称”）。
+    """
+
+    def __init__(self, keywords: Dict[str, List[str]]):
+        self._roles: Dict[str, str] = {}
+        for role, words in keywords.items():
+            for word in words:
+                self._roles.setdefault(_header_key(word), role)
+        alternatives = sorted(self._roles, key=len, reverse=True)
+        self._pattern = re.compile("|".join(re.escape(word) for word in alternatives))
+
+    def score(self, text: str) -> Dict[str, float]:
+        """计算文本作为各字段表头的得分
+
+        得分为匹配到的关键字长度占整个表头文本长度的比例，“数量”得1.0，
+        “订货数量(个)”之类带附注的表头得分较低。
+        """
+        key = _header_key(text)
+        scores: Dict[str, float] = {}
+        if not key:
+            return scores
+        for match in self._pattern.finditer(key):
+            role = self._roles[match.group()]
+            scores[role] = max(scores.get(role, 0.0), len(match.group()) / len(key))
+        return scores
+
+
+_default_matcher = ColumnKeywordMatcher(COLUMN_KEYWORDS)
+
+
+def _assign_roles(column_scores: Dict[int, Dict[str, float]]) -> Dict[str, int]:
+    """按得分从高到低为各字段分配列，每个字段和每一列最多使用一次"""
+    candidates = sorted(
+        ((score, -col, role) for col, scores in column_scores.items() for role, score in scores.items()),
+        reverse=True
+    )
+    roles: Dict[str, int] = {}
+    used = set()
+    for score, neg_col, role in candidates:
+        col = -neg_col
+        if role in roles or col in used:
+            continue
+        roles[role] = col
+        used.add(col)
+    return roles
+
+
+def map_header_texts(headers: Sequence[str],
+                     matcher: ColumnKeywordMatcher = _default_matcher) -> Dict[str, int]:
+    """将表头文本列表（如Excel的列名）映射为 {字段: 列下标}"""
+    return _assign_roles({col: matcher.score(str(text)) for col, text in enumerate(headers)})
+
+
+def resolve_columns(cells: Iterable[TableCell], scan_rows: int = 5,
+                    matcher: ColumnKeywordMatcher = _default_matcher) -> Tuple[Dict[str, int], int]:
+    """在表格前scan_rows行中识别表头并确定各字段所在的列
+
+    选择匹配字段最多的一行作为表头，并包含其中跨行单元格覆盖的行以及紧随其后、
+    同样以表头关键字为主的行（多级表头）。跨列的表头单元格对其覆盖的每一列都有效，
+    每列取表头区域内得分最高的字段。
+
+    返回:
+        ({字段: 列下标}, 表头最后一行的行号)，未找到表头时返回 ({}, -1)
+    """
+    header_cells: Dict[int, List[Tuple[TableCell, Dict[str, float]]]] = {}
+    for cell in cells:
+        if cell.row < scan_rows:
+            scores = matcher.score(cell.text)
+            header_cells.setdefault(cell.row, []).append((cell, scores))
+    if not header_cells:
+        return {}, -1
+
+    def distinct_roles(row: int) -> int:
+        return len({role for _, scores in header_cells.get(row, []) for role in scores})
+
+    start = max(sorted(header_cells), key=distinct_roles)
+    if distinct_roles(start) < MIN_HEADER_ROLES:
+        return {}, -1
+
+    end = start + max(cell.row_span for cell, _ in header_cells[start]) - 1
+    while end + 1 in header_cells:
+        entries = header_cells[end + 1]
+        if sum(1 for _, scores in entries if scores) * 2 < len(entries):
+            break
+        end += 1
+
+    column_scores: Dict[int, Dict[str, float]] = {}
+    for row in range(start, end + 1):
+        for cell, scores in header_cells.get(row, []):
+            for col in range(cell.column, cell.column + cell.col_span):
+                current = column_scores.setdefault(col, {})
+                for role, score in scores.items():
+                    current[role] = max(current.get(role, 0.0), score)
+    return _assign_roles(column_scores), end
+
+
+def parse_quantity(text: str) -> Optional[float]:
+    """取文本中的第一个数字作为数量"""
+    match = _NUMBER_PATTERN.search(text or "")
+    return float(match.group()) if match else None
+
+
+def build_rows(cells: Iterable[TableCell], roles: Dict[str, int],
+               header_end: int = -1) -> List[TableRow]:
+    """按字段映射将表头之后的各行转换为TableRow
+
+    跨行的合并单元格（如合并的类别、连接方式）对其覆盖的每一行都有效。
+    物料名称和规格都为空的行（空行、合计行）被跳过。
+    """
+    if not roles:
+        return []
+    role_of = {col: role for role, col in roles.items()}
+
+    values: Dict[int, Dict[str, Tuple[str, float]]] = {}
+    for cell in cells:
+        if cell.row <= header_end:
+            continue
+        covered = [role_of[col] for col in range(cell.column, cell.column + cell.col_span) if col in role_of]
+        if not covered:
+            continue
+        for row in range(cell.row, cell.row + cell.row_span):
+            values.setdefault(row, {})[covered[0]] = (cell.text.strip(), cell.confidence)
+
+    rows = []
+    for row in sorted(values):
+        fields = values[row]
+        name = fields.get("material_name", ("", 0.0))[0]
+        spec = fields.get("specification", ("", 0.0))[0]
+        if not name and not spec:
+            continue
+        quantity_text = fields.get("quantity", ("", 0.0))[0]
+        rows.append(TableRow(
+            row_index=row,
+            material_name=name,
+            specification=spec,
+            quantity=parse_quantity(quantity_text),
+            unit=fields.get("unit", ("", 0.0))[0],
+            connection=fields.get("connection", ("", 0.0))[0],
+            remarks=fields.get("remarks", ("", 0.0))[0],
+            confidence=min(confidence for _, confidence in fields.values())
+        ))
+    return rows
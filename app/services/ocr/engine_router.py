@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import os
+import time
+from collections import Counter, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+from app.services.ocr.worker_pool import measure_service_time
+
+logger = logging.getLogger(__name__)
+
+LOCAL = "local"
+CLOUD = "cloud"
+
+
+class RollingWindow:
+    """最近N次调用的耗时和成败记录"""
+
+    def __init__(self, size: int):
+        self.latencies: Deque[float] = deque(maxlen=size)
+        self.outcomes: Deque[bool] = deque(maxlen=size)
+
+    def record(self, ok: bool, latency: Optional[float] = None):
+        self.outcomes.append(ok)
+        if ok and latency is not None:
+            self.latencies.append(latency)
+
+    def p95(self, default: float, min_samples: int = 1) -> float:
+        if len(self.latencies) < min_samples:
+            return default
+        return float(np.percentile(self.latencies, 95))
+
+    def error_rate(self, min_samples: int = 1) -> float:
+        if len(self.outcomes) < min_samples:
+            return 0.0
+        return 1.0 - sum(self.outcomes) / len(self.outcomes)
+
+
+class EngineRouter:
+    """本地PaddleOCR与阿里云表格OCR之间的路由
+
+    按文件选择引擎：本地有空闲工作进程时走本地；本地需要排队且按近期p95估算
+    云端更快时溢出到云端。本地耗时按每百万像素的秒数记录，因此图片越大越倾向
+    云端；云端错误率过高、未配置密钥或图片超出云端限制时只走本地。
+    所选引擎失败或超时时切换到另一个引擎重试一次。
+    """
+
+    def __init__(self, mode: Optional[str] = None, window: Optional[int] = None):
+        self.mode = (mode or settings.OCR_ENGINE_MODE).lower()
+        size = window or settings.OCR_ROUTER_WINDOW
+        # 本地：每百万像素耗时；云端：每次请求耗时
+        self.local = RollingWindow(size)
+        self.cloud = RollingWindow(size)
+        self.decisions: Counter = Counter()
+        self.fallbacks: Counter = Counter()
+
+    def _cloud_health(self, cloud_available: bool, file_bytes: int,
+                      image_size: Optional[Tuple[int, int]]) -> Optional[str]:
+        """云端不可用的原因，可用时返回None"""
+        if not cloud_available:
+            return "cloud_disabled"
+        if file_bytes > settings.OCR_ROUTER_CLOUD_MAX_BYTES or (
+                image_size and max(image_size) > settings.OCR_ROUTER_CLOUD_MAX_SIDE):
+            return "cloud_size_limit"
+        if self.cloud.error_rate(settings.OCR_ROUTER_MIN_SAMPLES) > settings.OCR_ROUTER_CLOUD_MAX_ERROR_RATE:
+            return "cloud_unhealthy"
+        return None
+
+    def can_spill(self, cloud_available: bool) -> bool:
+        """本地队列已满时能否把任务交给云端"""
+        return self.mode != LOCAL and self._cloud_health(cloud_available, 0, None) is None
+
+    def cacheable(self, result: Any) -> bool:
+        """识别结果能否写入缓存
+
+        auto模式下引擎按负载逐个文件选择，同一文件可能由不同引擎识别且结果不同，
+        因此只缓存本地结果；cloud模式只缓存云端结果。未经路由的结果（Excel、PDF）
+        总是由本地识别，可以缓存。
+        """
+        engine = result.stats.get("engine")
+        return engine is None or engine == (CLOUD if self.mode == CLOUD else LOCAL)
+
+    def estimate_local(self, megapixels: float, pending: int, workers: int) -> float:
+        """估算本地识别耗时：排队轮数 x 单张耗时
+
+        本地耗时样本只含工作进程执行时间，排队时间只由轮数计入。
+        """
+        per_mp = self.local.p95(settings.OCR_ROUTER_LOCAL_PRIOR_SECONDS_PER_MP, settings.OCR_ROUTER_MIN_SAMPLES)
+        waves = 1 + pending // max(1, workers)
+        return per_mp * max(megapixels, 0.1) * waves
+
+    def estimate_cloud(self) -> float:
+        return self.cloud.p95(settings.OCR_ROUTER_CLOUD_PRIOR_SECONDS, settings.OCR_ROUTER_MIN_SAMPLES)
+
+    def choose(self, image_size: Optional[Tuple[int, int]], file_bytes: int, pending: int,
+               workers: int, local_has_capacity: bool, cloud_available: bool) -> Tuple[str, str]:
+        """选择引擎
+
+        Returns:
+            (引擎, 原因)
+        """
+        cloud_blocked = self._cloud_health(cloud_available, file_bytes, image_size)
+        if self.mode == LOCAL:
+            return LOCAL, "mode_local"
+        if self.mode == CLOUD:
+            return (LOCAL, cloud_blocked) if cloud_blocked else (CLOUD, "mode_cloud")
+        if cloud_blocked:
+            return LOCAL, cloud_blocked
+        if not local_has_capacity:
+            return CLOUD, "local_queue_full"
+        if pending < workers:
+            return LOCAL, "local_idle"
+
+        megapixels = image_size[0] * image_size[1] / 1e6 if image_size else 1.0
+        if self.estimate_cloud() < self.estimate_local(megapixels, pending, workers):
+            return CLOUD, "local_slower"
+        return LOCAL, "cloud_slower"
+
+    async def _run(self, engine: str, runner: Callable[[], Awaitable[Any]], megapixels: float) -> Any:
+        """执行识别并记录耗时和成败"""
+        timeout = settings.OCR_ROUTER_LOCAL_TIMEOUT if engine == LOCAL else settings.OCR_ROUTER_CLOUD_TIMEOUT
+        window = self.local if engine == LOCAL else self.cloud
+        start = time.monotonic()
+        try:
+            with measure_service_time() as service:
+                result = await asyncio.wait_for(runner(), timeout=timeout or None)
+        except Exception:
+            window.record(False)
+            raise
+        elapsed = time.monotonic() - start
+        if engine == LOCAL:
+            # 按工作进程执行耗时记录，等待进程池空位的时间已由estimate_local的排队轮数计入
+            window.record(True, (sum(service) if service else elapsed) / max(megapixels, 0.1))
+        else:
+            window.record(True, elapsed)
+        return result
+
+    async def recognize(self, image_path: str, image_size: Optional[Tuple[int, int]],
+                        local: Callable[[], Awaitable[Any]], cloud: Callable[[], Awaitable[Any]],
+                        pending: int, workers: int, local_has_capacity: bool,
+                        cloud_available: bool) -> Any:
+        """按路由结果识别图片，失败或超时时切换到另一个引擎"""
+        file_bytes = os.path.getsize(image_path)
+        engine, reason = self.choose(image_size, file_bytes, pending, workers,
+                                     local_has_capacity, cloud_available)
+        self.decisions[f"{engine}:{reason}"] += 1
+        logger.info(f"OCR引擎路由: {os.path.basename(image_path)} -> {engine} ({reason}), "
+                    f"pending={pending}/{workers}, size={image_size}")
+
+        megapixels = image_size[0] * image_size[1] / 1e6 if image_size else 1.0
+        runners = {LOCAL: local, CLOUD: cloud}
+        try:
+            result = await self._run(engine, runners[engine], megapixels)
+            fallback = None
+        except Exception as e:
+            fallback = CLOUD if engine == LOCAL else LOCAL
+            if fallback == CLOUD and (self.mode == LOCAL or
+                                      self._cloud_health(cloud_available, file_bytes, image_size)):
+                raise
+            self.fallbacks[f"{engine}->{fallback}"] += 1
+            logger.warning(f"OCR引擎 {engine} 失败，切换到 {fallback}: {type(e).__name__}: {e}")
+            result = await self._run(fallback, runners[fallback], megapixels)
+
+        result.stats["engine"] = fallback or engine
+        result.stats["route"] = {"engine": engine, "reason": reason, "fallback": fallback}
+        return result
+
+    def status(self) -> Dict[str, Any]:
+        """路由统计"""
+        return {
+            "mode": self.mode,
+            "decisions": dict(self.decisions),
+            "fallbacks": dict(self.fallbacks),
+            "local_p95_seconds_per_mp": round(self.local.p95(0.0), 3),
+            "cloud_p95_seconds": round(self.cloud.p95(0.0), 3),
+            "cloud_error_rate": round(self.cloud.error_rate(), 3)
+        }
+
+
+ocr_engine_router = EngineRouter()
@@ -0,0 +1,508 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import cv2
+import numpy as np
+
+
+def _assign_axis(lo: np.ndarray, hi: np.ndarray, lines: np.ndarray) -> np.ndarray:
+    """在单个坐标轴上为每个区间找出重叠最大的分隔带
+
+    返回每个区间所属的分隔带下标，没有正重叠时为-1。重叠相同时取下标最小者，
+    与逐个单元格比较的结果一致。
+    """
+    n_bands = len(lines) - 1
+    result = np.full(len(lo), -1, dtype=np.intp)
+    if n_bands <= 0 or len(lo) == 0:
+        return result
+
+    pending = np.ones(len(lo), dtype=bool)
+    if np.all(np.diff(lines) >= 0):
+        # 分隔线有序时，完全落在某个分隔带内的区间直接二分查找
+        idx = np.searchsorted(lines, lo, side="right") - 1
+        in_range = (idx >= 0) & (idx < n_bands)
+        safe_idx = np.clip(idx, 0, n_bands - 1)
+        contained = in_range & (hi <= lines[safe_idx + 1]) & (hi > lo)
+        result[contained] = idx[contained]
+        pending = ~contained
+
+    # 跨越分隔线的区间计算重叠矩阵
+    if pending.any():
+        p_lo = lo[pending, None]
+        p_hi = hi[pending, None]
+        overlap = np.minimum(p_hi, lines[None, 1:]) - np.maximum(p_lo, lines[None, :-1])
+        best = np.argmax(overlap, axis=1)
+        best_overlap = overlap[np.arange(len(best)), best]
+        result[pending] = np.where(best_overlap > 0, best, -1)
+
+    return result
+
+
+def assign_boxes_to_cells(bounds: Sequence[Sequence[float]], rows: Sequence[float],
+                          cols: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+    """将文本框分配到重叠面积最大的单元格
+
+    参数:
+        bounds: 文本框外接矩形列表 [min_x, min_y, max_x, max_y]
+        rows: 水平分隔线的y坐标
+        cols: 垂直分隔线的x坐标
+
+    返回:
+        (行下标数组, 列下标数组)，未分配的文本框为-1
+    """
+    bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+    rows = np.asarray(rows, dtype=np.float64)
+    cols = np.asarray(cols, dtype=np.float64)
+
+    # 重叠面积等于两个坐标轴上重叠长度的乘积，因此可以按轴分别求最大值
+    row_idx = _assign_axis(bounds[:, 1], bounds[:, 3], rows)
+    col_idx = _assign_axis(bounds[:, 0], bounds[:, 2], cols)
+
+    unassigned = (row_idx < 0) | (col_idx < 0)
+    row_idx[unassigned] = -1
+    col_idx[unassigned] = -1
+    return row_idx, col_idx
+
+
+def box_bounds(box: List[List[float]]) -> List[float]:
+    """计算四点文本框的外接矩形 [min_x, min_y, max_x, max_y]"""
+    x_coords = [p[0] for p in box]
+    y_coords = [p[1] for p in box]
+    return [min(x_coords), min(y_coords), max(x_coords), max(y_coords)]
+
+
+def _axis_spans(length: int, tile_size: int, overlap: int,
+                max_side: int) -> List[Tuple[int, int, int, int]]:
+    """在单个坐标轴上切分重叠分块
+
+    返回 (起点, 终点, 核心区起点, 核心区终点) 列表。相邻分块的核心区以重叠带中线为界，
+    所有核心区恰好覆盖整个坐标轴且互不重叠。
+    """
+    if length <= max_side or length <= tile_size:
+        return [(0, length, 0, length)]
+
+    overlap = min(overlap, tile_size // 2)
+    count = int(np.ceil((length - overlap) / (tile_size - overlap)))
+    # 分块起点均匀分布，实际重叠不小于设定值
+    starts = np.round(np.linspace(0, length - tile_size, count)).astype(int).tolist()
+    spans = []
+    for i, start in enumerate(starts):
+        end = start + tile_size
+        core_start = 0 if i == 0 else (start + starts[i - 1] + tile_size) // 2
+        core_end = length if i == count - 1 else (starts[i + 1] + end) // 2
+        spans.append((start, end, core_start, core_end))
+    return spans
+
+
+def tile_rects(width: int, height: int, tile_size: int, overlap: int,
+               max_side: int) -> List[Tuple[List[int], List[int]]]:
+    """将大图切分为重叠分块
+
+    只有超过max_side的坐标轴才会被切分，另一轴保持完整，避免不必要地切断文本行。
+
+    返回:
+        [(分块矩形, 核心区矩形)]，矩形格式为 [x1, y1, x2, y2]。文本框中心落在
+        哪个分块的核心区内，就只保留该分块的识别结果
+    """
+    tiles = []
+    for y1, y2, cy1, cy2 in _axis_spans(height, tile_size, overlap, max_side):
+        for x1, x2, cx1, cx2 in _axis_spans(width, tile_size, overlap, max_side):
+            tiles.append(([x1, y1, x2, y2], [cx1, cy1, cx2, cy2]))
+    return tiles
+
+
+def _line_runs(profile: np.ndarray, threshold: float, max_gap: int = 0) -> List[Tuple[int, int]]:
+    """找出投影值超过阈值的连续区间 [start, end)，间隔不超过max_gap的区间合并"""
+    active = np.flatnonzero(profile > threshold)
+    if len(active) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(active) > max_gap + 1)
+    starts = np.concatenate(([active[0]], active[breaks + 1]))
+    ends = np.concatenate((active[breaks], [active[-1]])) + 1
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def _region_from_lines(h_mask: np.ndarray, v_mask: np.ndarray) -> Optional[List[int]]:
+    """取表格线连通域中外接矩形最大、且至少包含两条横线和两条竖线的区域"""
+    height, width = h_mask.shape
+    grid = cv2.dilate(cv2.bitwise_or(h_mask, v_mask), np.ones((3, 3), np.uint8), iterations=2)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(grid, connectivity=8)
+
+    best, best_area = None, 0
+    for x, y, w, h, _ in stats[1:count]:
+        if w < width * 0.3 or h < height * 0.05 or w * h <= best_area:
+            continue
+        h_lines = _line_runs((h_mask[y:y + h, x:x + w] > 0).sum(axis=1), w * 0.5)
+        v_lines = _line_runs((v_mask[y:y + h, x:x + w] > 0).sum(axis=0), h * 0.5)
+        if len(h_lines) >= 2 and len(v_lines) >= 2:
+            best, best_area = [x, y, x + w, y + h], w * h
+    return best
+
+
+def _region_from_text(text_mask: np.ndarray, min_block_ratio: float = 0.05) -> Optional[List[int]]:
+    """按文本密度投影取文本块的外接矩形
+
+    墨迹量不足最大文本块min_block_ratio的零散文本块（状态栏、页码、污点等）不计入。
+    """
+    height, width = text_mask.shape
+    blobs = cv2.morphologyEx(
+        text_mask, cv2.MORPH_CLOSE,
+        cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, width // 40), 1))
+    )
+    row_profile = (blobs > 0).sum(axis=1)
+    runs = _line_runs(row_profile, width * 0.05, max_gap=max(2, int(height * 0.03)))
+    if not runs:
+        return None
+
+    ink = [row_profile[start:end].sum() for start, end in runs]
+    kept = [run for run, amount in zip(runs, ink) if amount >= max(ink) * min_block_ratio]
+    top, bottom = kept[0][0], kept[-1][1]
+    cols = np.flatnonzero((text_mask[top:bottom] > 0).sum(axis=0) > 0)
+    if len(cols) == 0:
+        return None
+    return [int(cols[0]), top, int(cols[-1]) + 1, bottom]
+
+
+def _ink_outside(mask: np.ndarray, region: List[int]) -> float:
+    """区域外的墨迹占比"""
+    total = np.count_nonzero(mask)
+    if total == 0:
+        return 0.0
+    x1, y1, x2, y2 = region
+    return 1.0 - np.count_nonzero(mask[y1:y2, x1:x2]) / total
+
+
+def locate_table_region(image: np.ndarray, max_side: int = 1000, padding: int = 10,
+                        max_outside_ink: float = 0.1) -> Optional[Dict[str, Any]]:
+    """在缩略图上定位表格区域
+
+    优先使用表格线掩码（形态学开运算提取的横线/竖线），没有完整表格线、或线框外
+    的文字超过max_outside_ink时，退化为文本密度投影，取主要文本块的外接矩形。
+
+    返回:
+        {"bbox": 原图坐标 [x1, y1, x2, y2], "method": "lines" | "text", "area_ratio": 面积占比}，
+        未找到时返回None
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    height, width = gray.shape[:2]
+    scale = min(1.0, max_side / max(height, width))
+    if scale < 1.0:
+        gray = cv2.resize(gray, (max(1, int(width * scale)), max(1, int(height * scale))),
+                          interpolation=cv2.INTER_AREA)
+    thumb_height, thumb_width = gray.shape[:2]
+
+    # 深色墨迹为前景
+    ink = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C,
+                                cv2.THRESH_BINARY_INV, 15, 10)
+    h_mask = cv2.morphologyEx(ink, cv2.MORPH_OPEN, cv2.getStructuringElement(
+        cv2.MORPH_RECT, (max(10, thumb_width // 15), 1)))
+    v_mask = cv2.morphologyEx(ink, cv2.MORPH_OPEN, cv2.getStructuringElement(
+        cv2.MORPH_RECT, (1, max(10, thumb_height // 15))))
+
+    text_mask = cv2.subtract(ink, cv2.bitwise_or(h_mask, v_mask))
+    method = "lines"
+    region = _region_from_lines(h_mask, v_mask)
+    if region is None or _ink_outside(text_mask, region) > max_outside_ink:
+        # 表格线外仍有大量文字时，说明线框只是局部标注而不是表格边框
+        method = "text"
+        region = _region_from_text(text_mask)
+    if region is None:
+        return None
+
+    x1, y1, x2, y2 = region
+    bbox = [
+        max(0, int(x1 / scale) - padding),
+        max(0, int(y1 / scale) - padding),
+        min(width, int(np.ceil(x2 / scale)) + padding),
+        min(height, int(np.ceil(y2 / scale)) + padding)
+    ]
+    area_ratio = (bbox[2] - bbox[0]) * (bbox[3] - bbox[1]) / float(width * height)
+    return {"bbox": bbox, "method": method, "area_ratio": round(area_ratio, 4)}
+
+
+def _line_positions(mask: np.ndarray, axis: int, min_coverage: float, min_gap: int) -> np.ndarray:
+    """由线条掩码的投影得到分隔线位置
+
+    axis=1 对每一行求和得到横线的y坐标，axis=0 对每一列求和得到竖线的x坐标。
+    连续的高投影区间（粗线）取中点，间距小于min_gap的分隔线合并为一条。
+    """
+    profile = np.count_nonzero(mask, axis=axis)
+    runs = _line_runs(profile, mask.shape[axis] * min_coverage, max_gap=1)
+    if not runs:
+        return np.empty(0, dtype=int)
+
+    centers = np.array([(start + end - 1) // 2 for start, end in runs])
+    if len(centers) > 1 and min_gap > 0:
+        # 相邻位置间距小于min_gap时归为同一组，取组内平均值
+        group = np.concatenate(([0], np.cumsum(np.diff(centers) >= min_gap)))
+        centers = np.round(
+            np.bincount(group, weights=centers) / np.bincount(group)
+        ).astype(int)
+    return centers
+
+
+def grid_line_masks(image: np.ndarray, min_length_ratio: float = 0.1,
+                    min_vertical_length: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+    """用长条形结构元素对墨迹做开运算，得到只含横线和只含竖线的掩码
+
+    参数含义与 detect_grid_lines 相同，返回 (横线掩码, 竖线掩码)。
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    width = gray.shape[1]
+    ink = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C,
+                                cv2.THRESH_BINARY_INV, 15, 10)
+
+    h_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(10, int(width * min_length_ratio)), 1))
+    v_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(3, min_vertical_length)))
+    h_mask = cv2.morphologyEx(ink, cv2.MORPH_OPEN, h_kernel)
+    v_mask = cv2.morphologyEx(ink, cv2.MORPH_OPEN, v_kernel)
+    return h_mask, v_mask
+
+
+def _spanning_columns(cols: np.ndarray, v_mask: np.ndarray, min_span: float) -> np.ndarray:
+    """只保留竖线像素覆盖v_mask高度至少min_span比例的竖线"""
+    if len(cols) == 0 or v_mask.shape[0] == 0:
+        return cols
+    width = v_mask.shape[1]
+    span = [
+        np.count_nonzero(v_mask[:, max(0, c - 2):min(width, c + 3)].any(axis=1)) / v_mask.shape[0]
+        for c in cols.tolist()
+    ]
+    return cols[np.asarray(span) >= min_span]
+
+
+def detect_grid_lines(image: np.ndarray, min_row_gap: int = 10, min_col_gap: int = 20,
+                      min_length_ratio: float = 0.1, min_vertical_length: int = 20,
+                      min_coverage: float = 0.2, min_run_ratio: float = 0.1,
+                      min_span: float = 0.5) -> Tuple[np.ndarray, np.ndarray]:
+    """基于形态学开运算和投影的表格线检测
+
+    用长条形结构元素分别对墨迹做开运算，只保留横线和竖线，再按行/列投影直接得到
+    分隔线位置，不需要逐条线段计算长度和角度。
+    一行高的竖直开运算会保留每行重复出现的文字笔画（如每行都有的"DN50"），
+    因此竖线还须在横线范围内连续跨越多行，并覆盖横线范围的大部分高度。
+
+    参数:
+        image: 灰度、二值或BGR图像，深色线条
+        min_row_gap / min_col_gap: 相邻横线/竖线的最小间距
+        min_length_ratio: 横线最短长度占图像宽度的比例
+        min_vertical_length: 竖线片段最短长度（像素），取一行的高度，用于合并单元格检测的竖线掩码
+        min_coverage: 投影中线条像素至少占整行（列）的比例
+        min_run_ratio: 竖线最短连续长度占横线范围高度的比例（不小于min_vertical_length）
+        min_span: 竖线至少覆盖横线范围高度的比例，合并单元格处的断开不超过其余部分
+
+    返回:
+        (横线y坐标数组, 竖线x坐标数组)，均已排序
+    """
+    h_mask, v_mask = grid_line_masks(image, min_length_ratio, min_vertical_length)
+    rows = _line_positions(h_mask, 1, min_coverage, min_row_gap)
+
+    # 竖线的长度以横线范围（表格高度）为准，没有足够横线时取整幅图像
+    top, bottom = (int(rows[0]), int(rows[-1]) + 1) if len(rows) >= 2 else (0, v_mask.shape[0])
+    run = max(3, min_vertical_length, int((bottom - top) * min_run_ratio))
+    long_mask = cv2.morphologyEx(v_mask, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (1, run)))
+    cols = _line_positions(long_mask, 0, min_coverage, min_col_gap)
+    cols = _spanning_columns(cols, v_mask[top:bottom], min_span)
+    return rows, cols
+
+
+def suppress_duplicate_boxes(bounds: Sequence[Sequence[float]], scores: Sequence[float],
+                             iou_threshold: float = 0.5,
+                             cell_size: Optional[float] = None) -> np.ndarray:
+    """基于网格分桶的非极大值抑制
+
+    按置信度从高到低处理文本框，与已保留的文本框IoU超过阈值的视为重复并丢弃。
+    已保留的文本框登记到其覆盖的网格桶中，每个文本框只需与相同桶内的文本框比较，
+    文本框大小相近时总体接近线性时间。
+
+    参数:
+        bounds: 文本框外接矩形列表 [min_x, min_y, max_x, max_y]
+        scores: 置信度
+        iou_threshold: 判定为重复的IoU阈值
+        cell_size: 网格边长，默认取文本框高度中位数的2倍
+
+    返回:
+        保留的文本框下标（升序）
+    """
+    bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+    scores = np.asarray(scores, dtype=np.float64)
+    if len(bounds) == 0:
+        return np.empty(0, dtype=np.intp)
+
+    areas = np.maximum(bounds[:, 2] - bounds[:, 0], 0) * np.maximum(bounds[:, 3] - bounds[:, 1], 0)
+    if cell_size is None:
+        cell_size = max(2.0 * float(np.median(bounds[:, 3] - bounds[:, 1])), 1.0)
+    cells = np.floor(bounds / cell_size).astype(np.int64)
+
+    buckets: Dict[Tuple[int, int], List[int]] = {}
+    kept = []
+    # 置信度相同时保留下标小的文本框
+    for i in np.argsort(-scores, kind="stable"):
+        x1, y1, x2, y2 = bounds[i]
+        cx1, cy1, cx2, cy2 = cells[i]
+        keys = [(cx, cy) for cx in range(cx1, cx2 + 1) for cy in range(cy1, cy2 + 1)]
+
+        candidates = {j for key in keys for j in buckets.get(key, ())}
+        duplicate = False
+        for j in candidates:
+            iw = min(x2, bounds[j, 2]) - max(x1, bounds[j, 0])
+            ih = min(y2, bounds[j, 3]) - max(y1, bounds[j, 1])
+            if iw <= 0 or ih <= 0:
+                continue
+            inter = iw * ih
+            union = areas[i] + areas[j] - inter
+            if union > 0 and inter / union > iou_threshold:
+                duplicate = True
+                break
+        if duplicate:
+            continue
+
+        kept.append(i)
+        for key in keys:
+            buckets.setdefault(key, []).append(i)
+
+    return np.sort(np.asarray(kept, dtype=np.intp))
+
+
+def low_confidence_boxes(row_idx: Sequence[int], col_idx: Sequence[int],
+                         confidences: Sequence[float], threshold: float) -> np.ndarray:
+    """找出平均置信度低于阈值的单元格中的文本框
+
+    参数:
+        row_idx / col_idx: assign_boxes_to_cells 返回的单元格下标，-1表示不在网格内
+        confidences: 各文本框的置信度
+        threshold: 单元格平均置信度阈值
+
+    返回:
+        需要重新识别的文本框下标（升序）
+    """
+    row_idx = np.asarray(row_idx, dtype=np.int64)
+    col_idx = np.asarray(col_idx, dtype=np.int64)
+    confidences = np.asarray(confidences, dtype=np.float64)
+    valid = np.flatnonzero((row_idx >= 0) & (col_idx >= 0))
+    if len(valid) == 0:
+        return np.empty(0, dtype=np.intp)
+
+    keys = row_idx[valid] * (int(col_idx.max()) + 1) + col_idx[valid]
+    _, inverse = np.unique(keys, return_inverse=True)
+    mean = np.bincount(inverse, weights=confidences[valid]) / np.bincount(inverse)
+    return valid[mean[inverse] < threshold].astype(np.intp)
+
+
+def _separator_coverage(mask: np.ndarray, lines: np.ndarray, bands: np.ndarray,
+                        tolerance: int) -> np.ndarray:
+    """计算每条分隔线在每个分隔带内被线条覆盖的比例
+
+    mask为横线掩码时，lines为横线的y坐标，bands为列分隔位置；竖线时传入转置后的掩码。
+    返回形状为 (len(lines), len(bands) - 1) 的数组。
+    """
+    length = mask.shape[1]
+    # 纵向膨胀后直接取分隔线所在行，容忍线条的倾斜、偏移和粗细
+    band = cv2.dilate(mask, np.ones((2 * tolerance + 1, 1), np.uint8))
+    present = band[np.clip(lines, 0, mask.shape[0] - 1)] > 0
+    cumulative = np.zeros((len(lines), length + 1), dtype=np.int64)
+    np.cumsum(present, axis=1, out=cumulative[:, 1:])
+
+    starts = np.clip(bands[:-1], 0, length)
+    ends = np.clip(bands[1:], 0, length)
+    widths = np.maximum(ends - starts, 1)
+    return (cumulative[:, ends] - cumulative[:, starts]) / widths
+
+
+def detect_merged_cells(h_mask: np.ndarray, v_mask: np.ndarray, rows: Sequence[int],
+                        cols: Sequence[int], min_coverage: float = 0.5,
+                        tolerance: Optional[int] = None) -> List[Dict[str, int]]:
+    """根据线条掩码检测合并单元格
+
+    对每条横线逐列、每条竖线逐行统计线条覆盖率，覆盖率低于min_coverage时认为该处
+    没有分隔线，两侧单元格属于同一个合并单元格。把网格编码为 (2R-1)x(2C-1) 的图像
+    （偶数位置为单元格，奇数位置为缺失的分隔线）后做一次连通域分析，
+    总耗时与网格大小成线性关系。
+
+    外边界没有线条的首尾行、列（如表格外的标题、行号区域）不参与合并。
+
+    参数:
+        h_mask / v_mask: grid_line_masks 返回的横线、竖线掩码
+        rows / cols: 已排序的行、列分隔位置（含表格边界）
+        min_coverage: 分隔线至少覆盖单元格边长的比例
+        tolerance: 分隔线位置的容差（像素），默认取最小行高、列宽的1/4
+
+    返回:
+        合并单元格列表 {"start_row", "end_row", "start_col", "end_col"}，结束下标包含在内
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    n_rows, n_cols = len(rows) - 1, len(cols) - 1
+    if n_rows < 1 or n_cols < 1 or n_rows * n_cols < 2:
+        return []
+    if tolerance is None:
+        tolerance = max(2, int(min(np.diff(rows).min(), np.diff(cols).min()) // 4))
+
+    # 包括外边界在内所有分隔线的覆盖率
+    h_coverage = _separator_coverage(h_mask, rows, cols, tolerance) >= min_coverage
+    v_coverage = (_separator_coverage(np.ascontiguousarray(v_mask.T), cols, rows, tolerance)
+                  >= min_coverage).T
+
+    grid = np.zeros((2 * n_rows - 1, 2 * n_cols - 1), dtype=np.uint8)
+    grid[::2, ::2] = 1
+    grid[1::2, ::2] = ~h_coverage[1:-1]
+    grid[::2, 1::2] = ~v_coverage[:, 1:-1]
+
+    # 外边界没有线条的首尾行、列与相邻单元格之间不连通
+    if not h_coverage[0].any() and n_rows > 1:
+        grid[1, :] = 0
+        grid[0, 1::2] = 0
+    if not h_coverage[-1].any() and n_rows > 1:
+        grid[-2, :] = 0
+        grid[-1, 1::2] = 0
+    if not v_coverage[:, 0].any() and n_cols > 1:
+        grid[:, 1] = 0
+        grid[1::2, 0] = 0
+    if not v_coverage[:, -1].any() and n_cols > 1:
+        grid[:, -2] = 0
+        grid[1::2, -1] = 0
+
+    count, _, stats, _ = cv2.connectedComponentsWithStats(grid, connectivity=4)
+    merged = []
+    for x, y, w, h, _ in stats[1:count]:
+        if w > 1 or h > 1:
+            merged.append({
+                "start_row": int(y // 2),
+                "end_row": int((y + h - 1) // 2),
+                "start_col": int(x // 2),
+                "end_col": int((x + w - 1) // 2)
+            })
+    merged.sort(key=lambda m: (m["start_row"], m["start_col"]))
+    return merged
+
+
+def filter_merged_cells(merged_cells: List[Dict[str, int]], row_idx: Sequence[int],
+                        col_idx: Sequence[int]) -> List[Dict[str, int]]:
+    """去掉内部有多个单元格各自包含文字的合并单元格
+
+    没有底纹线的Excel截图（如无边框的备注列、填充底色的表头）在线条上与合并单元格
+    无法区分，但真正的合并单元格只有一处文字。
+
+    参数:
+        merged_cells: detect_merged_cells 的结果
+        row_idx / col_idx: 文本框所在的单元格下标，-1表示不在网格内
+    """
+    if not merged_cells:
+        return []
+    row_idx = np.asarray(row_idx, dtype=np.int64)
+    col_idx = np.asarray(col_idx, dtype=np.int64)
+    valid = (row_idx >= 0) & (col_idx >= 0)
+    row_idx, col_idx = row_idx[valid], col_idx[valid]
+    if len(row_idx) == 0:
+        return list(merged_cells)
+
+    n_rows = max(int(row_idx.max()), max(m["end_row"] for m in merged_cells)) + 1
+    n_cols = max(int(col_idx.max()), max(m["end_col"] for m in merged_cells)) + 1
+    region = np.full((n_rows, n_cols), -1, dtype=np.int64)
+    for i, m in enumerate(merged_cells):
+        region[m["start_row"]:m["end_row"] + 1, m["start_col"]:m["end_col"] + 1] = i
+
+    # 每个合并单元格中含有文字的单元格数
+    owner = region[row_idx, col_idx]
+    inside = owner >= 0
+    occupied = np.unique(np.stack([owner[inside], row_idx[inside] * n_cols + col_idx[inside]]), axis=1)
+    text_cells = np.bincount(occupied[0], minlength=len(merged_cells))
+    return [m for m, count in zip(merged_cells, text_cells) if count <= 1]
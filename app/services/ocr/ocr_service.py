@@ -1,23 +1,111 @@
 from typing import List, Dict, Optional, Tuple
-from app.models.ocr import OCRTask, TaskStatus, TableStructure, TableCell, FileType
+from app.models.ocr import OCRTask, TaskFile, TaskStatus, TableStructure, TableCell, FileType
 from app.core.database import Database, COLLECTIONS
 from app.utils.excel_parser import ExcelParser
+from app.utils.text_normalizer import normalize_many, normalize_text
 from app.core.config import settings
+from app.services.ocr.worker_pool import ocr_worker_pool
+from app.services.ocr.engine_router import ocr_engine_router
+from app.services.ocr.result_cache import ocr_result_cache, file_sha256
+from app.services.ocr.layout import (
+    assign_boxes_to_cells, box_bounds, detect_grid_lines, detect_merged_cells, filter_merged_cells,
+    grid_line_masks, locate_table_region, low_confidence_boxes, suppress_duplicate_boxes, tile_rects
+)
+from app.services.ocr.column_mapping import build_rows, map_header_texts, resolve_columns
+from app.services.ocr.preprocess import MAX_PREPROCESS_WIDTH, preprocess, stage_timer
+from app.services.ocr.pdf_pages import iter_pdf_pages, pdf_page_count
 import uuid
 import asyncio
-from paddleocr import PaddleOCR
+import time
+import tempfile
 import numpy as np
 from PIL import Image
 import cv2
 import os
 
+
+def _read_image_size(image_path: str) -> Optional[Tuple[int, int]]:
+    """只读取图片头信息获取 (宽, 高)，不解码像素"""
+    try:
+        with Image.open(image_path) as image:
+            return image.size
+    except Exception:
+        return None
+
+
+def _decode_image_file(image_path: str) -> Optional[np.ndarray]:
+    """以内存映射方式读取图片文件并直接解码，不额外复制文件内容"""
+    try:
+        buffer = np.memmap(image_path, dtype=np.uint8, mode="r")
+    except (OSError, ValueError):
+        return None
+    try:
+        return cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+    finally:
+        del buffer
+
+
+def _downscale_strips(image: np.ndarray, max_width: int, strip_rows: int = 1024) -> Tuple[np.ndarray, float]:
+    """按水平条带缩小图像（可以是内存映射数组），返回 (缩小后的图像, 缩放比例)
+
+    每次只读入一个条带，峰值内存为一个原图条带加上缩小后的图像。
+    """
+    height, width = image.shape[:2]
+    scale = min(1.0, max_width / width)
+    if scale == 1.0:
+        return np.ascontiguousarray(image), scale
+    out_width = max(1, int(round(width * scale)))
+    strips = []
+    for top in range(0, height, strip_rows):
+        bottom = min(height, top + strip_rows)
+        out_height = int(round(bottom * scale)) - int(round(top * scale))
+        if out_height > 0:
+            strip = np.ascontiguousarray(image[top:bottom])
+            strips.append(cv2.resize(strip, (out_width, out_height), interpolation=cv2.INTER_AREA))
+    return np.concatenate(strips), scale
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
 class OCRService:
-    def __init__(self):
-        self.db = Database.get_db()
-        self.collection = self.db[COLLECTIONS["ocr_tasks"]]
+    def __init__(self, connect_db: bool = True):
+        # OCR工作进程只负责识别，不需要数据库连接
+        self.db = Database.get_db() if connect_db else None
+        self.collection = self.db[COLLECTIONS["ocr_tasks"]] if connect_db else None
         self.excel_parser = ExcelParser()
-        # 初始化OCR引擎
-        self.ocr = PaddleOCR(
+        # OCR引擎在首次使用或预热时才创建
+        self._ocr = None
+        self._cloud = None
+
+    @property
+    def ocr(self):
+        """OCR引擎（延迟创建）"""
+        if self._ocr is None:
+            self._ocr = self._create_engine()
+        return self._ocr
+
+    @property
+    def cloud(self):
+        """阿里云表格OCR服务（延迟创建）"""
+        if self._cloud is None:
+            from app.services.ocr.aliyun_ocr_service import AliyunOCRService
+            self._cloud = AliyunOCRService()
+        return self._cloud
+
+    @property
+    def engine_loaded(self) -> bool:
+        return self._ocr is not None
+
+    def _create_engine(self):
+        """创建PaddleOCR引擎"""
+        from paddleocr import PaddleOCR
+        
+        return PaddleOCR(
             use_angle_cls=settings.OCR_USE_ANGLE_CLASS,
             lang=settings.OCR_LANGUAGE,
             use_gpu=settings.OCR_USE_GPU,
@@ -30,6 +118,7 @@ class OCRService:
             det_db_box_thresh=0.3,  # 降低框选阈值
             det_db_unclip_ratio=2.0,  # 增加文本区域扩张比例
             rec_batch_num=settings.OCR_REC_BATCH_NUM,
+            cpu_threads=settings.OCR_WORKER_THREADS,
             rec_char_dict_path=None,  # 使用默认字典
             cls_batch_num=1,  # 减少批处理大小，提高准确率
             cls_thresh=0.8,  # 提高方向分类阈值
@@ -42,78 +131,34 @@ class OCRService:
             show_log=True
         )
 
-    def preprocess_image(self, image: np.ndarray) -> np.ndarray:
-        """图像预处理"""
+    def warm_up(self) -> Dict:
+        """加载模型并对一张合成图片执行一次识别，返回各阶段耗时（秒）"""
+        start = time.perf_counter()
+        engine = self.ocr
+        load_seconds = time.perf_counter() - start
+        
+        image = np.full((64, 320, 3), 255, dtype=np.uint8)
+        cv2.putText(image, "DN100 PN16", (10, 44), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2)
+        start = time.perf_counter()
+        engine.ocr(image, cls=True)
+        
+        return {
+            "pid": os.getpid(),
+            "load_seconds": round(load_seconds, 3),
+            "inference_seconds": round(time.perf_counter() - start, 3)
+        }
+
+    def preprocess_image(self, image: np.ndarray, profile: Optional[str] = None,
+                         report: Optional[Dict] = None) -> np.ndarray:
+        """图像预处理
+
+        参数:
+            image: 原始图像
+            profile: 预处理配置 none/fast/full，默认使用 OCR_PREPROCESS_PROFILE
+            report: 可选字典，用于记录各阶段耗时和图像质量估计
+        """
         try:
-            # 调整图像大小
-            height, width = image.shape[:2]
-            if width > 2000:
-                scale = 2000 / width
-                new_width = 2000
-                new_height = int(height * scale)
-                image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_AREA)
-            
-            # 转换为灰度图
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
-            # 去噪处理
-            denoised = cv2.fastNlMeansDenoising(gray, None, 10, 7, 21)
-            
-            # 自适应直方图均衡化
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-            equalized = clahe.apply(denoised)
-            
-            # 对比度增强
-            alpha = 1.3  # 对比度增强因子
-            beta = 15    # 亮度增强因子
-            enhanced = cv2.convertScaleAbs(equalized, alpha=alpha, beta=beta)
-            
-            # 自适应二值化
-            binary = cv2.adaptiveThreshold(
-                enhanced, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                cv2.THRESH_BINARY, 11, 2
-            )
-            
-            # 形态学操作
-            kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
-            morph = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
-            morph = cv2.morphologyEx(morph, cv2.MORPH_OPEN, kernel)
-            
-            # 倾斜校正
-            coords = np.column_stack(np.where(morph > 0))
-            if len(coords) > 100:  # 确保有足够的点进行校正
-                angle = cv2.minAreaRect(coords)[-1]
-                if angle < -45:
-                    angle = 90 + angle
-                
-                # 如果倾斜角度大于0.5度才进行校正
-                if abs(angle) > 0.5:
-                    (h, w) = morph.shape[:2]
-                    center = (w // 2, h // 2)
-                    M = cv2.getRotationMatrix2D(center, angle, 1.0)
-                    rotated = cv2.warpAffine(
-                        morph, M, (w, h),
-                        flags=cv2.INTER_CUBIC,
-                        borderMode=cv2.BORDER_REPLICATE
-                    )
-                else:
-                    rotated = morph
-            else:
-                rotated = morph
-            
-            # 边缘增强
-            kernel_sharpen = np.array([
-                [-1,-1,-1],
-                [-1, 9,-1],
-                [-1,-1,-1]
-            ])
-            sharpened = cv2.filter2D(rotated, -1, kernel_sharpen)
-            
-            # 最终的降噪处理
-            final = cv2.medianBlur(sharpened, 3)
-            
-            return final
-            
+            return preprocess(image, profile, report)
         except Exception as e:
             print(f"Warning: Image preprocessing failed: {str(e)}")
             return image  # 如果处理失败，返回原图
@@ -151,8 +196,8 @@ class OCRService:
             height, width = image.shape[:2]
             min_length = min(height, width) * 0.05  # 最小有效线长
             
-            for line in lines:
-                x1, y1, x2, y2 = line[0]
+            # OpenCV 4.x 返回 (N, 1, 4)，5.x 返回 (N, 4)
+            for x1, y1, x2, y2 in lines.reshape(-1, 4):
                 length = np.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
                 
                 if length < min_length:
@@ -196,6 +241,21 @@ class OCRService:
             print(f"Warning: Table structure detection failed: {str(e)}")
             return [], []
     
+    def detect_grid_morphology(self, image: np.ndarray) -> Tuple[List[int], List[int]]:
+        """基于形态学和投影检测表格网格，返回行、列分隔位置"""
+        height, width = image.shape[:2]
+        try:
+            rows, cols = detect_grid_lines(
+                image,
+                min_row_gap=max(1, settings.TABLE_MIN_ROW_HEIGHT // 2),
+                min_col_gap=max(1, settings.TABLE_MIN_COL_WIDTH // 2),
+                min_vertical_length=settings.TABLE_MIN_ROW_HEIGHT
+            )
+        except Exception as e:
+            print(f"Warning: Table structure detection failed: {str(e)}")
+            return [0, height], [0, width]
+        return self._complete_grid(rows.tolist(), cols.tolist(), height, width)
+    
     def _merge_nearby_lines(self, lines: List[List[int]], is_horizontal: bool, 
                           threshold: int = 10) -> List[List[int]]:
         """合并相近的线条"""
@@ -264,167 +324,46 @@ class OCRService:
             # 提取行和列的位置
             rows = sorted(set(line[1] for line in h_lines))
             cols = sorted(set(line[0] for line in v_lines))
-            
-            # 处理空行和空列
-            if not rows:
-                rows = [0, image_height]
-            else:
-                if rows[0] > settings.TABLE_MIN_ROW_HEIGHT:
-                    rows.insert(0, 0)
-                if rows[-1] < image_height - settings.TABLE_MIN_ROW_HEIGHT:
-                    rows.append(image_height)
-            
-            if not cols:
-                cols = [0, image_width]
-            else:
-                if cols[0] > settings.TABLE_MIN_COL_WIDTH:
-                    cols.insert(0, 0)
-                if cols[-1] < image_width - settings.TABLE_MIN_COL_WIDTH:
-                    cols.append(image_width)
-            
-            return rows, cols
+            return self._complete_grid(rows, cols, image_height, image_width)
             
         except Exception as e:
             print(f"Warning: Table cell analysis failed: {str(e)}")
             return [0, image_height], [0, image_width]
-    
-    def _detect_merged_cells(self, h_lines: List[List[int]], v_lines: List[List[int]], 
-                           rows: List[int], cols: List[int]) -> List[List[int]]:
-        """检测合并单元格"""
-        merged_cells = []
-        
-        # 检查每个可能的单元格区域
-        for i in range(len(rows) - 1):
-            for j in range(len(cols) - 1):
-                # 检查是否有分隔线
-                has_h_line = any(
-                    abs(line[1] - rows[i]) < 5 for line in h_lines
-                )
-                has_v_line = any(
-                    abs(line[0] - cols[j]) < 5 for line in v_lines
-                )
-                
-                if not has_h_line or not has_v_line:
-                    # 可能是合并单元格的一部分
-                    merged_cells.append([i, j])
-        
-        # 合并相邻的合并单元格
-        result = []
-        for cell in merged_cells:
-            merged = False
-            for existing in result:
-                if (abs(cell[0] - existing[0]) <= 1 and 
-                    abs(cell[1] - existing[1]) <= 1):
-                    # 扩展现有的合并单元格
-                    existing[0] = min(existing[0], cell[0])
-                    existing[1] = min(existing[1], cell[1])
-                    merged = True
-                    break
-            if not merged:
-                result.append(cell)
-        
-        return result
 
-    def _normalize_text(self, text: str) -> str:
-        """清理和规范化文本"""
-        if not text:
-            return ""
-            
-        # 移除多余的空白字符
-        text = " ".join(text.split())
-        
-        # 统一全角字符到半角
-        text = self._full_to_half(text)
-        
-        # 规范化DN规格写法
-        text = self._normalize_dn_spec(text)
-        
-        # 规范化单位
-        text = self._normalize_units(text)
-        
-        # 规范化数字
-        text = self._normalize_numbers(text)
-        
-        # 移除特殊字符
-        text = text.strip(".,;:!?()[]{}\"'")
-        
-        return text.strip()
-    
-    def _normalize_dn_spec(self, text: str) -> str:
-        """规范化DN规格写法"""
-        import re
-        
-        # DN规格的正则表达式
-        dn_pattern = r'[Dd][Nn]?\s*(\d+)(?:\s*[×xX*]\s*(\d+))*'
-        
-        def replace_dn(match):
-            parts = [p for p in match.groups() if p]
-            return 'DN' + '*'.join(parts)
-        
-        return re.sub(dn_pattern, replace_dn, text)
-    
-    def _normalize_units(self, text: str) -> str:
-        """规范化单位"""
-        # 单位映射表
-        unit_map = {
-            '个': '个',
-            'pcs': '个',
-            'PCS': '个',
-            '件': '个',
-            '套': '套',
-            'SET': '套',
-            'set': '套',
-            '米': 'm',
-            'M': 'm',
-            '米': 'm',
-            '条': '条'
-        }
-        
-        for old, new in unit_map.items():
-            text = text.replace(old, new)
-        
-        return text
-    
-    def _normalize_numbers(self, text: str) -> str:
-        """规范化数字"""
-        import re
-        
-        # 中文数字映射
-        cn_num = {
-            '一': '1', '二': '2', '三': '3', '四': '4', '五': '5',
-            '六': '6', '七': '7', '八': '8', '九': '9', '十': '10',
-            '零': '0'
-        }
-        
-        # 替换中文数字
-        for cn, ar in cn_num.items():
-            text = text.replace(cn, ar)
-        
-        # 规范化小数点
-        text = text.replace('。', '.')
+    def _complete_grid(self, rows: List[int], cols: List[int],
+                       image_height: int, image_width: int) -> Tuple[List[int], List[int]]:
+        """补全图像边界处的行、列分隔线"""
+        # 处理空行和空列
+        if not rows:
+            rows = [0, image_height]
+        else:
+            if rows[0] > settings.TABLE_MIN_ROW_HEIGHT:
+                rows.insert(0, 0)
+            if rows[-1] < image_height - settings.TABLE_MIN_ROW_HEIGHT:
+                rows.append(image_height)
         
-        # 处理数字间的特殊字符
-        number_pattern = r'(\d+)[,，](\d{3})'
-        while re.search(number_pattern, text):
-            text = re.sub(number_pattern, r'\1\2', text)
+        if not cols:
+            cols = [0, image_width]
+        else:
+            if cols[0] > settings.TABLE_MIN_COL_WIDTH:
+                cols.insert(0, 0)
+            if cols[-1] < image_width - settings.TABLE_MIN_COL_WIDTH:
+                cols.append(image_width)
         
-        return text
-    
-    def _full_to_half(self, text: str) -> str:
-        """将全角字符转换为半角字符"""
-        result = ""
-        for char in text:
-            code = ord(char)
-            if 0xFF01 <= code <= 0xFF5E:
-                # 全角字符范围
-                result += chr(code - 0xFEE0)
-            elif code == 0x3000:
-                # 全角空格
-                result += " "
-            else:
-                result += char
-        return result
+        return rows, cols
     
+    def _detect_merged_cells(self, image: np.ndarray, rows: List[int],
+                             cols: List[int]) -> List[Dict[str, int]]:
+        """检测合并单元格，返回行、列跨度（下标与rows/cols的分隔带对应）"""
+        if len(rows) < 3 and len(cols) < 3:
+            return []
+        try:
+            h_mask, v_mask = grid_line_masks(image, min_vertical_length=settings.TABLE_MIN_ROW_HEIGHT)
+            return detect_merged_cells(h_mask, v_mask, rows, cols)
+        except Exception as e:
+            print(f"Warning: Merged cell detection failed: {str(e)}")
+            return []
+
     def _calculate_overlap(self, box1: List[float], box2: List[float]) -> float:
         """计算两个边界框的重叠面积"""
         x1 = max(box1[0], box2[0])
@@ -436,87 +375,487 @@ class OCRService:
             return (x2 - x1) * (y2 - y1)
         return 0
 
+    def _run_ocr(self, image: np.ndarray, offset: Tuple[int, int] = (0, 0),
+                 scale: float = 1.0) -> List:
+        """执行一次OCR识别，并将文本框坐标映射回原图坐标系"""
+        result = self.ocr.ocr(image, cls=True)
+        if not result or result[0] is None:
+            return []
+        items = result[0] if isinstance(result[0], list) else result
+
+        if offset == (0, 0) and scale == 1.0:
+            return items
+
+        dx, dy = offset
+        mapped = []
+        for item in items:
+            if not isinstance(item, list) or len(item) != 2:
+                continue
+            box = [[p[0] / scale + dx, p[1] / scale + dy] for p in item[0]]
+            mapped.append([box, item[1]])
+        return mapped
+
+    def _detect_grid(self, image: np.ndarray, processed_image: np.ndarray,
+                     scale: float) -> Tuple[List[int], List[int]]:
+        """检测表格网格线，返回原图坐标系下的行、列分隔位置
+
+        形态学检测自带二值化，直接在原图上运行；完整预处理中的开闭运算会抹掉
+        1像素宽的表格线。霍夫变换沿用预处理后的图像。
+        """
+        if settings.TABLE_LINE_DETECTOR == "morphology":
+            return self.detect_grid_morphology(image)
+        
+        height, width = processed_image.shape[:2]
+        h_lines, v_lines = self.detect_table_structure(processed_image)
+        rows, cols = self.analyze_table_cells(h_lines, v_lines, height, width)
+        if scale != 1.0:
+            rows = [int(round(r / scale)) for r in rows]
+            cols = [int(round(c / scale)) for c in cols]
+        return rows, cols
+
+    def _score_ocr_pass(self, results: List, rows: List[int]) -> Dict[str, float]:
+        """评估单轮识别质量：平均置信度、低置信度框占比、表格行覆盖率"""
+        confidences = [item[1][1] for item in results]
+        if not confidences:
+            return {"mean_confidence": 0.0, "low_confidence_ratio": 1.0, "grid_coverage": 0.0}
+
+        low_count = sum(1 for c in confidences if c < settings.OCR_PASS_LOW_CONFIDENCE)
+
+        # 表格行覆盖率：至少包含一个文本框中心的行所占比例
+        coverage = 1.0
+        if len(rows) > 2:
+            centers = [sum(p[1] for p in item[0]) / len(item[0]) for item in results]
+            covered = 0
+            for top, bottom in zip(rows[:-1], rows[1:]):
+                if any(top <= y < bottom for y in centers):
+                    covered += 1
+            coverage = covered / (len(rows) - 1)
+
+        return {
+            "mean_confidence": float(sum(confidences) / len(confidences)),
+            "low_confidence_ratio": low_count / len(confidences),
+            "grid_coverage": coverage
+        }
+
+    def _find_retry_regions(self, results: List, rows: List[int],
+                            image_shape: Tuple[int, ...]) -> List[List[int]]:
+        """找出需要补充识别的区域：低置信度文本框和未被覆盖的表格行"""
+        height, width = image_shape[:2]
+        pad = settings.OCR_PASS_REGION_PADDING
+        regions = []
+
+        centers = []
+        for item in results:
+            xs = [p[0] for p in item[0]]
+            ys = [p[1] for p in item[0]]
+            centers.append((min(ys) + max(ys)) / 2)
+            if item[1][1] < settings.OCR_PASS_LOW_CONFIDENCE:
+                regions.append([
+                    max(0, int(min(xs)) - pad), max(0, int(min(ys)) - pad),
+                    min(width, int(max(xs)) + pad), min(height, int(max(ys)) + pad)
+                ])
+
+        if len(rows) > 2:
+            for top, bottom in zip(rows[:-1], rows[1:]):
+                if bottom - top < settings.TABLE_MIN_ROW_HEIGHT:
+                    continue
+                if not any(top <= y < bottom for y in centers):
+                    regions.append([0, max(0, top - pad), width, min(height, bottom + pad)])
+
+        # 合并相互重叠的区域
+        regions.sort(key=lambda r: (r[1], r[0]))
+        merged = []
+        for region in regions:
+            for existing in merged:
+                if self._calculate_overlap(region, existing) > 0:
+                    existing[0] = min(existing[0], region[0])
+                    existing[1] = min(existing[1], region[1])
+                    existing[2] = max(existing[2], region[2])
+                    existing[3] = max(existing[3], region[3])
+                    break
+            else:
+                merged.append(list(region))
+        return merged
+
+    def _merge_results(self, results: List) -> List:
+        """合并多轮识别结果并去重
+
+        同一位置被多轮识别到的文本框按IoU做非极大值抑制，只保留置信度最高的读数；
+        不同位置的相同文本（如多行都是DN100）全部保留。
+        """
+        items = [
+            item for item in results
+            if isinstance(item, list) and len(item) == 2
+        ]
+        # 批量清理文本
+        texts = normalize_many(item[1][0] for item in items)
+        candidates = [
+            [item[0], [text, item[1][1]]]
+            for item, text in zip(items, texts)
+            if text
+        ]
+
+        if not candidates:
+            return []
+
+        keep = suppress_duplicate_boxes(
+            [box_bounds(item[0]) for item in candidates],
+            [item[1][1] for item in candidates],
+            iou_threshold=settings.OCR_NMS_IOU_THRESHOLD
+        )
+        return [candidates[i] for i in keep]
+
+    def _retry_variants(self, crop: np.ndarray) -> List[np.ndarray]:
+        """生成补充识别用的预处理版本：放大后的Otsu二值图和放大后的原图"""
+        scale = settings.OCR_CELL_RETRY_UPSCALE
+        upscaled = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+        _, binary = cv2.threshold(
+            cv2.cvtColor(upscaled, cv2.COLOR_BGR2GRAY),
+            0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU
+        )
+        return [cv2.cvtColor(binary, cv2.COLOR_GRAY2BGR), upscaled]
+
+    def _recognize_crops(self, crops: List[np.ndarray]) -> List[Tuple[str, float]]:
+        """只运行识别模型，批量识别文本行图像，返回 [(文本, 置信度)]"""
+        if not crops:
+            return []
+        result = self.ocr.text_recognizer(crops)
+        readings = result[0] if isinstance(result, tuple) else result
+        return [(str(text), float(confidence)) for text, confidence in readings]
+
+    def _retry_low_confidence_cells(self, image: np.ndarray, rows: List[int], cols: List[int],
+                                    results: List) -> Tuple[List, Dict]:
+        """对平均置信度低的单元格重新识别
+
+        只裁剪这些单元格中的文本行，每行生成二值化和放大两种版本，全部文本行一次性
+        批量送入识别模型，每行保留置信度最高的读数。
+        """
+        stats = {"cells": 0, "boxes": 0, "improved": 0}
+        if not results or len(rows) < 2 or len(cols) < 2:
+            return results, stats
+
+        bounds = [box_bounds(item[0]) for item in results]
+        row_idx, col_idx = assign_boxes_to_cells(bounds, rows, cols)
+        retry = low_confidence_boxes(
+            row_idx, col_idx, [item[1][1] for item in results],
+            settings.OCR_CELL_RETRY_CONFIDENCE
+        )[:settings.OCR_CELL_RETRY_MAX_BOXES]
+        if len(retry) == 0:
+            return results, stats
+
+        height, width = image.shape[:2]
+        pad = settings.OCR_PASS_REGION_PADDING
+        crops, owners = [], []
+        for i in retry:
+            min_x, min_y, max_x, max_y = bounds[i]
+            x1, y1 = max(0, int(min_x) - pad), max(0, int(min_y) - pad)
+            x2, y2 = min(width, int(np.ceil(max_x)) + pad), min(height, int(np.ceil(max_y)) + pad)
+            if x2 - x1 < 2 or y2 - y1 < 2:
+                continue
+            for variant in self._retry_variants(image[y1:y2, x1:x2]):
+                crops.append(variant)
+                owners.append(i)
+
+        readings = self._recognize_crops(crops)
+        texts = normalize_many(text for text, _ in readings)
+
+        results = list(results)
+        improved = set()
+        for i, text, (_, confidence) in zip(owners, texts, readings):
+            if text and confidence > results[i][1][1]:
+                results[i] = [results[i][0], [text, confidence]]
+                improved.add(i)
+
+        stats["cells"] = len(set(zip(row_idx[retry].tolist(), col_idx[retry].tolist())))
+        stats["boxes"] = len(retry)
+        stats["improved"] = len(improved)
+        return results, stats
+
+    def _recognize(self, image: np.ndarray, processed_image: np.ndarray, binary: np.ndarray,
+                   scale: float, rows: List[int]) -> Tuple[List, Dict]:
+        """按照配置的多轮识别策略执行OCR"""
+        mode = settings.OCR_PASS_MODE
+        results = self._run_ocr(image)
+        stats = {"mode": mode, "passes": 1, "retry_regions": 0}
+
+        if mode == "full":
+            # 预处理后的图像识别
+            results.extend(self._run_ocr(processed_image, scale=scale))
+            # 二值化图像识别
+            results.extend(self._run_ocr(binary))
+            stats["passes"] = 3
+            return results, stats
+
+        if mode != "adaptive":
+            return results, stats
+
+        score = self._score_ocr_pass(results, rows)
+        stats["score"] = score
+        if (score["mean_confidence"] >= settings.OCR_PASS_MIN_MEAN_CONFIDENCE
+                and score["low_confidence_ratio"] <= settings.OCR_PASS_MAX_LOW_RATIO
+                and score["grid_coverage"] >= settings.OCR_PASS_MIN_GRID_COVERAGE):
+            return results, stats
+
+        regions = self._find_retry_regions(results, rows, image.shape)
+        area = sum((r[2] - r[0]) * (r[3] - r[1]) for r in regions)
+        stats["passes"] = 3
+        stats["retry_regions"] = len(regions)
+
+        if area > image.shape[0] * image.shape[1] * settings.OCR_PASS_MAX_REGION_RATIO:
+            # 待补充区域过大时，直接对全图运行其余两种预处理
+            results.extend(self._run_ocr(processed_image, scale=scale))
+            results.extend(self._run_ocr(binary))
+            return results, stats
+
+        for x1, y1, x2, y2 in regions:
+            px1, py1 = int(x1 * scale), int(y1 * scale)
+            px2, py2 = int(x2 * scale), int(y2 * scale)
+            if px2 - px1 > 1 and py2 - py1 > 1:
+                results.extend(self._run_ocr(
+                    processed_image[py1:py2, px1:px2],
+                    offset=(px1 / scale, py1 / scale), scale=scale
+                ))
+            results.extend(self._run_ocr(binary[y1:y2, x1:x2], offset=(x1, y1)))
+
+        return results, stats
+
     def _process_image_ocr(self, image_path: str) -> TableStructure:
         """处理图片OCR"""
+        # 读取图片
+        image = _decode_image_file(image_path)
+        if image is None:
+            raise Exception("Failed to process image: Failed to load image")
+        return self._process_image(image)
+
+    def _process_pdf_page(self, pdf_path: str, page_number: int) -> TableStructure:
+        """渲染并识别PDF的单个页面"""
+        for _, image in iter_pdf_pages(pdf_path, page_numbers=[page_number]):
+            result = self._process_image(image)
+            result.stats["page"] = page_number
+            return result
+        raise Exception(f"Failed to render PDF page {page_number}")
+
+    def _process_image(self, image: np.ndarray) -> TableStructure:
+        """识别已解码的图像"""
         try:
-            # 读取图片
-            image = cv2.imread(image_path)
-            if image is None:
-                raise ValueError("Failed to load image")
-            
-            # 图像预处理
-            processed_image = self.preprocess_image(image)
+            timings = {}
             
-            # 多次尝试不同的预处理方法
-            results = []
+            # 定位表格区域，只对表格区域做预处理和识别
+            with stage_timer(timings, "locate"):
+                region = self._locate_table_region(image)
+            x1, y1, x2, y2 = self._region_bounds(region, image)
+            table_image = image[y1:y2, x1:x2]
             
-            # 原始图像识别
-            result1 = self.ocr.ocr(image, cls=True)
-            if result1:
-                results.extend(result1[0] if isinstance(result1[0], list) else result1)
+            # 图像预处理
+            preprocess_report = {}
+            with stage_timer(timings, "preprocess"):
+                processed_image = self.preprocess_image(table_image, report=preprocess_report)
+            scale = processed_image.shape[1] / table_image.shape[1]
             
-            # 预处理后的图像识别
-            result2 = self.ocr.ocr(processed_image, cls=True)
-            if result2:
-                results.extend(result2[0] if isinstance(result2[0], list) else result2)
+            # 二值化图像
+            binary = self._binarize(table_image)
             
-            # 二值化图像识别
-            _, binary = cv2.threshold(
-                cv2.cvtColor(image, cv2.COLOR_BGR2GRAY),
-                0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU
-            )
-            result3 = self.ocr.ocr(binary, cls=True)
-            if result3:
-                results.extend(result3[0] if isinstance(result3[0], list) else result3)
+            # 检测表格结构
+            with stage_timer(timings, "grid"):
+                rows, cols = self._detect_grid(table_image, processed_image, scale)
+                merged_cells = self._detect_merged_cells(table_image, rows, cols)
             
+            # 多轮识别
+            with stage_timer(timings, "recognize"):
+                results, pass_stats = self._recognize(table_image, processed_image, binary, scale, rows)
             if not results:
                 raise ValueError("OCR failed to process image")
             
-            # 合并结果并去重
-            unique_results = []
-            seen_texts = set()
-            
-            for item in results:
-                if not isinstance(item, list) or len(item) != 2:
-                    continue
-                    
-                box = item[0]
-                text, confidence = item[1]
-                
-                # 清理文本
-                text = self._normalize_text(text)
-                if not text or text in seen_texts:
-                    continue
-                
-                seen_texts.add(text)
-                unique_results.append([box, [text, confidence]])
-            
-            # 检测表格结构
-            h_lines, v_lines = self.detect_table_structure(processed_image)
-            rows, cols = self.analyze_table_cells(
-                h_lines, v_lines, 
-                image.shape[0], image.shape[1]
-            )
+            # 坐标映射回原图
+            rows = [r + y1 for r in rows]
+            cols = [c + x1 for c in cols]
+            results = self._offset_results(results, x1, y1)
             
-            # 提取单元格内容
+            return self._build_table(image, rows, cols, results, timings, {
+                "ocr_passes": pass_stats,
+                "preprocess": preprocess_report,
+                "table_region": region
+            }, merged_cells)
+        except Exception as e:
+            raise Exception(f"Failed to process image: {str(e)}")
+
+    def _locate_table_region(self, image: np.ndarray) -> Optional[Dict]:
+        """定位表格区域，区域占比超过OCR_TABLE_REGION_MAX_RATIO时不裁剪"""
+        if not settings.OCR_TABLE_REGION_ENABLED:
+            return None
+        try:
+            region = locate_table_region(image, padding=settings.OCR_TABLE_REGION_PADDING)
+        except Exception as e:
+            print(f"Warning: Table region detection failed: {str(e)}")
+            return None
+        if region is not None:
+            region["cropped"] = region["area_ratio"] < settings.OCR_TABLE_REGION_MAX_RATIO
+        return region
+
+    def _region_bounds(self, region: Optional[Dict], image: np.ndarray) -> Tuple[int, int, int, int]:
+        """需要裁剪时返回表格区域，否则返回整图范围"""
+        if region and region["cropped"]:
+            return tuple(region["bbox"])
+        return 0, 0, image.shape[1], image.shape[0]
+
+    def _offset_results(self, results: List, dx: float, dy: float) -> List:
+        """将识别结果的文本框平移到原图坐标系"""
+        if dx == 0 and dy == 0:
+            return results
+        return [
+            [[[p[0] + dx, p[1] + dy] for p in item[0]], item[1]]
+            for item in results
+            if isinstance(item, list) and len(item) == 2
+        ]
+
+    def _binarize(self, image: np.ndarray) -> np.ndarray:
+        """Otsu二值化，用于补充识别"""
+        _, binary = cv2.threshold(
+            cv2.cvtColor(image, cv2.COLOR_BGR2GRAY),
+            0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU
+        )
+        return binary
+
+    def _build_table(self, image: np.ndarray, rows: List[int], cols: List[int],
+                     results: List, timings: Dict, stats: Dict,
+                     merged_cells: Optional[List[Dict[str, int]]] = None) -> TableStructure:
+        """合并识别结果并按表格网格构建TableStructure"""
+        # 合并结果并去重
+        unique_results = self._merge_results(results)
+        stats = {**stats, "merged_boxes": {"input": len(results), "kept": len(unique_results)}}
+        
+        # 低置信度单元格批量重新识别
+        if settings.OCR_PASS_MODE == "cells":
+            with stage_timer(timings, "cell_retry"):
+                unique_results, stats["cell_retry"] = self._retry_low_confidence_cells(
+                    image, rows, cols, unique_results
+                )
+        
+        # 提取单元格内容
+        with stage_timer(timings, "cells"):
+            if merged_cells:
+                row_idx, col_idx = assign_boxes_to_cells(
+                    [box_bounds(item[0]) for item in unique_results], rows, cols
+                )
+                merged_cells = filter_merged_cells(merged_cells, row_idx, col_idx)
             cells = self.extract_cell_content(
-                processed_image, 
+                image, 
                 [rows, cols], 
-                unique_results
+                unique_results,
+                normalized=True,
+                merged_cells=merged_cells
             )
+        
+        # 构建表格结构
+        # 假设第一行是表头
+        headers = {}
+        first_row_cells = [c for c in cells if c.row < settings.TABLE_HEADER_ROWS]
+        for cell in first_row_cells:
+            headers[cell.text] = cell.column
+        
+        # 按表头关键字确定字段所在列，生成结构化行
+        roles, header_end = resolve_columns(cells, settings.TABLE_HEADER_SCAN_ROWS)
+        
+        return TableStructure(
+            headers=headers,
+            cells=cells,
+            merged_cells=merged_cells or [],
+            column_roles=roles,
+            data_rows=build_rows(cells, roles, header_end),
+            stats={**stats, "timings_ms": timings}
+        )
+
+    def _prepare_tiles(self, image_path: str) -> Dict:
+        """解码大图并保存为.npy文件，供各分块任务以内存映射方式读取"""
+        image = _decode_image_file(image_path)
+        if image is None:
+            raise Exception("Failed to process image: Failed to load image")
+        
+        # 只对表格区域分块
+        region = self._locate_table_region(image)
+        x1, y1, x2, y2 = self._region_bounds(region, image)
+        tiles = []
+        for rect, core in tile_rects(x2 - x1, y2 - y1, settings.OCR_TILE_SIZE,
+                                     settings.OCR_TILE_OVERLAP, settings.OCR_TILE_MAX_SIDE):
+            tiles.append((
+                [rect[0] + x1, rect[1] + y1, rect[2] + x1, rect[3] + y1],
+                [core[0] + x1, core[1] + y1, core[2] + x1, core[3] + y1]
+            ))
+        
+        fd, array_path = tempfile.mkstemp(suffix=".npy", prefix="ocr_tiles_")
+        os.close(fd)
+        np.save(array_path, image)
+        return {"array_path": array_path, "tiles": tiles, "region": region}
+
+    def _recognize_tile(self, array_path: str, rect: List[int], core: List[int]) -> Dict:
+        """识别单个分块，只保留中心落在核心区内的文本框
+
+        通过内存映射只读取分块所在的像素，模型推理的内存占用由分块大小决定。
+        """
+        image = np.load(array_path, mmap_mode="r")
+        x1, y1, x2, y2 = rect
+        tile = np.ascontiguousarray(image[y1:y2, x1:x2])
+        del image
+        
+        processed_tile = self.preprocess_image(tile)
+        scale = processed_tile.shape[1] / tile.shape[1]
+        results, pass_stats = self._recognize(tile, processed_tile, self._binarize(tile), scale, [])
+        
+        results = self._offset_results(results, x1, y1)
+        kept = []
+        for item in results:
+            box = item[0]
+            center_x = sum(p[0] for p in box) / len(box)
+            center_y = sum(p[1] for p in box) / len(box)
+            if core[0] <= center_x < core[2] and core[1] <= center_y < core[3]:
+                kept.append(item)
+        
+        return {
+            "results": kept,
+            "stats": {**pass_stats, "rect": rect, "dropped": len(results) - len(kept)}
+        }
+
+    def _process_tiled_image(self, array_path: str, tile_results: List[Dict],
+                             region: Optional[Dict] = None) -> TableStructure:
+        """合并各分块的识别结果，在表格区域上检测表格网格并构建表格
+
+        原图以内存映射方式读取；预处理和网格检测在缩小到预处理宽度上限的副本上进行，
+        网格坐标再换算回原图，不把整张大图读入内存。
+        """
+        try:
+            timings = {}
+            image = np.load(array_path, mmap_mode="r")
+            x1, y1, x2, y2 = self._region_bounds(region, image)
             
-            # 构建表格结构
-            # 假设第一行是表头
-            headers = {}
-            first_row_cells = [c for c in cells if c.row < settings.TABLE_HEADER_ROWS]
-            for cell in first_row_cells:
-                headers[cell.text] = cell.col
-            
-            return TableStructure(
-                headers=headers,
-                cells=cells,
-                merged_cells=[]  # TODO: 实现合并单元格检测
-            )
+            preprocess_report = {}
+            with stage_timer(timings, "preprocess"):
+                table_image, grid_scale = _downscale_strips(image[y1:y2, x1:x2], MAX_PREPROCESS_WIDTH)
+                processed_image = self.preprocess_image(table_image, report=preprocess_report)
+            scale = processed_image.shape[1] / table_image.shape[1]
+            
+            with stage_timer(timings, "grid"):
+                rows, cols = self._detect_grid(table_image, processed_image, scale)
+                merged_cells = self._detect_merged_cells(table_image, rows, cols)
+            # 合并单元格按网格下标记录，坐标换算不影响
+            rows = [min(int(round(r / grid_scale)), y2 - y1) + y1 for r in rows]
+            cols = [min(int(round(c / grid_scale)), x2 - x1) + x1 for c in cols]
+            del table_image, processed_image
+            
+            results = [item for tile in tile_results for item in tile["results"]]
+            if not results:
+                raise ValueError("OCR failed to process image")
+            
+            return self._build_table(image, rows, cols, results, timings, {
+                "ocr_passes": [tile["stats"] for tile in tile_results],
+                "preprocess": preprocess_report,
+                "table_region": region,
+                "tiles": {
+                    "count": len(tile_results),
+                    "size": settings.OCR_TILE_SIZE,
+                    "overlap": settings.OCR_TILE_OVERLAP,
+                    "dropped_boxes": sum(tile["stats"]["dropped"] for tile in tile_results)
+                }
+            }, merged_cells)
         except Exception as e:
             raise Exception(f"Failed to process image: {str(e)}")
 
@@ -533,27 +872,34 @@ class OCRService:
             for col_idx, (col_name, value) in enumerate(row.items()):
                 cell = TableCell(
                     row=row_idx,
-                    col=col_idx,
+                    column=col_idx,
                     text=str(value),
                     confidence=1.0  # Excel数据置信度为1
                 )
                 cells.append(cell)
         
+        roles = map_header_texts(list(df.columns))
         return TableStructure(
             headers=headers,
             cells=cells,
-            merged_cells=[]  # TODO: 处理Excel合并单元格
+            merged_cells=[],  # TODO: 处理Excel合并单元格
+            column_roles=roles,
+            data_rows=build_rows(cells, roles)
         )
 
-    async def create_task(self, file_paths: List[str], file_types: List[FileType]) -> str:
-        """创建OCR任务"""
+    async def create_task(self, file_paths: List[str], file_types: List[FileType],
+                          file_hashes: Optional[List[str]] = None) -> str:
+        """创建OCR任务，任务中的所有文件并行处理"""
         task_id = str(uuid.uuid4())
+        file_hashes = file_hashes or [None] * len(file_paths)
         
         # 创建任务记录
         task = OCRTask(
             task_id=task_id,
-            file_url=file_paths[0],  # 暂时只处理第一个文件
-            file_type=file_types[0],
+            files=[
+                TaskFile(file_path=path, file_type=file_type, sha256=file_hash)
+                for path, file_type, file_hash in zip(file_paths, file_types, file_hashes)
+            ],
             status=TaskStatus.PENDING
         )
         
@@ -572,6 +918,190 @@ class OCRService:
             return OCRTask(**doc)
         return None
 
+    async def _recognize_file(self, file_path: str, file_type: FileType,
+                              file_hash: Optional[str] = None) -> TableStructure:
+        """识别单个文件，优先使用缓存结果"""
+        # 相同内容的文件直接使用缓存结果，上传时已计算哈希的文件不再重新读取
+        cache_key = None
+        if ocr_result_cache.enabled:
+            if file_hash is None:
+                file_hash = await asyncio.to_thread(file_sha256, file_path)
+            cache_key = ocr_result_cache.key_for(file_hash)
+            # 缓存读写失败只记录警告，不影响识别
+            try:
+                result = await ocr_result_cache.get(cache_key)
+            except Exception as e:
+                print(f"Warning: OCR cache read failed: {str(e)}")
+                result = None
+            if result is not None:
+                result.stats["cache_hit"] = True
+                return result
+        
+        # 根据文件类型处理，识别在工作进程中执行
+        if file_type == FileType.EXCEL:
+            result = await ocr_worker_pool.run("_process_excel", file_path, wait=True)
+        elif file_type == FileType.PDF:
+            result = await self._recognize_pdf(file_path)
+        else:
+            # 处理图片OCR
+            result = await self._recognize_image(file_path)
+        
+        # 路由到非首选引擎的结果不缓存，避免后续命中时返回另一个引擎的结果
+        if cache_key and ocr_engine_router.cacheable(result):
+            try:
+                await ocr_result_cache.put(cache_key, result)
+            except Exception as e:
+                print(f"Warning: OCR cache write failed: {str(e)}")
+        return result
+
+    async def _recognize_image(self, image_path: str) -> TableStructure:
+        """识别图片，由引擎路由选择本地或云端识别"""
+        size = await asyncio.to_thread(_read_image_size, image_path)
+        
+        async def local() -> TableStructure:
+            # 超大图片切分为重叠分块并行识别
+            if settings.OCR_TILE_ENABLED and size and max(size) > settings.OCR_TILE_MAX_SIDE:
+                return await self._recognize_tiled(image_path)
+            return await ocr_worker_pool.run("_process_image_ocr", image_path, wait=True)
+        
+        async def cloud() -> TableStructure:
+            return await self.cloud.recognize_table_structure(image_path)
+        
+        return await ocr_engine_router.recognize(
+            image_path, size, local, cloud,
+            pending=ocr_worker_pool.pending,
+            workers=ocr_worker_pool.max_workers,
+            local_has_capacity=ocr_worker_pool.has_capacity(),
+            cloud_available=self.cloud.configured
+        )
+
+    async def _recognize_tiled(self, image_path: str) -> TableStructure:
+        """分块识别大图
+
+        由一个工作进程解码图片并写入临时.npy文件，各分块在工作进程中并行识别，
+        最后合并结果并检测表格网格。分块在进程池队列已满时等待空位。
+        """
+        plan = await ocr_worker_pool.run("_prepare_tiles", image_path, wait=True)
+        array_path = plan["array_path"]
+        try:
+            tile_results = await asyncio.gather(*[
+                ocr_worker_pool.run("_recognize_tile", array_path, rect, core, wait=True)
+                for rect, core in plan["tiles"]
+            ])
+            return await ocr_worker_pool.run(
+                "_process_tiled_image", array_path, tile_results, plan["region"], wait=True
+            )
+        finally:
+            await asyncio.to_thread(_remove_file, array_path)
+
+    async def _recognize_pdf(self, pdf_path: str) -> TableStructure:
+        """按页并行识别PDF
+
+        每页由工作进程自行渲染，API进程只提交页码，峰值内存与PDF页数无关；
+        进程池队列已满时各页等待空位。
+        """
+        page_count = await asyncio.to_thread(pdf_page_count, pdf_path)
+        if page_count == 0:
+            raise ValueError("PDF has no pages")
+        if page_count > settings.OCR_PDF_MAX_PAGES:
+            raise ValueError(f"PDF has {page_count} pages, limit is {settings.OCR_PDF_MAX_PAGES}")
+        
+        pages = await asyncio.gather(*[
+            ocr_worker_pool.run("_process_pdf_page", pdf_path, n, wait=True)
+            for n in range(page_count)
+        ])
+        return self.merge_results(pages)
+
+    async def _process_file(self, task_id: str, index: int,
+                            task_file: TaskFile) -> Optional[TableStructure]:
+        """处理任务中的单个文件，完成后立即写入该文件的结果"""
+        prefix = f"files.{index}"
+        await self.collection.update_one(
+            {"task_id": task_id},
+            {"$set": {f"{prefix}.status": TaskStatus.PROCESSING}}
+        )
+        
+        try:
+            result = await self._recognize_file(
+                task_file.file_path, task_file.file_type, task_file.sha256
+            )
+        except Exception as e:
+            await self.collection.update_one(
+                {"task_id": task_id},
+                {
+                    "$set": {
+                        f"{prefix}.status": TaskStatus.FAILED,
+                        f"{prefix}.error_message": str(e)
+                    }
+                }
+            )
+            return None
+        
+        await self.collection.update_one(
+            {"task_id": task_id},
+            {
+                "$set": {
+                    f"{prefix}.status": TaskStatus.COMPLETED,
+                    f"{prefix}.result": result.dict()
+                }
+            }
+        )
+        return result
+
+    def merge_results(self, results: List[TableStructure]) -> TableStructure:
+        """按文件顺序纵向拼接多个文件的识别结果"""
+        headers = {}
+        cells = []
+        merged_cells = []
+        column_roles = {}
+        data_rows = []
+        row_offsets = []
+        offset = 0
+        
+        for result in results:
+            if not headers:
+                headers = dict(result.headers)
+            if not column_roles:
+                column_roles = dict(result.column_roles)
+            row_offsets.append(offset)
+            # 没有表头的续页沿用前面识别出的字段映射
+            rows = result.data_rows
+            if not result.column_roles and column_roles:
+                rows = build_rows(result.cells, column_roles)
+            for row in rows:
+                data_rows.append(row.copy(update={"row_index": row.row_index + offset}))
+            for cell in result.cells:
+                cells.append(cell.copy(update={"row": cell.row + offset}))
+            for merged in result.merged_cells:
+                merged = dict(merged)
+                for key in ("start_row", "end_row"):
+                    if key in merged:
+                        merged[key] += offset
+                merged_cells.append(merged)
+            if result.cells:
+                offset += max(cell.row + cell.row_span for cell in result.cells)
+        
+        stats = {
+            "row_offsets": row_offsets,
+            "sources": [result.stats for result in results]
+        }
+        # 汇总各文件（页）重新识别的单元格数
+        retries = [result.stats["cell_retry"] for result in results if "cell_retry" in result.stats]
+        if retries:
+            stats["cell_retry"] = {
+                key: sum(retry[key] for retry in retries)
+                for key in ("cells", "boxes", "improved")
+            }
+        
+        return TableStructure(
+            headers=headers,
+            cells=cells,
+            merged_cells=merged_cells,
+            column_roles=column_roles,
+            data_rows=data_rows,
+            stats=stats
+        )
+
     async def _process_task(self, task_id: str):
         """处理OCR任务"""
         try:
@@ -586,12 +1116,14 @@ class OCRService:
             if not task:
                 return
             
-            # 根据文件类型处理
-            if task.file_type == FileType.EXCEL:
-                result = self._process_excel(task.file_url)
-            else:
-                # 处理图片OCR
-                result = self._process_image_ocr(task.file_url)
+            # 所有文件并行处理，并发度由OCR工作进程池限制
+            results = await asyncio.gather(*[
+                self._process_file(task_id, index, task_file)
+                for index, task_file in enumerate(task.files)
+            ])
+            succeeded = [result for result in results if result is not None]
+            if not succeeded:
+                raise ValueError("All files failed to process")
             
             # 更新任务状态为完成
             await self.collection.update_one(
@@ -599,7 +1131,7 @@ class OCRService:
                 {
                     "$set": {
                         "status": TaskStatus.COMPLETED,
-                        "result": result.dict() if result else None
+                        "result": self.merge_results(succeeded).dict()
                     }
                 }
             )
@@ -616,13 +1148,46 @@ class OCRService:
                 }
             )
 
+    def _map_to_merged_cells(self, row_idx: np.ndarray, col_idx: np.ndarray,
+                             merged_cells: List[Dict[str, int]], n_rows: int,
+                             n_cols: int) -> Tuple[np.ndarray, np.ndarray, Dict]:
+        """将落在合并单元格内的文本框映射到合并单元格的左上角
+
+        返回映射后的行、列下标和 {(行, 列): (行跨度, 列跨度)}。
+        """
+        anchor_row = np.repeat(np.arange(n_rows)[:, None], n_cols, axis=1)
+        anchor_col = np.repeat(np.arange(n_cols)[None, :], n_rows, axis=0)
+        spans = {}
+        for merged in merged_cells:
+            r0, r1 = merged["start_row"], merged["end_row"]
+            c0, c1 = merged["start_col"], merged["end_col"]
+            if r1 >= n_rows or c1 >= n_cols:
+                continue
+            anchor_row[r0:r1 + 1, c0:c1 + 1] = r0
+            anchor_col[r0:r1 + 1, c0:c1 + 1] = c0
+            spans[(r0, c0)] = (r1 - r0 + 1, c1 - c0 + 1)
+
+        valid = (row_idx >= 0) & (col_idx >= 0)
+        rows, cols = row_idx[valid], col_idx[valid]
+        row_idx, col_idx = row_idx.copy(), col_idx.copy()
+        row_idx[valid] = anchor_row[rows, cols]
+        col_idx[valid] = anchor_col[rows, cols]
+        return row_idx, col_idx, spans
+
     def extract_cell_content(self, image: np.ndarray, cells: List[List[int]], 
-                           ocr_result: List) -> List[TableCell]:
-        """提取单元格内容"""
+                           ocr_result: List, normalized: bool = False,
+                           merged_cells: Optional[List[Dict[str, int]]] = None) -> List[TableCell]:
+        """提取单元格内容
+
+        normalized为True时表示ocr_result中的文本已经规范化（如_merge_results的输出），不再重复处理。
+        合并单元格内的文本归到其左上角单元格，并填写row_span/col_span。
+        """
         table_cells = []
         cells_content = {}  # 用于存储每个单元格的所有文本
         
-        # 将OCR结果按位置分配到单元格
+        # 规范化文本并计算文本框的边界框
+        entries = []
+        bounds = []
         for line in ocr_result:
             if not isinstance(line, list) or len(line) != 2:
                 continue
@@ -632,47 +1197,34 @@ class OCRService:
                 text, confidence = line[1]
                 
                 # 清理和规范化文本
-                text = self._normalize_text(text)
+                if not normalized:
+                    text = normalize_text(text)
                 if not text:
                     continue
                 
-                # 计算文本框的边界框
-                x_coords = [p[0] for p in box]
-                y_coords = [p[1] for p in box]
-                min_x, max_x = min(x_coords), max(x_coords)
-                min_y, max_y = min(y_coords), max(y_coords)
-                center_x = (min_x + max_x) / 2
-                center_y = (min_y + max_y) / 2
-                
-                # 确定所属单元格
-                row = col = -1
-                max_overlap = 0
-                
-                for i in range(len(cells[0]) - 1):
-                    for j in range(len(cells[1]) - 1):
-                        cell_x1, cell_y1 = cells[1][j], cells[0][i]
-                        cell_x2, cell_y2 = cells[1][j+1], cells[0][i+1]
-                        
-                        # 计算重叠面积
-                        overlap = self._calculate_overlap(
-                            [min_x, min_y, max_x, max_y],
-                            [cell_x1, cell_y1, cell_x2, cell_y2]
-                        )
-                        
-                        if overlap > max_overlap:
-                            max_overlap = overlap
-                            row, col = i, j
-                
-                if row != -1 and col != -1:
-                    cell_key = (row, col)
-                    if cell_key not in cells_content:
-                        cells_content[cell_key] = []
-                    cells_content[cell_key].append((text, confidence, center_y))
+                min_x, min_y, max_x, max_y = box_bounds(box)
+                bounds.append([min_x, min_y, max_x, max_y])
+                entries.append((text, confidence, (min_y + max_y) / 2))
                     
             except Exception as e:
                 print(f"Warning: Failed to process OCR result: {str(e)}")
                 continue
         
+        # 按重叠面积批量确定所属单元格
+        row_idx, col_idx = assign_boxes_to_cells(bounds, cells[0], cells[1])
+        spans = {}
+        if merged_cells and len(entries):
+            row_idx, col_idx, spans = self._map_to_merged_cells(
+                row_idx, col_idx, merged_cells, len(cells[0]) - 1, len(cells[1]) - 1
+            )
+        for (text, confidence, center_y), row, col in zip(entries, row_idx, col_idx):
+            if row == -1 or col == -1:
+                continue
+            cell_key = (int(row), int(col))
+            if cell_key not in cells_content:
+                cells_content[cell_key] = []
+            cells_content[cell_key].append((text, confidence, center_y))
+        
         # 处理每个单元格的内容
         for (row, col), contents in cells_content.items():
             # 按y坐标排序内容
@@ -698,10 +1250,13 @@ class OCRService:
             if row == 0:  # 表头行
                 merged_text = merged_text.upper()  # 表头转大写
             
+            row_span, col_span = spans.get((row, col), (1, 1))
             cell = TableCell(
                 row=row,
-                col=col,
+                column=col,
                 text=merged_text,
+                row_span=row_span,
+                col_span=col_span,
                 confidence=float(avg_confidence)
             )
             table_cells.append(cell)
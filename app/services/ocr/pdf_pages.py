@@ -0,0 +1,50 @@
+from typing import Iterable, Iterator, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+
+
+def _open_pdf(pdf_path: str):
+    try:
+        import pymupdf
+    except ImportError:
+        try:
+            import fitz as pymupdf  # PyMuPDF < 1.24
+        except ImportError:
+            raise RuntimeError("PDF support requires PyMuPDF (pip install PyMuPDF)")
+    return pymupdf.open(pdf_path)
+
+
+def pdf_page_count(pdf_path: str) -> int:
+    """获取PDF页数（不渲染页面）"""
+    with _open_pdf(pdf_path) as doc:
+        return doc.page_count
+
+
+def iter_pdf_pages(pdf_path: str, dpi: Optional[int] = None,
+                   page_numbers: Optional[Iterable[int]] = None) -> Iterator[Tuple[int, np.ndarray]]:
+    """逐页渲染PDF
+
+    每次只渲染一页并以BGR图像返回，调用方处理完后即可释放，
+    内存占用与PDF总页数无关。
+
+    参数:
+        pdf_path: PDF文件路径
+        dpi: 渲染分辨率，默认使用 OCR_PDF_DPI
+        page_numbers: 需要渲染的页码（从0开始），默认全部页面
+    """
+    dpi = dpi or settings.OCR_PDF_DPI
+    with _open_pdf(pdf_path) as doc:
+        if page_numbers is None:
+            page_numbers = range(doc.page_count)
+        for page_number in page_numbers:
+            pixmap = doc.load_page(page_number).get_pixmap(dpi=dpi, alpha=False)
+            image = np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(
+                pixmap.height, pixmap.width, pixmap.n
+            )
+            # PyMuPDF输出RGB（或灰度），转换为OpenCV使用的BGR
+            if pixmap.n == 1:
+                image = np.repeat(image, 3, axis=2)
+            else:
+                image = image[:, :, 2::-1]
+            yield page_number, np.ascontiguousarray(image)
+            del pixmap
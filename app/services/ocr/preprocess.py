@@ -0,0 +1,298 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+import cv2
+import numpy as np
+from app.core.config import settings
+
+PREPROCESS_PROFILES = ("none", "fast", "full")
+
+# 预处理前限制图像宽度
+MAX_PREPROCESS_WIDTH = 2000
+
+
+@contextmanager
+def stage_timer(timings: Dict[str, float], name: str):
+    """记录单个处理阶段的耗时（毫秒）"""
+    start = time.perf_counter()
+    yield
+    timings[name] = round((time.perf_counter() - start) * 1000, 2)
+
+
+def estimate_image_quality(gray: np.ndarray) -> Dict[str, float]:
+    """在缩略图上估计图像质量
+
+    返回:
+        noise: 噪声强度（与中值滤波结果差异的稳健估计）
+        contrast: 灰度标准差
+        sharpness: 拉普拉斯响应方差，越小越模糊
+    """
+    height, width = gray.shape[:2]
+    scale = min(1.0, 800 / max(height, width))
+    if scale < 1.0:
+        gray = cv2.resize(gray, (int(width * scale), int(height * scale)),
+                          interpolation=cv2.INTER_AREA)
+
+    residual = cv2.absdiff(gray, cv2.medianBlur(gray, 3))
+    return {
+        "noise": float(np.median(residual) * 1.4826),
+        "contrast": float(gray.std()),
+        "sharpness": float(cv2.Laplacian(gray, cv2.CV_64F).var())
+    }
+
+
+def _resize(image: np.ndarray) -> np.ndarray:
+    height, width = image.shape[:2]
+    if width > MAX_PREPROCESS_WIDTH:
+        scale = MAX_PREPROCESS_WIDTH / width
+        new_height = int(height * scale)
+        image = cv2.resize(image, (MAX_PREPROCESS_WIDTH, new_height), interpolation=cv2.INTER_AREA)
+    return image
+
+
+def _to_gray(image: np.ndarray) -> np.ndarray:
+    if image.ndim == 2:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def _enhance_contrast(gray: np.ndarray) -> np.ndarray:
+    # 自适应直方图均衡化
+    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    equalized = clahe.apply(gray)
+    # 对比度增强
+    return cv2.convertScaleAbs(equalized, alpha=1.3, beta=15)
+
+
+def _binarize(gray: np.ndarray) -> np.ndarray:
+    # 自适应二值化
+    return cv2.adaptiveThreshold(
+        gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+        cv2.THRESH_BINARY, 11, 2
+    )
+
+
+def _morphology(binary: np.ndarray) -> np.ndarray:
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
+    morph = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
+    return cv2.morphologyEx(morph, cv2.MORPH_OPEN, kernel)
+
+
+def _skew_from_lines(foreground: np.ndarray) -> Optional[float]:
+    """根据近似水平的长线段（表格横线）估计倾斜角度"""
+    width = foreground.shape[1]
+    lines = cv2.HoughLinesP(
+        foreground, rho=1, theta=np.pi / 180, threshold=50,
+        minLineLength=width * 0.3, maxLineGap=width * 0.02
+    )
+    if lines is None:
+        return None
+
+    lines = lines.reshape(-1, 4).astype(np.float64)
+    dx = lines[:, 2] - lines[:, 0]
+    dy = lines[:, 3] - lines[:, 1]
+    angles = np.degrees(np.arctan2(dy, dx))
+    angles = np.where(angles > 90, angles - 180, angles)
+    angles = np.where(angles < -90, angles + 180, angles)
+    horizontal = np.abs(angles) < 15
+    if horizontal.sum() < 3:
+        return None
+    return float(np.median(angles[horizontal]))
+
+
+def _skew_from_text_lines(foreground: np.ndarray) -> Optional[float]:
+    """将文字横向连成文本行后，根据文本行外接矩形估计倾斜角度"""
+    width = foreground.shape[1]
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(15, width // 40), 3))
+    blobs = cv2.morphologyEx(foreground, cv2.MORPH_CLOSE, kernel)
+    contours = cv2.findContours(blobs, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[-2]
+
+    angles = []
+    weights = []
+    for contour in contours:
+        (_, _), (w, h), angle = cv2.minAreaRect(contour)
+        length, thickness = max(w, h), min(w, h)
+        if length < width * 0.1 or length < thickness * 3:
+            continue
+        # 统一为长边方向的角度，兼容不同OpenCV版本的角度范围
+        if w < h:
+            angle += 90
+        angle = (angle + 90) % 180 - 90
+        if abs(angle) < 15:
+            angles.append(angle)
+            weights.append(length)
+
+    if len(angles) < 3:
+        return None
+
+    # 按长度加权的中位数
+    order = np.argsort(angles)
+    cumulative = np.cumsum(np.asarray(weights)[order])
+    median_idx = order[np.searchsorted(cumulative, cumulative[-1] / 2)]
+    return float(angles[median_idx])
+
+
+def estimate_skew_angle(binary: np.ndarray, max_side: Optional[int] = None) -> float:
+    """在缩略图上估计倾斜角度（度），返回值可直接用于旋转校正
+
+    优先使用表格横线的角度，检测不到足够线段时退回到文本行的方向。
+    """
+    max_side = max_side or settings.OCR_DESKEW_MAX_SIDE
+    height, width = binary.shape[:2]
+    scale = min(1.0, max_side / max(height, width))
+    small = binary
+    if scale < 1.0:
+        small = cv2.resize(binary, (max(1, int(width * scale)), max(1, int(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+
+    # 二值图为白底黑字，文字和线条作为前景
+    foreground = cv2.threshold(small, 127, 255, cv2.THRESH_BINARY_INV)[1]
+
+    # 横向开运算只保留较长的水平结构，去掉文字笔画
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(10, foreground.shape[1] // 30), 1))
+    line_mask = cv2.morphologyEx(foreground, cv2.MORPH_OPEN, kernel)
+
+    angle = _skew_from_lines(line_mask)
+    if angle is None:
+        angle = _skew_from_text_lines(foreground)
+    return angle or 0.0
+
+
+def _deskew(binary: np.ndarray, report: Dict) -> np.ndarray:
+    # 倾斜校正：缩略图上估计角度，只对全分辨率图像旋转一次
+    angle = estimate_skew_angle(binary)
+    report["skew_angle"] = round(angle, 2)
+
+    # 如果倾斜角度大于阈值才进行校正
+    if abs(angle) <= settings.OCR_DESKEW_MIN_ANGLE:
+        return binary
+
+    (h, w) = binary.shape[:2]
+    center = (w // 2, h // 2)
+    M = cv2.getRotationMatrix2D(center, angle, 1.0)
+    return cv2.warpAffine(
+        binary, M, (w, h),
+        flags=cv2.INTER_CUBIC,
+        borderMode=cv2.BORDER_REPLICATE
+    )
+
+
+def _sharpen(image: np.ndarray) -> np.ndarray:
+    # 边缘增强
+    kernel_sharpen = np.array([
+        [-1, -1, -1],
+        [-1, 9, -1],
+        [-1, -1, -1]
+    ])
+    sharpened = cv2.filter2D(image, -1, kernel_sharpen)
+    # 最终的降噪处理
+    return cv2.medianBlur(sharpened, 3)
+
+
+def _preprocess_none(image: np.ndarray, timings: Dict[str, float], report: Dict) -> np.ndarray:
+    """只做缩放和灰度转换"""
+    with stage_timer(timings, "resize"):
+        image = _resize(image)
+    with stage_timer(timings, "gray"):
+        gray = _to_gray(image)
+    return gray
+
+
+def _preprocess_full(image: np.ndarray, timings: Dict[str, float], report: Dict) -> np.ndarray:
+    """完整预处理流程：对每张图片执行全部阶段"""
+    with stage_timer(timings, "resize"):
+        image = _resize(image)
+    with stage_timer(timings, "gray"):
+        gray = _to_gray(image)
+    with stage_timer(timings, "denoise"):
+        denoised = cv2.fastNlMeansDenoising(gray, None, 10, 7, 21)
+    with stage_timer(timings, "contrast"):
+        enhanced = _enhance_contrast(denoised)
+    with stage_timer(timings, "binarize"):
+        binary = _binarize(enhanced)
+    with stage_timer(timings, "morphology"):
+        morph = _morphology(binary)
+    with stage_timer(timings, "deskew"):
+        rotated = _deskew(morph, report)
+    with stage_timer(timings, "sharpen"):
+        final = _sharpen(rotated)
+    return final
+
+
+def _preprocess_fast(image: np.ndarray, timings: Dict[str, float], report: Dict) -> np.ndarray:
+    """快速预处理流程：根据图像质量估计跳过不必要的阶段"""
+    with stage_timer(timings, "resize"):
+        image = _resize(image)
+    with stage_timer(timings, "gray"):
+        gray = _to_gray(image)
+    with stage_timer(timings, "quality"):
+        quality = estimate_image_quality(gray)
+    report["quality"] = {k: round(v, 2) for k, v in quality.items()}
+    skipped = []
+
+    noisy = quality["noise"] > settings.OCR_FAST_NOISE_THRESHOLD
+    if noisy:
+        # 使用高斯滤波代替非局部均值去噪
+        with stage_timer(timings, "denoise"):
+            gray = cv2.GaussianBlur(gray, (3, 3), 0)
+    else:
+        skipped.append("denoise")
+
+    if quality["contrast"] < settings.OCR_FAST_CONTRAST_THRESHOLD:
+        with stage_timer(timings, "contrast"):
+            gray = _enhance_contrast(gray)
+    else:
+        skipped.append("contrast")
+
+    with stage_timer(timings, "binarize"):
+        binary = _binarize(gray)
+
+    if noisy:
+        with stage_timer(timings, "morphology"):
+            binary = _morphology(binary)
+    else:
+        skipped.append("morphology")
+
+    with stage_timer(timings, "deskew"):
+        binary = _deskew(binary, report)
+
+    if quality["sharpness"] < settings.OCR_FAST_SHARPNESS_THRESHOLD:
+        with stage_timer(timings, "sharpen"):
+            binary = _sharpen(binary)
+    else:
+        skipped.append("sharpen")
+
+    report["skipped"] = skipped
+    return binary
+
+
+_PROFILE_HANDLERS = {
+    "none": _preprocess_none,
+    "fast": _preprocess_fast,
+    "full": _preprocess_full
+}
+
+
+def preprocess(image: np.ndarray, profile: Optional[str] = None,
+               report: Optional[Dict] = None) -> np.ndarray:
+    """按指定配置预处理图像
+
+    参数:
+        image: BGR或灰度图像
+        profile: none/fast/full，默认使用 OCR_PREPROCESS_PROFILE
+        report: 可选字典，写入使用的配置、各阶段耗时（毫秒）和质量估计
+    """
+    profile = profile or settings.OCR_PREPROCESS_PROFILE
+    if profile not in _PROFILE_HANDLERS:
+        raise ValueError(f"Unknown preprocess profile: {profile}")
+
+    if report is None:
+        report = {}
+    timings: Dict[str, float] = {}
+    report["profile"] = profile
+    report["timings_ms"] = timings
+
+    start = time.perf_counter()
+    result = _PROFILE_HANDLERS[profile](image, timings, report)
+    report["total_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return result
@@ -0,0 +1,216 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.core.database import Database, COLLECTIONS
+from app.models.ocr import TableStructure
+
+# 识别流程发生不兼容变化时递增，使旧缓存失效
+CACHE_VERSION = 1
+
+# 影响识别结果的配置，参与配置指纹；进程池、路由阈值、缓存、超时重试等运行参数不影响结果
+_FINGERPRINT_SETTINGS = (
+    # 引擎模式：决定缓存的是本地还是云端结果
+    "OCR_ENGINE_MODE",
+    # 识别模型
+    "OCR_LANGUAGE", "OCR_USE_ANGLE_CLASS", "OCR_DET_ALGORITHM", "OCR_REC_ALGORITHM",
+    "OCR_LIMIT_SIDE_LEN", "OCR_DET_LIMIT_SIDE_LEN", "OCR_ENABLE_TABLE", "OCR_TABLE_MAX_LEN",
+    "MIN_CONFIDENCE",
+    # PDF渲染、表格区域和分块
+    "OCR_PDF_DPI", "OCR_TABLE_REGION_ENABLED", "OCR_TABLE_REGION_PADDING", "OCR_TABLE_REGION_MAX_RATIO",
+    "OCR_TILE_ENABLED", "OCR_TILE_MAX_SIDE", "OCR_TILE_SIZE", "OCR_TILE_OVERLAP",
+    # 预处理
+    "OCR_PREPROCESS_PROFILE", "OCR_FAST_NOISE_THRESHOLD", "OCR_FAST_CONTRAST_THRESHOLD",
+    "OCR_FAST_SHARPNESS_THRESHOLD", "OCR_DESKEW_MAX_SIDE", "OCR_DESKEW_MIN_ANGLE",
+    # 多轮识别和单元格补充识别
+    "OCR_PASS_MODE", "OCR_PASS_MIN_MEAN_CONFIDENCE", "OCR_PASS_LOW_CONFIDENCE", "OCR_PASS_MAX_LOW_RATIO",
+    "OCR_PASS_MIN_GRID_COVERAGE", "OCR_PASS_REGION_PADDING", "OCR_PASS_MAX_REGION_RATIO",
+    "OCR_CELL_RETRY_CONFIDENCE", "OCR_CELL_RETRY_UPSCALE", "OCR_CELL_RETRY_MAX_BOXES",
+    "OCR_NMS_IOU_THRESHOLD",
+    # 表格结构
+    "TABLE_MIN_ROW_HEIGHT", "TABLE_MIN_COL_WIDTH", "TABLE_MERGE_CELLS_THRESHOLD", "TABLE_HEADER_ROWS",
+    "TABLE_HEADER_SCAN_ROWS", "TABLE_LINE_DETECTOR",
+)
+
+
+def file_sha256(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """分块计算文件内容的SHA-256"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def settings_fingerprint() -> str:
+    """计算影响识别结果的配置指纹"""
+    params = {name: getattr(settings, name) for name in _FINGERPRINT_SETTINGS}
+    params["CACHE_VERSION"] = CACHE_VERSION
+    payload = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class OCRResultCache:
+    """OCR结果缓存
+
+    以文件内容哈希和配置指纹作为键，结果以JSON文件保存在本地目录，
+    总大小超过上限时按最近使用时间淘汰；可选同时写入 ocr_results 集合。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None,
+                 use_db: Optional[bool] = None):
+        self.enabled = settings.OCR_CACHE_ENABLED
+        self.cache_dir = cache_dir or settings.OCR_CACHE_DIR
+        self.max_bytes = max_bytes or settings.OCR_CACHE_MAX_BYTES
+        self.use_db = settings.OCR_CACHE_USE_DB if use_db is None else use_db
+        self.hits = 0
+        self.misses = 0
+        self._index: Optional["OrderedDict[str, int]"] = None  # 键 -> 文件大小，按使用时间排序
+        self._fingerprint = settings_fingerprint()
+
+    def key_for(self, file_hash: str) -> str:
+        """根据文件哈希生成缓存键"""
+        return f"{file_hash}-{self._fingerprint}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _scan_index(self) -> "OrderedDict[str, int]":
+        """扫描缓存目录，按修改时间重建LRU索引"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, name[:-5], stat.st_size))
+        entries.sort()
+        return OrderedDict((key, size) for _, key, size in entries)
+
+    async def _get_index(self) -> "OrderedDict[str, int]":
+        """LRU索引只在事件循环中读写，首次使用时在线程中扫描缓存目录"""
+        if self._index is None:
+            index = await asyncio.to_thread(self._scan_index)
+            if self._index is None:
+                self._index = index
+        return self._index
+
+    def _read(self, key: str) -> Optional[str]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                data = f.read()
+            os.utime(self._path(key))
+            return data
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key: str, data: str) -> int:
+        # 先写临时文件再替换，避免读到不完整的缓存；同一个键并发写入时各用各的临时文件
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f"{key}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            _remove_quietly(tmp_path)
+            raise
+        return len(data.encode("utf-8"))
+
+    def _remove(self, keys: List[str]):
+        for key in keys:
+            _remove_quietly(self._path(key))
+
+    async def _evict(self):
+        """淘汰最久未使用的缓存，直到总大小不超过上限
+
+        在事件循环中从索引取出待淘汰的键，只把删除文件交给线程。
+        """
+        index = await self._get_index()
+        total = sum(index.values())
+        victims = []
+        while index and total > self.max_bytes:
+            key, size = index.popitem(last=False)
+            total -= size
+            victims.append(key)
+        if victims:
+            await asyncio.to_thread(self._remove, victims)
+
+    async def get(self, key: str) -> Optional[TableStructure]:
+        """读取缓存结果，未命中返回None"""
+        index = await self._get_index()
+        data = await asyncio.to_thread(self._read, key) if key in index else None
+        if data is not None:
+            # 读取期间该条目可能已被淘汰
+            if key in index:
+                index.move_to_end(key)
+            self.hits += 1
+            return TableStructure.model_validate_json(data)
+        # 文件已被删除的条目从索引中去掉
+        index.pop(key, None)
+
+        if self.use_db:
+            doc = await Database.get_db()[COLLECTIONS["ocr_results"]].find_one({"cache_key": key})
+            if doc:
+                result = TableStructure(**doc["result"])
+                await self._put_local(key, result)
+                self.hits += 1
+                return result
+
+        self.misses += 1
+        return None
+
+    async def _put_local(self, key: str, result: TableStructure):
+        # 先建立索引再写文件，否则首次扫描可能把正在写入的文件计入索引，
+        # 被并发的淘汰删除后又由这里重新加入，索引中留下没有文件的条目
+        index = await self._get_index()
+        size = await asyncio.to_thread(self._write, key, result.model_dump_json())
+        index[key] = size
+        index.move_to_end(key)
+        await self._evict()
+
+    async def put(self, key: str, result: TableStructure):
+        """写入缓存结果"""
+        await self._put_local(key, result)
+        if self.use_db:
+            await Database.get_db()[COLLECTIONS["ocr_results"]].update_one(
+                {"cache_key": key},
+                {"$set": {
+                    "cache_key": key,
+                    "result": result.model_dump(),
+                    "created_at": datetime.utcnow()
+                }},
+                upsert=True
+            )
+
+    async def stats(self) -> Dict:
+        """缓存命中统计"""
+        lookups = self.hits + self.misses
+        index = await self._get_index()
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(index),
+            "bytes": sum(index.values()),
+            "max_bytes": self.max_bytes
+        }
+
+
+ocr_result_cache = OCRResultCache()
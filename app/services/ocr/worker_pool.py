@@ -0,0 +1,258 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+from app.core.config import settings
+
+# 工作进程内的OCR服务实例，每个进程只加载一次模型
+_worker_service = None
+
+# 使用识别模型的任务，首次完成时模型已完成推理，进程池视为就绪
+_ENGINE_METHODS = {"_process_image_ocr", "_process_pdf_page", "_recognize_tile"}
+
+# 当前协程提交的任务在工作进程中的执行耗时，由 measure_service_time 开启统计
+_service_seconds: ContextVar[Optional[List[float]]] = ContextVar("ocr_service_seconds", default=None)
+
+
+def _init_worker(cpu_threads: int):
+    """工作进程初始化：限制计算线程数并创建OCR服务（引擎在首次识别或预热时加载）"""
+    global _worker_service
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(cpu_threads)
+
+    import cv2
+    cv2.setNumThreads(cpu_threads)
+
+    from app.services.ocr.ocr_service import OCRService
+    _worker_service = OCRService(connect_db=False)
+
+
+def _run_job(method: str, *args) -> Tuple[Any, float]:
+    """在工作进程中执行OCRService的方法，同时返回执行耗时"""
+    start = time.monotonic()
+    result = getattr(_worker_service, method)(*args)
+    return result, time.monotonic() - start
+
+
+@contextmanager
+def measure_service_time() -> Iterator[List[float]]:
+    """收集代码块内（含其中创建的子任务）提交的各任务在工作进程中的执行耗时
+
+    只统计工作进程实际执行的时间，不含等待队列空位和进程池内排队的时间。
+    """
+    seconds: List[float] = []
+    token = _service_seconds.set(seconds)
+    try:
+        yield seconds
+    finally:
+        _service_seconds.reset(token)
+
+
+class OCRQueueFullError(Exception):
+    """OCR任务队列已满"""
+    pass
+
+
+class OCRWorkerPool:
+    """OCR工作进程池
+
+    每个工作进程持有独立的PaddleOCR实例，API进程只负责提交任务并等待结果，
+    识别过程不会阻塞asyncio事件循环。
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, cpu_threads: Optional[int] = None,
+                 max_queued: Optional[int] = None):
+        self.cpu_threads = max(1, cpu_threads or settings.OCR_WORKER_THREADS)
+        self.max_workers = max_workers or settings.OCR_POOL_SIZE
+        if self.max_workers <= 0:
+            # 按CPU核数自动计算进程数
+            self.max_workers = max(1, (os.cpu_count() or 1) // self.cpu_threads)
+        self.max_queued = settings.OCR_MAX_QUEUED_JOBS if max_queued is None else max_queued
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._waiters: Deque[asyncio.Future] = deque()  # 等待队列空位的内部识别
+        # 就绪状态与首次识别耗时
+        self._created_at = time.monotonic()
+        self._warm_up_task: Optional[asyncio.Task] = None
+        self.warm_up_info: Optional[Dict[str, Any]] = None
+        self.warm_up_error: Optional[str] = None
+        self.first_ocr_seconds: Optional[float] = None
+        self.time_to_first_ocr: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        """模型已加载且至少完成过一次推理（预热或实际识别）"""
+        return self.warm_up_info is not None or self.first_ocr_seconds is not None
+
+    @property
+    def capacity(self) -> int:
+        """可同时接收的任务数（执行中 + 排队中）"""
+        return self.max_workers + self.max_queued
+
+    @property
+    def pending(self) -> int:
+        """执行中和排队中的任务数"""
+        return self._pending
+
+    def has_capacity(self, jobs: int = 1) -> bool:
+        """检查是否还能接收指定数量的任务"""
+        return self._pending + jobs <= self.capacity
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # 使用spawn启动，避免fork后推理库状态异常
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.cpu_threads,)
+            )
+        return self._executor
+
+    async def run(self, method: str, *args, wait: bool = False) -> Any:
+        """提交任务到工作进程并等待结果
+
+        Args:
+            wait: 已接收任务内部的识别（PDF分页、大图分块等）设为True，
+                队列已满时等待空位而不是抛出OCRQueueFullError；
+                是否接收新任务只由接口的容量检查决定。
+        """
+        if wait:
+            await self._wait_for_worker()
+        elif not self.has_capacity():
+            raise OCRQueueFullError(
+                f"OCR queue is full ({self._pending}/{self.capacity} jobs)"
+            )
+
+        self._pending += 1
+        start = time.monotonic()
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._get_executor().submit(_run_job, method, *args)
+        except BaseException as e:
+            self._release()
+            if isinstance(e, BrokenProcessPool):
+                self._executor = None
+            raise
+        # 调用方取消等待（如路由超时）时工作进程中的任务仍在执行，任务真正结束后才释放占用
+        future.add_done_callback(lambda _: self._release_threadsafe(loop))
+        try:
+            result, seconds = await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            # 工作进程异常退出，下次提交时重建进程池
+            self._executor = None
+            raise
+        service = _service_seconds.get()
+        if service is not None:
+            service.append(seconds)
+        if method in _ENGINE_METHODS and self.first_ocr_seconds is None:
+            self._record_first_ocr(start)
+        return result
+
+    def _release(self):
+        self._pending -= 1
+        self._wake_waiter()
+
+    def _release_threadsafe(self, loop: asyncio.AbstractEventLoop):
+        """任务结束回调，在执行器线程中调用"""
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            # 事件循环已关闭，不再有等待者
+            pass
+
+    async def _wait_for_worker(self):
+        """按先后顺序等待队列空位，所有任务的内部识别共用这一个等待队列"""
+        if not self._waiters and self.has_capacity():
+            return
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        while True:
+            try:
+                await waiter
+            except BaseException:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif not waiter.cancelled():
+                    # 已被唤醒但随后取消，把空位让给下一个等待者
+                    self._wake_waiter()
+                raise
+            if self.has_capacity():
+                return
+            # 空位已被新任务占用，回到队首继续等待
+            waiter = loop.create_future()
+            self._waiters.appendleft(waiter)
+
+    def _wake_waiter(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    def _record_first_ocr(self, start: float):
+        now = time.monotonic()
+        self.first_ocr_seconds = round(now - start, 3)
+        self.time_to_first_ocr = round(now - self._created_at, 3)
+        print(f"首次OCR识别完成: 耗时 {self.first_ocr_seconds}s, 距启动 {self.time_to_first_ocr}s")
+
+    async def warm_up(self) -> Dict[str, Any]:
+        """启动全部工作进程，加载模型并各执行一次预热推理
+
+        同时提交max_workers个预热任务，进程池会为每个任务启动一个新进程。
+        重复调用时复用同一个预热任务。
+        """
+        if self.warm_up_info is not None:
+            return self.warm_up_info
+        if self._warm_up_task is None:
+            self._warm_up_task = asyncio.ensure_future(self._warm_up())
+        try:
+            return await asyncio.shield(self._warm_up_task)
+        except Exception as e:
+            # 预热失败后允许重试，失败原因在就绪状态中返回
+            self._warm_up_task = None
+            self.warm_up_error = f"{type(e).__name__}: {e}"
+            raise
+
+    async def _warm_up(self) -> Dict[str, Any]:
+        start = time.monotonic()
+        workers = await asyncio.gather(*(self.run("warm_up") for _ in range(self.max_workers)))
+        elapsed = time.monotonic() - start
+        self.warm_up_error = None
+        self.warm_up_info = {
+            "seconds": round(elapsed, 3),
+            "since_start_seconds": round(time.monotonic() - self._created_at, 3),
+            "workers": workers
+        }
+        print(f"OCR工作进程预热完成: {len(workers)}个进程, 耗时 {elapsed:.2f}s")
+        return self.warm_up_info
+
+    def status(self) -> Dict[str, Any]:
+        """进程池就绪状态"""
+        return {
+            "ready": self.ready,
+            "warming_up": self._warm_up_task is not None and self.warm_up_info is None,
+            "max_workers": self.max_workers,
+            "pending": self._pending,
+            "waiting": len(self._waiters),
+            "warm_up": self.warm_up_info,
+            "warm_up_error": self.warm_up_error,
+            "first_ocr_seconds": self.first_ocr_seconds,
+            "time_to_first_ocr": self.time_to_first_ocr
+        }
+
+    def shutdown(self):
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+ocr_worker_pool = OCRWorkerPool()
@@ -1,38 +1,56 @@
+import asyncio
+import hashlib
 import os
 import uuid
 from fastapi import UploadFile
 from typing import List
 from app.core.config import settings
-from app.models.ocr import FileType
+from app.models.ocr import FileType, SavedUpload
+
+# 上传文件分块读取的大小
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """上传文件超出大小限制"""
+    pass
+
 
 def get_file_type(filename: str) -> FileType:
     """根据文件扩展名判断文件类型"""
     ext = filename.lower().split('.')[-1]
-    if ext in ['jpg', 'jpeg', 'png', 'pdf']:
+    if ext in ['jpg', 'jpeg', 'png']:
         return FileType.IMAGE
+    elif ext == 'pdf':
+        return FileType.PDF
     elif ext in ['xlsx', 'xls']:
         return FileType.EXCEL
     else:
         raise ValueError(f"Unsupported file type: {ext}")
 
 def is_valid_file(file: UploadFile) -> bool:
-    """验证文件是否合法"""
-    # 检查文件大小
-    try:
-        file.file.seek(0, 2)
-        size = file.file.tell()
-        file.file.seek(0)
-        if size > settings.MAX_UPLOAD_SIZE:
-            return False
-    except Exception:
+    """验证文件是否合法
+
+    只检查扩展名和请求中声明的大小，不读取文件内容；实际大小在保存时边写边校验。
+    """
+    if file.size is not None and file.size > settings.MAX_UPLOAD_SIZE:
         return False
 
     # 检查文件扩展名
     ext = file.filename.lower().split('.')[-1]
     return ext in settings.ALLOWED_EXTENSIONS
 
-async def save_upload_file(file: UploadFile) -> str:
-    """保存上传的文件并返回保存路径"""
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+async def save_upload_file(file: UploadFile, chunk_size: int = UPLOAD_CHUNK_SIZE) -> SavedUpload:
+    """分块保存上传的文件，同时计算SHA-256并校验大小
+
+    API进程中同一时刻只保留一个分块，超出 MAX_UPLOAD_SIZE 时立即停止并删除已写入的部分。
+    """
     # 确保上传目录存在
     os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
     
@@ -41,16 +59,36 @@ async def save_upload_file(file: UploadFile) -> str:
     filename = f"{uuid.uuid4()}.{ext}"
     file_path = os.path.join(settings.UPLOAD_DIR, filename)
     
-    # 保存文件
+    digest = hashlib.sha256()
+    size = 0
     try:
-        contents = await file.read()
         with open(file_path, 'wb') as f:
-            f.write(contents)
-        return file_path
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > settings.MAX_UPLOAD_SIZE:
+                    raise UploadTooLargeError(
+                        f"文件 {file.filename} 超出大小限制 {settings.MAX_UPLOAD_SIZE} 字节"
+                    )
+                digest.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+    except UploadTooLargeError:
+        _remove_file(file_path)
+        raise
     except Exception as e:
+        _remove_file(file_path)
         raise Exception(f"Failed to save file: {str(e)}")
+    
+    return SavedUpload(file_path=file_path, size=size, sha256=digest.hexdigest())
+
+def remove_files(paths: List[str]):
+    """删除已保存的文件"""
+    for path in paths:
+        _remove_file(path)
 
 def clean_old_files():
     """清理过期的上传文件"""
     # TODO: 实现文件清理逻辑
-    pass 
\ No newline at end of file
+    pass 
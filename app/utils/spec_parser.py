@@ -0,0 +1,145 @@
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+from app.utils.text_normalizer import full_to_half
+
+# 英寸 -> 公称通径DN
+_INCH_TO_DN = {
+    0.25: 8, 0.375: 10, 0.5: 15, 0.75: 20, 1: 25, 1.25: 32, 1.5: 40, 2: 50, 2.5: 65,
+    3: 80, 4: 100, 5: 125, 6: 150, 8: 200, 10: 250, 12: 300, 14: 350, 16: 400,
+    18: 450, 20: 500, 24: 600
+}
+
+_NUMBER = r"(\d+(?:\.\d+)?)"
+_INCH_UNIT = r"\s*(?:\"|''|”|″|英寸|寸|inch|in(?![a-z]))"
+
+_PN_PATTERN = re.compile(r"pn\s*" + _NUMBER)
+_MPA_PATTERN = re.compile(_NUMBER + r"\s*mpa")
+_KG_PATTERN = re.compile(_NUMBER + r"\s*(?:kg|公斤)")
+_CLASS_PATTERN = re.compile(r"(?:class|cl)\s*(\d+)|(\d+)\s*(?:lb|磅)")
+_MATERIAL_PATTERN = re.compile(
+    r"(?<![0-9a-z.])(304l?|316l?|321|310s|201|2205|q235[a-d]?|q345[a-e]?|q355[a-e]?|a105|wcb|"
+    r"cf8m?|cf3m?|ht\d{3}|qt\d{3}(?:-\d+)?|(?:10|20|45)#)(?![0-9a-z])"
+)
+_MIXED_INCH_PATTERN = re.compile(r"(\d+)\s*[- ]\s*(\d+)/(\d+)" + _INCH_UNIT)
+_FRACTION_INCH_PATTERN = re.compile(r"(\d+)/(\d+)" + _INCH_UNIT)
+_INCH_PATTERN = re.compile(_NUMBER + _INCH_UNIT)
+_FEN_PATTERN = re.compile(r"(\d+)\s*分(?!之)")  # 4分 = 1/2英寸
+# 带长度单位的尺寸按长度解析，包括乘号后的一段（DN20*500mm 为DN20、长500），
+# 须在通径的多段尺寸之前解析
+_LENGTH_PATTERN = re.compile(
+    r"(?:(?<=\*)|(?<=\d[x×])|(?<![\d.a-z]))(?:l\s*=?\s*)?" + _NUMBER + r"\s*(mm|毫米|cm|厘米|m|米)(?![a-z])"
+)
+_L_PATTERN = re.compile(r"(?<![a-z])l\s*=\s*" + _NUMBER)
+_DIAMETER_PATTERN = re.compile(
+    r"(?:(?<![a-z])(?:dn|de|d)|[φø∅ф])\s*" + _NUMBER + r"((?:\s*[*x×]\s*\d+(?:\.\d+)?)*)"
+)
+_DIMENSION_SPLIT = re.compile(r"\s*[*x×]\s*")
+
+_LENGTH_UNITS = {"mm": 1, "毫米": 1, "cm": 10, "厘米": 10, "m": 1000, "米": 1000}
+
+
+def _number(value: float) -> str:
+    """去掉多余的小数位：16.0 -> 16，1.5 -> 1.5"""
+    return f"{round(value, 3):g}"
+
+
+class ParsedSpec(NamedTuple):
+    """规格型号解析结果"""
+    diameters: Tuple[str, ...] = ()  # 通径/外径，DN、Φ写法统一，英寸换算为DN
+    pressure: Optional[str] = None   # 压力等级，如 PN16、CL150
+    material: Optional[str] = None   # 材质牌号，如 304、316L、Q235B
+    length: Optional[str] = None     # 长度（mm）
+
+    @property
+    def key(self) -> str:
+        """结构化规格键，如 DN100*80;PN16;316L；没有解析出任何字段时为空字符串"""
+        parts = []
+        if self.diameters:
+            parts.append("DN" + "*".join(self.diameters))
+        if self.pressure:
+            parts.append(self.pressure)
+        if self.material:
+            parts.append(self.material)
+        if self.length:
+            parts.append("L" + self.length)
+        return ";".join(parts)
+
+
+def _take(pattern: re.Pattern, text: str, convert) -> Tuple[Optional[str], str]:
+    """取第一个能转换的匹配，并从文本中去掉已解析的部分"""
+    for match in pattern.finditer(text):
+        value = convert(match)
+        if value is not None:
+            return value, text[:match.start()] + " " + text[match.end():]
+    return None, text
+
+
+def _first(rules, text: str) -> Tuple[Optional[str], str]:
+    """按顺序尝试各个 (正则, 转换函数)，返回第一个解析结果"""
+    for pattern, convert in rules:
+        value, text = _take(pattern, text, convert)
+        if value is not None:
+            return value, text
+    return None, text
+
+
+def _pn(value: str) -> str:
+    number = float(value)
+    # PN1.6 这类带小数的写法是MPa
+    if "." in value and number < 10:
+        number *= 10
+    return f"PN{_number(number)}"
+
+
+def _inch_dn(inches: float) -> Optional[str]:
+    dn = _INCH_TO_DN.get(inches)
+    return str(dn) if dn else None
+
+
+_PRESSURE_RULES = (
+    (_PN_PATTERN, lambda m: _pn(m.group(1))),
+    (_MPA_PATTERN, lambda m: f"PN{_number(float(m.group(1)) * 10)}"),
+    (_KG_PATTERN, lambda m: f"PN{_number(float(m.group(1)))}"),
+    (_CLASS_PATTERN, lambda m: f"CL{m.group(1) or m.group(2)}"),
+)
+_INCH_RULES = (
+    (_MIXED_INCH_PATTERN, lambda m: _inch_dn(int(m.group(1)) + int(m.group(2)) / int(m.group(3)))),
+    (_FRACTION_INCH_PATTERN, lambda m: _inch_dn(int(m.group(1)) / int(m.group(2)))),
+    (_INCH_PATTERN, lambda m: _inch_dn(float(m.group(1)))),
+    (_FEN_PATTERN, lambda m: _inch_dn(int(m.group(1)) / 8)),
+)
+_LENGTH_RULES = (
+    (_LENGTH_PATTERN, lambda m: _number(float(m.group(1)) * _LENGTH_UNITS[m.group(2)])),
+    (_L_PATTERN, lambda m: _number(float(m.group(1)))),
+)
+
+
+def parse_spec(spec: str) -> ParsedSpec:
+    """将规格型号解析为结构化字段
+
+    支持 DN100*80、Φ100、4寸、1-1/2"、4分、PN16、PN1.6、1.6MPa、16公斤、Class150、
+    100mm、1.5米、L=100（DN20*500mm 中带单位的一段也按长度），以及304/316L/Q235B等材质牌号。
+    Φ按数值归入通径（物料目录中DN后常写外径，如DN89、DN159），不做外径到公称通径的换算。
+    """
+    if not spec:
+        return ParsedSpec()
+    text = full_to_half(spec).lower()
+
+    pressure, text = _first(_PRESSURE_RULES, text)
+    material, text = _take(_MATERIAL_PATTERN, text, lambda m: m.group(1).upper())
+    inch, text = _first(_INCH_RULES, text)
+    length, text = _first(_LENGTH_RULES, text)
+
+    diameters = [inch] if inch else []
+    for match in _DIAMETER_PATTERN.finditer(text):
+        diameters.append(_number(float(match.group(1))))
+        diameters.extend(_number(float(v)) for v in _DIMENSION_SPLIT.split(match.group(2)) if v)
+
+    return ParsedSpec(tuple(diameters), pressure, material, length)
+
+
+@lru_cache(maxsize=65536)
+def spec_key(spec: str) -> Optional[str]:
+    """规格型号的结构化键，无法解析时返回None"""
+    return parse_spec(spec).key or None
@@ -0,0 +1,94 @@
+import re
+from typing import Iterable, List
+
+# 全角字符（U+FF01-U+FF5E）转半角，全角空格转普通空格
+_FULL_TO_HALF = {code: code - 0xFEE0 for code in range(0xFF01, 0xFF5F)}
+_FULL_TO_HALF[0x3000] = " "
+
+# 中文数字和中文句号
+_CN_NUMBERS = str.maketrans({
+    "一": "1", "二": "2", "三": "3", "四": "4", "五": "5",
+    "六": "6", "七": "7", "八": "8", "九": "9", "十": "10",
+    "零": "0", "。": "."
+})
+
+# 单位映射表，各写法之间没有重叠，一次替换与逐个替换结果相同
+_UNIT_MAP = {
+    "pcs": "个",
+    "PCS": "个",
+    "件": "个",
+    "SET": "套",
+    "set": "套",
+    "米": "m",
+    "M": "m"
+}
+
+_DN_PATTERN = re.compile(r"[Dd][Nn]?\s*(\d+)(?:\s*[×xX*]\s*(\d+))*")
+_UNIT_PATTERN = re.compile("|".join(re.escape(unit) for unit in _UNIT_MAP))
+_THOUSANDS_PATTERN = re.compile(r"(\d+)[,，](\d{3})")
+
+_STRIP_CHARS = ".,;:!?()[]{}\"'"
+
+
+def _replace_dn(match: re.Match) -> str:
+    return "DN" + "*".join(p for p in match.groups() if p)
+
+
+def _replace_unit(match: re.Match) -> str:
+    return _UNIT_MAP[match.group()]
+
+
+def full_to_half(text: str) -> str:
+    """将全角字符转换为半角字符"""
+    return text.translate(_FULL_TO_HALF)
+
+
+def normalize_dn_spec(text: str) -> str:
+    """规范化DN规格写法，如 dn 100x80 -> DN100*80"""
+    return _DN_PATTERN.sub(_replace_dn, text)
+
+
+def normalize_text(text: str) -> str:
+    """清理和规范化OCR文本
+
+    依次执行：合并空白、全角转半角、规范化DN规格、单位、中文数字和千位分隔符，
+    最后去掉首尾标点。
+    """
+    if not text:
+        return ""
+
+    text = full_to_half(" ".join(text.split()))
+    if "D" in text or "d" in text:
+        text = _DN_PATTERN.sub(_replace_dn, text)
+    text = _UNIT_PATTERN.sub(_replace_unit, text)
+    text = text.translate(_CN_NUMBERS)
+
+    # 去掉千位分隔符后可能形成新的匹配，重复替换直到不再变化
+    if "," in text or "，" in text:
+        count = 1
+        while count:
+            text, count = _THOUSANDS_PATTERN.subn(r"\1\2", text)
+
+    return text.strip(_STRIP_CHARS).strip()
+
+
+def normalize_many(texts: Iterable[str]) -> List[str]:
+    """批量规范化OCR文本"""
+    return [normalize_text(text) for text in texts]
+
+
+def match_key(text: str) -> str:
+    """生成用于物料名称比较的键
+
+    只做不改变词义的处理：合并空白、全角转半角、规范化DN规格并转小写。
+    不做单位替换，避免“管件”之类的名称被改写。
+    """
+    if not text:
+        return ""
+    text = full_to_half(" ".join(text.split()))
+    return _DN_PATTERN.sub(_replace_dn, text).lower()
+
+
+def match_keys(texts: Iterable[str]) -> List[str]:
+    """批量生成物料名称比较键"""
+    return [match_key(text) for text in texts]
@@ -0,0 +1,84 @@
+"""阿里云OCR客户端压测
+
+在进程内启动本地桩服务（aliyun_ocr_stub），用 AliyunOCRClient 并发发送请求，
+输出不同并发上限下的吞吐量、延迟分位数和重试次数。也可以用 --endpoint 指向
+单独运行的桩服务。
+"""
+import argparse
+import asyncio
+import glob
+import os
+import time
+import numpy as np
+from aiohttp import web
+from aliyun_ocr_stub import DEFAULT_RECORD_DIR, create_app
+from app.services.ocr.aliyun_client import AliyunOCRClient
+
+
+def load_images():
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    paths = sorted(glob.glob(os.path.join(base_dir, "pricinglist-data", "*.jpg")))
+    images = []
+    for path in paths:
+        with open(path, "rb") as f:
+            images.append(f.read())
+    return images or [os.urandom(512 * 1024)]
+
+
+async def run_load(endpoint, protocol, images, requests, concurrency):
+    client = AliyunOCRClient(endpoint=endpoint, protocol=protocol, access_key_id="stub",
+                             access_key_secret="stub", max_concurrency=concurrency,
+                             pool_size=concurrency, record_dir="")
+    latencies = []
+
+    async def one(i):
+        start = time.perf_counter()
+        try:
+            await client.recognize_table(images[i % len(images)])
+        except Exception:
+            return
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    await client.close()
+    return elapsed, np.array(latencies) * 1000, client.stats
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="阿里云OCR客户端压测")
+    parser.add_argument("--endpoint", default="", help="已运行的桩服务地址，如 127.0.0.1:8900")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    runner = None
+    endpoint = args.endpoint
+    if not endpoint:
+        app = create_app(DEFAULT_RECORD_DIR, args.latency, args.jitter, args.error_rate, seed=0)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        endpoint = f"127.0.0.1:{port}"
+
+    images = load_images()
+    print(f"endpoint={endpoint} images={len(images)} requests={args.requests}")
+    print(f"{'concurrency':>12}{'req/s':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'ok':>6}{'retries':>9}{'errors':>8}")
+    for concurrency in args.concurrency:
+        elapsed, latencies, stats = await run_load(endpoint, "http", images, args.requests, concurrency)
+        p50, p95 = np.percentile(latencies, [50, 95]) if len(latencies) else (0.0, 0.0)
+        print(f"{concurrency:>12}{len(latencies) / elapsed:>10.1f}{p50:>10.1f}{p95:>10.1f}"
+              f"{len(latencies):>6}{stats['retries']:>9}{stats['errors']:>8}")
+
+    if runner is not None:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
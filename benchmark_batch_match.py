@@ -0,0 +1,95 @@
+"""批量物料匹配性能测试
+
+用 material-list 中的物料表构建物料索引，为部分物料生成同义词组，构造 200 行
+询价表（精确名称、同义词、带OCR错误的名称和无关文本混合），比较逐行匹配与
+match_batch 一次匹配整张表的耗时。同义词组在内存中提供，不访问数据库；同义词字典与 SynonymService 一样只构建一次，
+其构建耗时单独列出。
+"""
+import asyncio
+import glob
+import os
+import random
+import time
+from collections import Counter
+from app.models.material import MaterialBase
+from app.services.matcher.catalog_index import MaterialCatalog
+from app.services.matcher.matcher import MaterialMatcher
+from app.services.matcher.synonym_service import SynonymLookup, generate_material_synonyms
+from app.utils.excel_parser import read_and_process_excel
+
+N_ROWS = 200
+N_SYNONYM_GROUPS = 5000
+
+
+class InMemorySynonyms:
+    """提供与SynonymService.load_lookup相同接口的内存同义词组，同样缓存构建好的字典"""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.lookup = None
+
+    async def load_lookup(self, category=None):
+        if self.lookup is None:
+            self.lookup = SynonymLookup(self.docs, 0.8)
+        return self.lookup
+
+
+def build_rows(catalog: MaterialCatalog, synonym_docs, rng):
+    rows = []
+    for _ in range(N_ROWS):
+        kind = rng.random()
+        slot = rng.randrange(len(catalog))
+        name, spec = catalog.names[slot], catalog.specs[slot]
+        if kind < 0.4:
+            rows.append((name, spec))
+        elif kind < 0.6:
+            doc = rng.choice(synonym_docs)
+            rows.append((rng.choice(doc["synonyms"]), ""))
+        elif kind < 0.9 and len(name) > 3:
+            i = rng.randrange(len(name))
+            rows.append((name[:i] + name[i + 1:] + rng.choice(["", "子", "件"]), spec))
+        else:
+            rows.append((rng.choice(["辅材", "人工费", "运输费", "其他"]) + str(rng.randrange(100)), ""))
+    return rows
+
+
+async def main():
+    rng = random.Random(0)
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    path = sorted(glob.glob(os.path.join(base_dir, "material-list", "*.xlsx")))[-1]
+    catalog = MaterialCatalog()
+    catalog.build(read_and_process_excel(path).to_dict("records"))
+
+    synonym_docs = []
+    for slot in rng.sample(range(len(catalog)), N_SYNONYM_GROUPS):
+        material: MaterialBase = catalog.material(slot)
+        synonyms = [s for s in generate_material_synonyms(material) if s != material.material_name]
+        if synonyms:
+            synonym_docs.append({"standard_name": material.material_name, "synonyms": synonyms,
+                                 "material_code": material.material_code})
+
+    matcher = MaterialMatcher(catalog)
+    matcher.synonym_service = InMemorySynonyms(synonym_docs)
+    rows = build_rows(catalog, synonym_docs, rng)
+    print(f"物料 {len(catalog)} 条, 同义词组 {len(synonym_docs)} 个, 询价表 {len(rows)} 行")
+
+    start = time.perf_counter()
+    await matcher.match_batch(rows[:1])  # 预热，构建同义词字典
+    print(f"同义词字典构建(缓存未命中时): {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    start = time.perf_counter()
+    sequential = [(await matcher.match_batch([row]))[0] for row in rows]
+    sequential_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    batch = await matcher.match_batch(rows)
+    batch_ms = (time.perf_counter() - start) * 1000
+
+    assert [m.matched_code for m in batch] == [m.matched_code for m in sequential]
+    print(f"逐行匹配: {sequential_ms:.0f} ms")
+    print(f"批量匹配: {batch_ms:.0f} ms ({sequential_ms / batch_ms:.1f}x)")
+    print(f"匹配类型: {dict(Counter(m.match_type for m in batch))}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
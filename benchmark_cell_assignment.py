@@ -0,0 +1,106 @@
+"""单元格分配性能测试
+
+对 pricinglist-data 中的每张图片，按图片尺寸构造 60行 x 10列 的表格网格，
+并在每个单元格内生成文本框（部分文本框跨越分隔线），比较逐单元格循环与
+向量化分配的耗时，同时校验两者结果一致。
+
+安装了PaddleOCR时会额外使用真实识别出的文本框进行测试。
+"""
+import glob
+import os
+import time
+import cv2
+import numpy as np
+from app.services.ocr.layout import assign_boxes_to_cells, box_bounds
+
+N_ROWS = 60
+N_COLS = 10
+REPEAT = 5
+
+
+def assign_loop(bounds, rows, cols):
+    """原实现：逐个文本框遍历所有单元格"""
+    result = []
+    for min_x, min_y, max_x, max_y in bounds:
+        row = col = -1
+        max_overlap = 0
+        for i in range(len(rows) - 1):
+            for j in range(len(cols) - 1):
+                x1 = max(min_x, cols[j])
+                y1 = max(min_y, rows[i])
+                x2 = min(max_x, cols[j + 1])
+                y2 = min(max_y, rows[i + 1])
+                overlap = (x2 - x1) * (y2 - y1) if x1 < x2 and y1 < y2 else 0
+                if overlap > max_overlap:
+                    max_overlap = overlap
+                    row, col = i, j
+        result.append((row, col))
+    return result
+
+
+def synthetic_boxes(height, width, rng):
+    """按网格生成文本框，约10%的文本框跨越单元格边界"""
+    rows = np.linspace(0, height, N_ROWS + 1).round().astype(int).tolist()
+    cols = np.linspace(0, width, N_COLS + 1).round().astype(int).tolist()
+    bounds = []
+    for i in range(N_ROWS):
+        for j in range(N_COLS):
+            cw = cols[j + 1] - cols[j]
+            ch = rows[i + 1] - rows[i]
+            x = cols[j] + rng.uniform(0, cw * 0.3)
+            y = rows[i] + rng.uniform(0, ch * 0.3)
+            w = cw * rng.uniform(0.3, 0.7)
+            h = ch * rng.uniform(0.3, 0.7)
+            if rng.random() < 0.1:
+                w += cw * 0.6
+                h += ch * 0.5
+            bounds.append([x, y, x + w, y + h])
+    return rows, cols, bounds
+
+
+def paddle_boxes(image):
+    """使用PaddleOCR检测真实文本框（未安装时返回None）"""
+    try:
+        from paddleocr import PaddleOCR
+    except ImportError:
+        return None
+    if not hasattr(paddle_boxes, "engine"):
+        paddle_boxes.engine = PaddleOCR(lang="ch", show_log=False)
+    result = paddle_boxes.engine.ocr(image, cls=False)
+    if not result or result[0] is None:
+        return []
+    return [box_bounds(item[0]) for item in result[0]]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result = func(*args)
+    return result, (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main():
+    rng = np.random.default_rng(0)
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    images = sorted(glob.glob(os.path.join(base_dir, "pricinglist-data", "*.jpg")))
+
+    print(f"{'image':<20}{'boxes':>8}{'loop(ms)':>12}{'numpy(ms)':>12}{'speedup':>10}")
+    for path in images:
+        image = cv2.imread(path)
+        height, width = image.shape[:2]
+        rows, cols, bounds = synthetic_boxes(height, width, rng)
+        real = paddle_boxes(image)
+        if real:
+            bounds = bounds + real
+
+        expected, loop_ms = timed(assign_loop, bounds, rows, cols)
+        (row_idx, col_idx), numpy_ms = timed(assign_boxes_to_cells, bounds, rows, cols)
+        actual = list(zip(row_idx.tolist(), col_idx.tolist()))
+        assert actual == expected, f"assignment mismatch on {path}"
+
+        print(f"{os.path.basename(path):<20}{len(bounds):>8}{loop_ms:>12.2f}"
+              f"{numpy_ms:>12.2f}{loop_ms / numpy_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
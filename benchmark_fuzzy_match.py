@@ -0,0 +1,97 @@
+"""物料模糊匹配性能测试
+
+用 material-list 中的物料名称构造 1万 / 10万 条的物料目录，比较：
+- loop: 原实现，逐条遍历物料并对每个名称重新规范化后打分
+- extractOne: 预先规范化名称，process.extractOne 单条查询
+- cdist: 预先规范化名称，process.cdist 一次计算整批查询
+同时校验三种方式的匹配结果一致。
+"""
+import glob
+import os
+import random
+import time
+from rapidfuzz import fuzz
+from app.services.matcher.fuzzy import best_match, best_matches
+from app.utils.excel_parser import read_and_process_excel
+from app.utils.text_normalizer import match_key, match_keys
+
+SIZES = [10_000, 100_000]
+N_QUERIES = 200
+N_LOOP_QUERIES = 10  # 原实现较慢，只测部分查询
+SUFFIXES = ["", "(碳钢)", "(不锈钢)", "DN50", "DN100", "加厚", "国标"]
+
+
+def load_names():
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    path = sorted(glob.glob(os.path.join(base_dir, "material-list", "*.xlsx")))[-1]
+    df = read_and_process_excel(path)
+    return [str(name) for name in df["material_name"].tolist() if str(name).strip()]
+
+
+def build_catalog(names, size, rng):
+    catalog = list(names[:size])
+    while len(catalog) < size:
+        catalog.append(rng.choice(names) + rng.choice(SUFFIXES))
+    return catalog
+
+
+def make_queries(catalog, rng):
+    """从目录中抽样名称并加入OCR常见错误：删字、加字、全角字符"""
+    queries = []
+    for name in rng.sample(catalog, N_QUERIES):
+        if len(name) > 3 and rng.random() < 0.5:
+            i = rng.randrange(len(name))
+            name = name[:i] + name[i + 1:]
+        if rng.random() < 0.3:
+            name += rng.choice(["子", "件", "ＤＮ８０"])
+        queries.append(name)
+    return queries
+
+
+def loop_match(text, catalog):
+    """原实现（去掉数据库游标后的逐条打分）"""
+    best, highest = None, 0
+    query = match_key(text)
+    for i, name in enumerate(catalog):
+        ratio = fuzz.ratio(query, match_key(name))
+        if ratio > highest and ratio >= 60:
+            best, highest = (i, ratio), ratio
+    return best
+
+
+def main():
+    rng = random.Random(0)
+    names = load_names()
+    print(f"{'size':>8}{'loop(ms/q)':>12}{'extractOne(ms/q)':>18}{'cdist(ms/q)':>13}"
+          f"{'vs loop':>10}{'matched':>9}")
+    for size in SIZES:
+        catalog = build_catalog(names, size, rng)
+        queries = make_queries(catalog, rng)
+
+        start = time.perf_counter()
+        keys = match_keys(catalog)
+        index_ms = (time.perf_counter() - start) * 1000
+        query_keys = match_keys(queries)
+
+        start = time.perf_counter()
+        expected = [loop_match(q, catalog) for q in queries[:N_LOOP_QUERIES]]
+        loop_ms = (time.perf_counter() - start) * 1000 / N_LOOP_QUERIES
+
+        start = time.perf_counter()
+        single = [best_match(q, keys) for q in query_keys]
+        single_ms = (time.perf_counter() - start) * 1000 / N_QUERIES
+
+        start = time.perf_counter()
+        batch = best_matches(query_keys, keys)
+        batch_ms = (time.perf_counter() - start) * 1000 / N_QUERIES
+
+        assert single[:N_LOOP_QUERIES] == expected, "extractOne differs from loop"
+        assert batch == single, "cdist differs from extractOne"
+        matched = sum(1 for m in batch if m)
+        print(f"{size:>8}{loop_ms:>12.2f}{single_ms:>18.3f}{batch_ms:>13.3f}"
+              f"{loop_ms / batch_ms:>9.0f}x{matched:>9}")
+        print(f"{'':>8}(预先规范化 {size} 个名称: {index_ms:.0f} ms，只在加载索引时执行一次)")
+
+
+if __name__ == "__main__":
+    main()
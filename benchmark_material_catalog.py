@@ -0,0 +1,51 @@
+"""物料目录索引测试
+
+用 material-list 中的物料表构建进程内索引，输出构建耗时、内存占用，以及
+按编码、名称、规格查找的单次耗时。
+"""
+import glob
+import os
+import time
+from app.services.matcher.catalog_index import MaterialCatalog
+from app.utils.excel_parser import read_and_process_excel
+
+LOOKUPS = 10000
+
+
+def timed_us(func, keys):
+    start = time.perf_counter()
+    for key in keys:
+        func(key)
+    return (time.perf_counter() - start) / len(keys) * 1e6
+
+
+def main():
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    path = sorted(glob.glob(os.path.join(base_dir, "material-list", "*.xlsx")))[-1]
+    df = read_and_process_excel(path)
+    docs = df.to_dict("records")
+    print(f"物料表: {os.path.basename(path)} ({os.path.getsize(path) / 1024 / 1024:.2f} MB), {len(docs)}条")
+
+    catalog = MaterialCatalog()
+    start = time.perf_counter()
+    catalog.build(docs)
+    print(f"构建索引: {(time.perf_counter() - start) * 1000:.1f} ms, {len(catalog)}个编码")
+
+    usage = catalog.memory_usage()
+    print(f"内存占用: {usage['total_bytes'] / 1024 / 1024:.2f} MB "
+          f"(列 {usage['columns_bytes'] / 1024 / 1024:.2f} MB, 哈希表 {usage['maps_bytes'] / 1024 / 1024:.2f} MB), "
+          f"{usage['bytes_per_entry']} 字节/条")
+    for name, size in usage.items():
+        if name.endswith("_bytes") and name not in ("columns_bytes", "maps_bytes", "total_bytes"):
+            print(f"  {name[:-6]:<12}{size / 1024:>10.1f} KB")
+
+    codes = (catalog.codes * (LOOKUPS // len(catalog.codes) + 1))[:LOOKUPS]
+    names = (catalog.names * (LOOKUPS // len(catalog.names) + 1))[:LOOKUPS]
+    pairs = [(name[:2], spec) for name, spec in zip(names, (catalog.specs * 2)[:LOOKUPS])]
+    print(f"按编码查找: {timed_us(catalog.get, codes):.2f} us")
+    print(f"按名称查找: {timed_us(catalog.find_by_name, names):.2f} us")
+    print(f"按规格查找: {timed_us(lambda p: catalog.find_by_spec(*p), pairs):.2f} us")
+
+
+if __name__ == "__main__":
+    main()
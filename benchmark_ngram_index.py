@@ -0,0 +1,72 @@
+"""n-gram候选生成性能测试
+
+用 material-list 中的物料名称构造 1万 / 10万 / 100万 条的物料目录，比较：
+- full: process.extractOne 对整个目录打分
+- ngram: 先由n-gram倒排索引取候选，只对候选打分
+同时统计索引构建、快照保存/加载耗时、内存，以及ngram结果与全量打分的一致率
+（得分相同即视为一致）。
+"""
+import os
+import random
+import tempfile
+import time
+import numpy as np
+from benchmark_fuzzy_match import build_catalog, load_names, make_queries
+from app.core.config import settings
+from app.services.matcher.fuzzy import best_match, best_match_among
+from app.services.matcher.ngram_index import NgramIndex
+from app.utils.text_normalizer import match_keys
+
+SIZES = [10_000, 100_000, 1_000_000]
+N_FULL_QUERIES = 50  # 全量打分在大目录上较慢，只测部分查询
+
+
+def timed(fn, queries):
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(fn(query))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return results, np.percentile(latencies, 50), np.percentile(latencies, 95)
+
+
+def main():
+    rng = random.Random(0)
+    names = load_names()
+    limit = settings.MATERIAL_NGRAM_CANDIDATES
+    print(f"{'size':>9}{'build(s)':>10}{'save(s)':>9}{'load(s)':>9}{'MB':>8}"
+          f"{'full p50':>10}{'ngram p50':>11}{'ngram p95':>11}{'agree':>8}")
+    for size in SIZES:
+        keys = match_keys(build_catalog(names, size, rng))
+        queries = match_keys(make_queries(keys, rng))
+
+        index = NgramIndex(settings.MATERIAL_NGRAM_MAX_POSTING)
+        start = time.perf_counter()
+        index.build(enumerate(keys))
+        build_s = time.perf_counter() - start
+
+        codes = [str(i) for i in range(size)]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ngram.npz")
+            start = time.perf_counter()
+            index.save(path, codes)
+            save_s = time.perf_counter() - start
+            start = time.perf_counter()
+            changed = NgramIndex(settings.MATERIAL_NGRAM_MAX_POSTING).load(
+                path, {code: i for i, code in enumerate(codes)}, keys)
+            load_s = time.perf_counter() - start
+            assert changed == 0
+
+        full, full_p50, _ = timed(lambda q: best_match(q, keys), queries[:N_FULL_QUERIES])
+        ngram, ngram_p50, ngram_p95 = timed(
+            lambda q: best_match_among(q, keys, index.candidates(q, limit)), queries)
+        agree = sum(
+            (a is None and b is None) or (a is not None and b is not None and a[1] == b[1])
+            for a, b in zip(full, ngram)
+        ) / len(full)
+        print(f"{size:>9}{build_s:>10.1f}{save_s:>9.1f}{load_s:>9.1f}{index.memory_usage() / 2 ** 20:>8.0f}"
+              f"{full_p50:>10.2f}{ngram_p50:>11.2f}{ngram_p95:>11.2f}{agree:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""表格线检测性能测试
+
+对 pricinglist-data 中的每张图片，分别用霍夫变换 (detect_table_structure +
+analyze_table_cells，输入为预处理后的图像) 和形态学投影 (detect_grid_morphology，
+输入为原图) 检测表格网格，与识别流程中 _detect_grid 的调用方式一致，
+比较耗时和检测到的行列数。
+
+长表格稳定性：将每张图片纵向拼接 STACK 次，理想情况下行数应约为单张的 STACK 倍，
+列数保持不变。
+"""
+import glob
+import os
+import time
+import numpy as np
+from app.core.config import settings
+from app.services.ocr.ocr_service import OCRService
+from app.services.ocr.preprocess import preprocess
+
+REPEAT = 5
+STACK = 6
+
+
+def detect_hough(service, images):
+    processed = images[1]
+    height, width = processed.shape[:2]
+    h_lines, v_lines = service.detect_table_structure(processed)
+    return service.analyze_table_cells(h_lines, v_lines, height, width)
+
+
+def detect_morphology(service, images):
+    return service.detect_grid_morphology(images[0])
+
+
+def measure(detector, service, images):
+    """images为 (原图, 预处理后图像)，返回 (平均耗时ms, 行数, 列数)"""
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        rows, cols = detector(service, images)
+    elapsed = (time.perf_counter() - start) / REPEAT * 1000
+    return elapsed, len(rows) - 1, len(cols) - 1
+
+
+def main():
+    import cv2
+
+    service = OCRService(connect_db=False)
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pricinglist-data")
+    paths = sorted(glob.glob(os.path.join(data_dir, "*.jpg")))
+
+    print(f"预处理: {settings.OCR_PREPROCESS_PROFILE}, 每项重复 {REPEAT} 次, 长表格拼接 {STACK} 张")
+    print(f"{'图片':<20}{'尺寸':>12}{'霍夫ms':>10}{'形态学ms':>10}{'霍夫行x列':>12}{'形态学行x列':>14}"
+          f"{'长表霍夫':>12}{'长表形态学':>12}")
+
+    totals = {"hough": 0.0, "morphology": 0.0}
+    for path in paths:
+        image = cv2.imread(path)
+        if image is None:
+            continue
+        single = (image, preprocess(image))
+        tall = (np.vstack([image] * STACK), preprocess(np.vstack([image] * STACK)))
+
+        h_ms, h_rows, h_cols = measure(detect_hough, service, single)
+        m_ms, m_rows, m_cols = measure(detect_morphology, service, single)
+        _, th_rows, th_cols = measure(detect_hough, service, tall)
+        _, tm_rows, tm_cols = measure(detect_morphology, service, tall)
+        totals["hough"] += h_ms
+        totals["morphology"] += m_ms
+
+        size = f"{image.shape[1]}x{image.shape[0]}"
+        print(f"{os.path.basename(path):<20}{size:>12}{h_ms:>10.1f}{m_ms:>10.1f}"
+              f"{f'{h_rows}x{h_cols}':>12}{f'{m_rows}x{m_cols}':>14}"
+              f"{f'{th_rows}x{th_cols}':>12}{f'{tm_rows}x{tm_cols}':>12}")
+
+    if totals["morphology"] > 0:
+        print(f"\n总耗时: 霍夫 {totals['hough']:.1f}ms, 形态学 {totals['morphology']:.1f}ms, "
+              f"加速 {totals['hough'] / totals['morphology']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
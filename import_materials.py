@@ -1,5 +1,6 @@
 from app.utils.excel_parser import read_and_process_excel
 from app.core.database import Database, COLLECTIONS
+from app.services.matcher.material_service import MaterialService
 import asyncio
 
 async def import_materials():
@@ -16,6 +17,7 @@ async def import_materials():
     
     # 批量更新数据
     for material in materials:
+        MaterialService.stamp_for_upsert(material)
         try:
             await collection.update_one(
                 {"material_code": material["material_code"]},
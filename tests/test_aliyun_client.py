@@ -0,0 +1,141 @@
+import asyncio
+import json
+import os
+
+import pytest
+from aiohttp import web
+
+from app.services.ocr.aliyun_client import AliyunOCRClient, AliyunOCRError, sign_request
+from app.services.ocr.aliyun_ocr_service import AliyunOCRService
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "test_data", "aliyun", "sample_table.json")
+
+
+def _load_fixture():
+    with open(FIXTURE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+async def _serve(handler):
+    app = web.Application()
+    app.router.add_post("/", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"127.0.0.1:{port}"
+
+
+def _client(endpoint, **kwargs):
+    kwargs.setdefault("max_retries", 3)
+    return AliyunOCRClient(endpoint=endpoint, protocol="http", access_key_id="id",
+                           access_key_secret="secret", record_dir="", **kwargs)
+
+
+def test_sign_request_is_deterministic():
+    headers = {"x-acs-action": "RecognizeTableOcr", "x-acs-date": "2024-01-01T00:00:00Z",
+               "x-acs-signature-nonce": "nonce", "content-type": "application/octet-stream"}
+    first = sign_request("POST", "ocr.example.com", {"NeedRotate": "false"}, headers, b"img", "id", "secret")
+    second = sign_request("POST", "ocr.example.com", {"NeedRotate": "false"}, headers, b"img", "id", "secret")
+    other = sign_request("POST", "ocr.example.com", {"NeedRotate": "false"}, headers, b"img2", "id", "secret")
+
+    assert first["authorization"] == second["authorization"]
+    assert first["authorization"] != other["authorization"]
+    assert first["authorization"].startswith("ACS3-HMAC-SHA256 Credential=id,")
+    assert "SignedHeaders=content-type;host;x-acs-action" in first["authorization"]
+
+
+def test_retries_unavailable_then_parses_data(monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.ALIYUN_OCR_BACKOFF_BASE", 0.0)
+    record = _load_fixture()
+    calls = []
+
+    async def handler(request):
+        calls.append(await request.read())
+        if len(calls) < 3:
+            return web.json_response({"Code": "ServiceUnavailable", "Message": "busy"}, status=503)
+        return web.json_response(record)
+
+    async def run():
+        runner, endpoint = await _serve(handler)
+        client = _client(endpoint)
+        try:
+            return await client.recognize_table(b"image-bytes"), client.stats
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    data, stats = asyncio.run(run())
+    assert calls == [b"image-bytes"] * 3
+    assert stats == {"requests": 3, "retries": 2, "errors": 0}
+    assert data["tables"][0]["cells"][1][1]["text"] == "镀锌钢管"
+
+
+def test_client_error_is_not_retried():
+    calls = []
+
+    async def handler(request):
+        calls.append(1)
+        return web.json_response({"Code": "InvalidImage.Content", "Message": "bad"}, status=400)
+
+    async def run():
+        runner, endpoint = await _serve(handler)
+        client = _client(endpoint)
+        try:
+            with pytest.raises(AliyunOCRError) as info:
+                await client.recognize_table(b"x")
+            return info.value
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    error = asyncio.run(run())
+    assert len(calls) == 1
+    assert error.code == "InvalidImage.Content" and not error.retryable
+
+
+def test_concurrency_is_bounded():
+    record = _load_fixture()
+    state = {"in_flight": 0, "max": 0}
+
+    async def handler(request):
+        state["in_flight"] += 1
+        state["max"] = max(state["max"], state["in_flight"])
+        await asyncio.sleep(0.02)
+        state["in_flight"] -= 1
+        return web.json_response(record)
+
+    async def run():
+        runner, endpoint = await _serve(handler)
+        client = _client(endpoint, max_concurrency=3, pool_size=10)
+        try:
+            await asyncio.gather(*(client.recognize_table(b"img") for _ in range(12)))
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    asyncio.run(run())
+    assert state["max"] == 3
+
+
+def test_service_builds_cells_from_response(tmp_path):
+    record = _load_fixture()
+    image_path = tmp_path / "table.jpg"
+    image_path.write_bytes(b"image")
+
+    async def handler(request):
+        return web.json_response(record)
+
+    async def run():
+        runner, endpoint = await _serve(handler)
+        client = _client(endpoint)
+        try:
+            return await AliyunOCRService(client).recognize_table(str(image_path))
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    result = asyncio.run(run())
+    assert result.headers == ["序号", "物料名称", "规格型号", "数量", "单位"]
+    assert len(result.cells) == 20
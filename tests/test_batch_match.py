@@ -0,0 +1,64 @@
+import asyncio
+import json
+import os
+import threading
+
+from app.services.matcher.catalog_index import MaterialCatalog
+from app.services.matcher.matcher import MaterialMatcher
+from app.services.matcher.synonym_service import SynonymLookup
+
+MATERIALS = os.path.join(os.path.dirname(__file__), "test_data", "materials.json")
+
+SYNONYMS = [
+    {"standard_name": "卡箍", "synonyms": ["管夹", "管箍", "卡子"], "material_code": "P001"},
+    {"standard_name": "沟槽大小头", "synonyms": ["沟槽异径管"], "material_code": "P002"},
+]
+
+
+class _RecordingLookup(SynonymLookup):
+    """记录find_many在哪个线程执行"""
+
+    def find_many(self, texts):
+        self.thread = threading.get_ident()
+        return super().find_many(texts)
+
+
+class _SynonymService:
+    def __init__(self):
+        self.loads = 0
+        self.lookup = _RecordingLookup(SYNONYMS, 0.8)
+
+    async def load_lookup(self, category=None):
+        self.loads += 1
+        return self.lookup
+
+
+def _matcher():
+    with open(MATERIALS, encoding="utf-8") as f:
+        docs = json.load(f)
+    catalog = MaterialCatalog()
+    catalog.build(docs)
+    matcher = MaterialMatcher(catalog)
+    matcher.synonym_service = _SynonymService()
+    return matcher
+
+
+def test_synonym_lookup_exact_then_fuzzy():
+    lookup = SynonymLookup(SYNONYMS, 0.8)
+    assert lookup.find_many(["管夹", "沟槽异径管", "沟槽异径管件", "", "螺栓"]) == ["P001", "P002", "P002", None, None]
+
+
+def test_match_batch_runs_each_stage_once():
+    matcher = _matcher()
+    items = [("卡箍", "DN100"), ("管夹", ""), ("大小头", "DN100*80"), ("卡箍", "DN100"),
+             ("沟槽90度弯头", ""), ("完全无关", "")]
+
+    matches = asyncio.run(matcher.match_batch(items))
+
+    assert [m.match_type for m in matches] == ["exact", "synonym", "specification", "exact", "fuzzy", "none"]
+    assert [m.matched_code for m in matches[:4]] == ["P001", "P001", "P002", "P001"]
+    assert matches[4].matched_code == "P003" and 0.6 <= matches[4].confidence < 1.0
+    assert matches[5].material_info is None
+    assert matcher.synonym_service.loads == 1
+    # 同义词模糊匹配不在事件循环线程中执行
+    assert matcher.synonym_service.lookup.thread != threading.get_ident()
@@ -0,0 +1,230 @@
+import asyncio
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+from app.services.matcher.catalog_index import MaterialCatalog
+from app.services.matcher.material_service import MaterialService
+
+MATERIALS = os.path.join(os.path.dirname(__file__), "test_data", "materials.json")
+T0 = datetime(2024, 12, 7, 8, 0, 0)
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self._docs = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _Collection:
+    """只支持索引刷新用到的查询：全量、updated_at $gte/$exists 和 material_code $in"""
+
+    def __init__(self, docs):
+        self.docs = {doc["material_code"]: dict(doc) for doc in docs}
+        self.queries = []
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        condition = query.get("updated_at", {})
+        docs = list(self.docs.values())
+        if "$gte" in condition:
+            docs = [d for d in docs if d.get("updated_at") and d["updated_at"] >= condition["$gte"]]
+        elif "$exists" in condition:
+            docs = [d for d in docs if "updated_at" in d]
+        if "material_code" in query:
+            docs = [d for d in docs if d["material_code"] in query["material_code"]["$in"]]
+        return _Cursor(docs)
+
+
+def _materials():
+    with open(MATERIALS, encoding="utf-8") as f:
+        docs = json.load(f)
+    for i, doc in enumerate(docs):
+        doc["updated_at"] = T0 + timedelta(seconds=i)
+    return docs
+
+
+def test_exact_spec_and_code_lookups():
+    catalog = MaterialCatalog()
+    catalog.build(_materials())
+
+    assert catalog.find_by_name("卡箍").material_code == "P001"
+    assert catalog.get("P002").specification == "DN100*80"
+    assert catalog.find_by_spec("大小头", "DN100*80").material_code == "P002"
+    assert catalog.find_by_spec("大小头", "DN150") is None
+    assert catalog.find_by_name("不存在") is None
+    # 名称中的正则元字符按普通字符处理
+    assert catalog.find_by_spec("(", "DN100") is None
+
+
+def test_flat_import_fields_are_normalized():
+    catalog = MaterialCatalog()
+    catalog.build([{
+        "material_code": "A0107001", "material_name": "首联湿式报警阀", "specification": "DN100",
+        "unit": "台", "category_level1": "消防系统", "category_level2": "报警设备",
+        "attr_price": 329.9, "status": True
+    }])
+    material = catalog.get("A0107001")
+    assert material.category == {"level1": "消防系统", "level2": "报警设备"}
+    assert material.attributes == {"price": "329.9"}
+
+
+def test_incremental_refresh_applies_updates_and_reloads_on_delete(monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.MATERIAL_INDEX_REFRESH_OVERLAP_SECONDS", 300)
+    collection = _Collection(_materials())
+    catalog = MaterialCatalog()
+
+    async def run():
+        await catalog.ensure_loaded(collection)
+        assert await catalog.refresh(collection) == 0
+
+        renamed = dict(collection.docs["P001"], material_name="沟槽卡箍", updated_at=T0 + timedelta(hours=1))
+        collection.docs["P001"] = renamed
+        collection.docs["N001"] = {"material_code": "N001", "material_name": "闸阀", "specification": "DN50",
+                                   "unit": "个", "updated_at": T0 + timedelta(hours=1)}
+        assert await catalog.refresh(collection) == 2
+        # 水位回退重叠区间，重叠区间内已加载的物料不计入变化条数
+        watermark = T0 + timedelta(seconds=len(_materials()) - 1)
+        assert collection.queries[-1] == {"updated_at": {"$gte": watermark - timedelta(seconds=300)}}
+
+        del collection.docs["P002"]
+        await catalog.refresh(collection, reconcile=True)
+
+    asyncio.run(run())
+    assert catalog.find_by_name("卡箍") is None
+    assert catalog.find_by_name("沟槽卡箍").material_code == "P001"
+    assert catalog.get("N001").material_name == "闸阀"
+    assert catalog.get("P002") is None
+    assert len(catalog) == len(collection.docs)
+
+
+def test_refresh_reloads_when_a_delete_and_an_insert_keep_the_count():
+    collection = _Collection(_materials())
+    catalog = MaterialCatalog()
+
+    async def run():
+        await catalog.ensure_loaded(collection)
+        del collection.docs["P002"]
+        collection.docs["N001"] = {"material_code": "N001", "material_name": "闸阀",
+                                   "updated_at": T0 + timedelta(hours=1)}
+        await catalog.refresh(collection, reconcile=True)
+
+    asyncio.run(run())
+    assert catalog.get("P002") is None
+    assert catalog.find_by_spec("大小头", "DN100*80") is None
+    assert catalog.get("N001").material_name == "闸阀"
+    assert len(catalog) == len(collection.docs)
+
+
+def test_refresh_picks_up_late_and_untimestamped_writes(monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.MATERIAL_INDEX_REFRESH_OVERLAP_SECONDS", 60)
+    collection = _Collection(_materials())
+    catalog = MaterialCatalog()
+
+    async def run():
+        await catalog.ensure_loaded(collection)
+        # 其他进程的写入晚于刷新落库，updated_at早于当前水位
+        collection.docs["L001"] = {"material_code": "L001", "material_name": "蝶阀", "updated_at": T0}
+        collection.docs["L002"] = {"material_code": "L002", "material_name": "止回阀"}
+        assert await catalog.refresh(collection, reconcile=True) == 2
+        assert await catalog.refresh(collection, reconcile=True) == 0
+
+    asyncio.run(run())
+    assert catalog.get("L001").material_name == "蝶阀"
+    assert catalog.get("L002").material_name == "止回阀"
+
+
+def test_refresh_reconciles_codes_only_after_the_interval(monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.MATERIAL_INDEX_RECONCILE_SECONDS", 3600)
+    collection = _Collection(_materials())
+    catalog = MaterialCatalog()
+
+    async def run():
+        await catalog.ensure_loaded(collection)
+        del collection.docs["P002"]
+        collection.queries.clear()
+        # 间隔内只按updated_at增量查询，不读取全部编码
+        await catalog.refresh(collection)
+        assert [list(query) for query in collection.queries] == [["updated_at"]]
+        assert catalog.get("P002") is not None
+
+        monkeypatch.setattr("app.core.config.settings.MATERIAL_INDEX_RECONCILE_SECONDS", 0)
+        await catalog.refresh(collection)
+        assert collection.queries[1] == {}
+
+    asyncio.run(run())
+    assert catalog.get("P002") is None
+    assert catalog.reconciled_at is not None
+
+
+def test_stamped_imports_are_picked_up_by_incremental_refresh():
+    collection = _Collection(_materials())
+    catalog = MaterialCatalog()
+
+    async def run():
+        await catalog.ensure_loaded(collection)
+        material = MaterialService.stamp_for_upsert(
+            {"material_code": "N001", "material_name": "闸阀", "specification": "dn50"})
+        collection.docs["N001"] = material
+        assert await catalog.refresh(collection, reconcile=False) == 1
+        return material
+
+    material = asyncio.run(run())
+    assert material["spec_key"] == "DN50"
+    assert catalog.find_by_spec("闸阀", "DN50").material_code == "N001"
+
+
+def test_full_load_builds_off_the_event_loop(monkeypatch):
+    collection = _Collection(_materials())
+    catalog = MaterialCatalog()
+    threads = []
+    build = MaterialCatalog.build
+
+    def recording_build(self, docs):
+        threads.append(threading.get_ident())
+        build(self, docs)
+
+    monkeypatch.setattr(MaterialCatalog, "build", recording_build)
+    asyncio.run(catalog.load(collection))
+
+    assert threads and threads[0] != threading.get_ident()
+    assert catalog.loaded and len(catalog) == len(_materials())
+    assert catalog.find_by_name("卡箍").material_code == "P001"
+
+
+def test_memory_usage_reports_all_parts():
+    catalog = MaterialCatalog()
+    catalog.build(_materials())
+    usage = catalog.memory_usage()
+    assert usage["entries"] == len(_materials())
+    assert usage["total_bytes"] == usage["columns_bytes"] + usage["maps_bytes"]
+    assert usage["names_bytes"] > 0
+
+
+def test_spec_lookup_uses_structured_key():
+    catalog = MaterialCatalog()
+    catalog.build(_materials() + [
+        {"material_code": "P101", "material_name": "沟槽大小头(加厚)", "specification": "DN100×80"},
+        {"material_code": "P102", "material_name": "包装盒", "specification": "160个/件"},
+    ])
+
+    assert catalog.by_spec_key["DN100*80"] == [1, len(catalog) - 2]
+    # 写法不同的规格归入同一个键，同一规格下取名称最相近的物料
+    assert catalog.find_by_spec("沟槽大小头", "dn100x80").material_code == "P002"
+    assert catalog.find_by_spec("沟槽大小头加厚", "DN100X80").material_code == "P101"
+    # 无法解析的规格按原文查找
+    assert catalog.find_by_spec("包装盒", "160个/件").material_code == "P102"
+    assert catalog.find_by_spec("包装盒", "160个/箱") is None
+
+    catalog.upsert({"material_code": "P101", "material_name": "沟槽大小头(加厚)", "specification": "DN150*100"})
+    assert catalog.by_spec_key["DN100*80"] == [1]
+    assert catalog.find_by_spec("大小头", "DN150*100").material_code == "P101"
@@ -0,0 +1,62 @@
+from app.models.ocr import TableCell
+from app.services.ocr.column_mapping import build_rows, map_header_texts, resolve_columns
+
+
+def _cells(rows, start_row=0):
+    return [
+        TableCell(row=start_row + r, column=c, text=text, confidence=0.9)
+        for r, values in enumerate(rows)
+        for c, text in enumerate(values)
+        if text
+    ]
+
+
+def test_resolve_columns_skips_title_and_maps_rows():
+    cells = _cells([
+        ["产品清单明细表", "", "", "", "", ""],
+        ["序号", "货物(劳务)名称", "口径", "单位", "数量", "连接方式"],
+        ["1", "卡箍", "DN100", "个", "100", "钢卡"],
+        ["2", "沟槽大小头", "DN100*80", "个", "14", ""],
+        ["", "", "", "", "合计", ""],
+    ])
+    roles, header_end = resolve_columns(cells)
+    assert roles == {"material_name": 1, "specification": 2, "unit": 3, "quantity": 4, "connection": 5}
+    assert header_end == 1
+
+    rows = build_rows(cells, roles, header_end)
+    assert [row.row_index for row in rows] == [2, 3]
+    assert rows[0].material_name == "卡箍" and rows[0].specification == "DN100"
+    assert rows[0].quantity == 100 and rows[0].unit == "个" and rows[0].connection == "钢卡"
+    assert rows[1].quantity == 14 and rows[1].connection == ""
+
+
+def test_resolve_columns_with_two_level_header_and_merged_cells():
+    cells = [
+        TableCell(row=0, column=0, text="名称", row_span=2),
+        TableCell(row=0, column=1, text="规格", col_span=2),
+        TableCell(row=0, column=3, text="数量", row_span=2),
+        TableCell(row=1, column=1, text="口径"),
+        TableCell(row=1, column=2, text="备注"),
+        # 跨两行的物料名称
+        TableCell(row=2, column=0, text="镀锌钢管", row_span=2, confidence=0.8),
+        TableCell(row=2, column=1, text="DN50", confidence=0.9),
+        TableCell(row=2, column=3, text="20", confidence=0.9),
+        TableCell(row=3, column=1, text="DN65", confidence=0.95),
+        TableCell(row=3, column=3, text="8m", confidence=0.7),
+    ]
+    roles, header_end = resolve_columns(cells)
+    assert header_end == 1
+    assert roles == {"material_name": 0, "specification": 1, "quantity": 3, "remarks": 2}
+
+    rows = build_rows(cells, roles, header_end)
+    assert [(row.material_name, row.specification, row.quantity) for row in rows] == [
+        ("镀锌钢管", "DN50", 20), ("镀锌钢管", "DN65", 8)
+    ]
+    assert rows[1].confidence == 0.7
+
+
+def test_no_header_and_excel_columns():
+    assert resolve_columns(_cells([["卡箍", "DN100", "注意"]])) == ({}, -1)
+    assert map_header_texts(["material_code", "material_name", "specification", "unit"]) == {
+        "material_name": 1, "specification": 2, "unit": 3
+    }
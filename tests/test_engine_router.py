@@ -0,0 +1,112 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.models.ocr import TableStructure
+from app.services.ocr import worker_pool
+from app.services.ocr.engine_router import CLOUD, LOCAL, EngineRouter
+
+
+def _choose(router, pending=0, workers=4, size=(2000, 1500), file_bytes=1_000_000,
+            local_has_capacity=True, cloud_available=True):
+    return router.choose(size, file_bytes, pending, workers, local_has_capacity, cloud_available)
+
+
+def test_idle_local_workers_stay_local():
+    router = EngineRouter(mode="auto")
+    assert _choose(router, pending=2) == (LOCAL, "local_idle")
+
+
+def test_spills_to_cloud_when_local_queue_is_deep():
+    router = EngineRouter(mode="auto")
+    # 先验：本地1.5s/MP x 3MP x 3轮 远大于云端2s
+    assert _choose(router, pending=8) == (CLOUD, "local_slower")
+    assert _choose(router, pending=8, size=(400, 300)) == (LOCAL, "cloud_slower")
+    assert _choose(router, local_has_capacity=False) == (CLOUD, "local_queue_full")
+
+
+def test_cloud_blocked_by_size_health_and_mode():
+    router = EngineRouter(mode="auto")
+    assert _choose(router, pending=8, cloud_available=False) == (LOCAL, "cloud_disabled")
+    assert _choose(router, pending=8, size=(9000, 3000)) == (LOCAL, "cloud_size_limit")
+    for _ in range(10):
+        router.cloud.record(False)
+    assert _choose(router, pending=8) == (LOCAL, "cloud_unhealthy")
+    assert not router.can_spill(True)
+    assert _choose(EngineRouter(mode="local"), pending=8) == (LOCAL, "mode_local")
+
+
+def test_recent_cloud_latency_changes_decision():
+    router = EngineRouter(mode="auto")
+    for _ in range(10):
+        router.cloud.record(True, 30.0)
+    assert _choose(router, pending=8) == (LOCAL, "cloud_slower")
+
+
+def test_falls_back_to_other_engine_and_counts(tmp_path):
+    image = tmp_path / "table.jpg"
+    image.write_bytes(b"x" * 100)
+    router = EngineRouter(mode="auto")
+
+    async def local():
+        raise RuntimeError("worker crashed")
+
+    async def cloud():
+        return TableStructure()
+
+    result = asyncio.run(router.recognize(str(image), (2000, 1500), local, cloud, pending=0, workers=4,
+                                          local_has_capacity=True, cloud_available=True))
+    assert result.stats["engine"] == CLOUD
+    assert result.stats["route"] == {"engine": LOCAL, "reason": "local_idle", "fallback": CLOUD}
+    status = router.status()
+    assert status["decisions"] == {"local:local_idle": 1}
+    assert status["fallbacks"] == {"local->cloud": 1}
+
+
+def test_local_mode_never_falls_back_to_cloud(tmp_path):
+    image = tmp_path / "table.jpg"
+    image.write_bytes(b"x")
+    router = EngineRouter(mode="local")
+
+    async def local():
+        raise RuntimeError("worker crashed")
+
+    async def cloud():
+        raise AssertionError("cloud must not be called")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(router.recognize(str(image), (100, 100), local, cloud, pending=0, workers=1,
+                                     local_has_capacity=True, cloud_available=True))
+
+
+def test_only_results_of_the_mode_engine_are_cacheable():
+    local, cloud, unrouted = TableStructure(), TableStructure(), TableStructure()
+    local.stats["engine"] = LOCAL
+    cloud.stats["engine"] = CLOUD
+
+    auto = EngineRouter(mode="auto")
+    assert auto.cacheable(local) and auto.cacheable(unrouted) and not auto.cacheable(cloud)
+    cloud_mode = EngineRouter(mode="cloud")
+    assert cloud_mode.cacheable(cloud) and not cloud_mode.cacheable(local)
+
+
+def test_local_latency_excludes_queue_wait(monkeypatch):
+    class _Service:
+        def _process_image_ocr(self, path):
+            return TableStructure()
+
+    monkeypatch.setattr(worker_pool, "_worker_service", _Service())
+    pool = worker_pool.OCRWorkerPool(max_workers=1, max_queued=0)
+    pool._executor = ThreadPoolExecutor(max_workers=1)
+    router = EngineRouter(mode="local")
+
+    async def local():
+        await asyncio.sleep(0.3)  # 模拟等待进程池空位
+        return await pool.run("_process_image_ocr", "a.png", wait=True)
+
+    try:
+        asyncio.run(router._run(LOCAL, local, megapixels=1.0))
+    finally:
+        pool.shutdown()
+    assert router.local.p95(0.0) < 0.1
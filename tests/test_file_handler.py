@@ -0,0 +1,42 @@
+import asyncio
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import UploadFile
+
+from app.core.config import settings
+from app.utils.file_handler import UploadTooLargeError, is_valid_file, save_upload_file
+
+
+def _upload(data: bytes, filename: str = "table.png") -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename=filename)
+
+
+def test_save_upload_streams_and_hashes(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    data = os.urandom(300_000)
+
+    saved = asyncio.run(save_upload_file(_upload(data), chunk_size=64 * 1024))
+
+    assert saved.size == len(data)
+    assert saved.sha256 == hashlib.sha256(data).hexdigest()
+    with open(saved.file_path, "rb") as f:
+        assert f.read() == data
+
+
+def test_save_upload_rejects_oversized_and_removes_partial(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "MAX_UPLOAD_SIZE", 100_000)
+
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(save_upload_file(_upload(b"x" * 150_000), chunk_size=32 * 1024))
+    assert os.listdir(tmp_path) == []
+
+
+def test_is_valid_file_checks_declared_size_and_extension(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_UPLOAD_SIZE", 10)
+    assert is_valid_file(UploadFile(file=io.BytesIO(b""), filename="a.xlsx", size=5))
+    assert not is_valid_file(UploadFile(file=io.BytesIO(b""), filename="a.xlsx", size=50))
+    assert not is_valid_file(UploadFile(file=io.BytesIO(b""), filename="a.exe", size=5))
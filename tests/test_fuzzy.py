@@ -0,0 +1,43 @@
+import random
+
+import pytest
+from rapidfuzz import fuzz
+
+from app.services.matcher import fuzzy
+from app.services.matcher.fuzzy import best_match, best_matches, get_scorer
+
+NAMES = ["卡箍", "沟槽大小头", "沟槽弯头", "沟槽三通", "镀锌钢管", "闸阀", "蝶阀", "球阀", "法兰", "管夹"]
+
+
+def _loop(query, choices, cutoff=60):
+    """原实现：逐条打分，保留第一个最高分"""
+    best, highest = None, 0
+    for i, choice in enumerate(choices):
+        ratio = fuzz.ratio(query, choice)
+        if ratio > highest and ratio >= cutoff:
+            best, highest = (i, ratio), ratio
+    return best
+
+
+def test_best_match_agrees_with_loop():
+    for query in ["管夹子", "沟槽弯", "阀门", "镀锌管", "完全无关的文本", ""]:
+        assert best_match(query, NAMES, fuzz.ratio, 60) == _loop(query, NAMES)
+
+
+def test_best_matches_agrees_with_single_queries(monkeypatch):
+    monkeypatch.setattr(fuzzy, "_MAX_MATRIX_CELLS", 25)  # 强制分块
+    rng = random.Random(0)
+    choices = [name + rng.choice(["", "DN100", "(碳钢)", "异径"]) for name in NAMES * 5]
+    queries = ["管夹子", "", "沟槽弯头DN100", "阀", "卡箍(碳钢)", "xyz"] * 3
+
+    batch = best_matches(queries, choices, fuzz.ratio, 60, workers=2)
+    assert batch == [best_match(query, choices, fuzz.ratio, 60) for query in queries]
+    assert batch[1] is None
+
+
+def test_scorer_and_threshold_are_configurable(monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.MATERIAL_FUZZY_THRESHOLD", 90)
+    assert best_match("沟槽弯", NAMES, fuzz.ratio) is None
+    assert get_scorer("token_set_ratio") is fuzz.token_set_ratio
+    with pytest.raises(ValueError):
+        get_scorer("levenshtein")
@@ -0,0 +1,235 @@
+import numpy as np
+from app.services.ocr.layout import (
+    assign_boxes_to_cells, detect_grid_lines, detect_merged_cells, filter_merged_cells, grid_line_masks,
+    locate_table_region, low_confidence_boxes, suppress_duplicate_boxes, tile_rects
+)
+
+
+def _assign_reference(bounds, rows, cols):
+    """原逐单元格计算重叠面积的实现"""
+    result = []
+    for min_x, min_y, max_x, max_y in bounds:
+        row = col = -1
+        max_overlap = 0
+        for i in range(len(rows) - 1):
+            for j in range(len(cols) - 1):
+                x1 = max(min_x, cols[j])
+                y1 = max(min_y, rows[i])
+                x2 = min(max_x, cols[j + 1])
+                y2 = min(max_y, rows[i + 1])
+                overlap = (x2 - x1) * (y2 - y1) if x1 < x2 and y1 < y2 else 0
+                if overlap > max_overlap:
+                    max_overlap = overlap
+                    row, col = i, j
+        result.append((row, col))
+    return result
+
+
+def test_assign_boxes_matches_reference():
+    rng = np.random.default_rng(0)
+    rows = [0] + sorted(rng.choice(np.arange(20, 1400), 59, replace=False).tolist()) + [1500]
+    cols = [0, 60, 200, 380, 500, 620, 700, 820, 900, 1000]
+
+    bounds = []
+    for _ in range(2000):
+        x = rng.uniform(-50, 1050)
+        y = rng.uniform(-50, 1550)
+        w = rng.uniform(0, 250)
+        h = rng.uniform(0, 60)
+        bounds.append([x, y, x + w, y + h])
+    # 恰好落在分隔线上的边界和零宽度文本框
+    bounds.append([60, 20, 200, 40])
+    bounds.append([100, 100, 100, 120])
+    bounds.append([1100, 1600, 1200, 1700])
+
+    row_idx, col_idx = assign_boxes_to_cells(bounds, rows, cols)
+    assert list(zip(row_idx.tolist(), col_idx.tolist())) == _assign_reference(bounds, rows, cols)
+
+
+def test_assign_boxes_unsorted_lines_and_empty_input():
+    rows = [0, 100, 50, 200]
+    cols = [0, 100, 200]
+    bounds = [[10, 60, 90, 90], [110, 150, 190, 190]]
+    row_idx, col_idx = assign_boxes_to_cells(bounds, rows, cols)
+    assert list(zip(row_idx.tolist(), col_idx.tolist())) == _assign_reference(bounds, rows, cols)
+
+    row_idx, col_idx = assign_boxes_to_cells([], rows, cols)
+    assert len(row_idx) == 0 and len(col_idx) == 0
+
+
+def test_tile_cores_partition_image():
+    width, height = 1080, 5000
+    tiles = tile_rects(width, height, tile_size=960, overlap=96, max_side=1440)
+
+    # 宽度未超过阈值时只按高度切分
+    assert all(rect[0] == 0 and rect[2] == width for rect, _ in tiles)
+    assert tiles[0][0][1] == 0 and tiles[-1][0][3] == height
+    for (rect, _), (next_rect, _) in zip(tiles[:-1], tiles[1:]):
+        assert rect[3] - next_rect[1] >= 96
+        assert rect[3] - rect[1] == 960
+
+    # 每个像素恰好属于一个分块的核心区，且核心区位于分块内
+    coverage = np.zeros(height, dtype=int)
+    for rect, core in tiles:
+        assert rect[1] <= core[1] < core[3] <= rect[3]
+        coverage[core[1]:core[3]] += 1
+    assert np.all(coverage == 1)
+
+
+def test_small_image_is_single_tile():
+    assert tile_rects(800, 1200, tile_size=960, overlap=96, max_side=1440) == [
+        ([0, 0, 800, 1200], [0, 0, 800, 1200])
+    ]
+
+
+def test_locate_table_region_finds_ruled_table():
+    import cv2
+
+    image = np.full((1200, 800, 3), 255, dtype=np.uint8)
+    # 表格上方的聊天界面文字
+    cv2.putText(image, "12:30  WeChat", (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 2)
+    for y in range(300, 901, 60):
+        cv2.line(image, (100, y), (700, y), (0, 0, 0), 2)
+    for x in (100, 250, 450, 700):
+        cv2.line(image, (x, 300), (x, 900), (0, 0, 0), 2)
+    for y in range(340, 900, 60):
+        for x in (110, 260, 460):
+            cv2.putText(image, "DN100", (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
+
+    region = locate_table_region(image, padding=0)
+    assert region["method"] == "lines"
+    x1, y1, x2, y2 = region["bbox"]
+    assert abs(x1 - 100) <= 10 and abs(x2 - 700) <= 10
+    assert abs(y1 - 300) <= 10 and abs(y2 - 900) <= 10
+
+
+def test_detect_grid_lines_on_long_table():
+    import cv2
+
+    # 2行高的粗线和1像素细线混合，长表格的竖线贯穿全部行
+    row_lines = list(range(20, 4000, 40))
+    col_lines = [30, 180, 400, 560]
+    image = np.full((4020, 600), 255, dtype=np.uint8)
+    for i, y in enumerate(row_lines):
+        cv2.line(image, (30, y), (560, y), 0, 2 if i % 5 == 0 else 1)
+    for x in col_lines:
+        cv2.line(image, (x, 20), (x, row_lines[-1]), 0, 1)
+    for y in row_lines[:-1]:
+        cv2.putText(image, "DN50", (40, y + 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 2)
+
+    rows, cols = detect_grid_lines(image, min_row_gap=10, min_col_gap=20)
+    assert len(rows) == len(row_lines)
+    assert np.max(np.abs(rows - np.array(row_lines))) <= 1
+    assert np.max(np.abs(cols - np.array(col_lines))) <= 1
+
+
+def test_detect_grid_lines_drops_columns_not_spanning_the_table():
+    import cv2
+
+    row_lines = list(range(20, 1000, 40))
+    image = np.full((1020, 600), 255, dtype=np.uint8)
+    for y in row_lines:
+        cv2.line(image, (30, y), (560, y), 0, 1)
+    # 竖线在合并单元格所在的两行断开，仍是列分隔线
+    for x in (30, 560):
+        cv2.line(image, (x, 20), (x, row_lines[-1]), 0, 1)
+    cv2.line(image, (300, 20), (300, 420), 0, 1)
+    cv2.line(image, (300, 500), (300, row_lines[-1]), 0, 1)
+    # 只跨越表格上部几行的竖线（如表头内的分隔）不作为列分隔线
+    cv2.line(image, (150, 20), (150, 260), 0, 1)
+
+    rows, cols = detect_grid_lines(image, min_row_gap=10, min_col_gap=20)
+    assert len(rows) == len(row_lines)
+    assert np.max(np.abs(cols - np.array([30, 300, 560]))) <= 1
+
+
+def _suppress_reference(bounds, scores, iou_threshold):
+    """逐对比较的非极大值抑制"""
+    kept = []
+    for i in sorted(range(len(bounds)), key=lambda k: -scores[k]):
+        x1, y1, x2, y2 = bounds[i]
+        duplicate = False
+        for j in kept:
+            iw = min(x2, bounds[j][2]) - max(x1, bounds[j][0])
+            ih = min(y2, bounds[j][3]) - max(y1, bounds[j][1])
+            if iw <= 0 or ih <= 0:
+                continue
+            inter = iw * ih
+            union = (x2 - x1) * (y2 - y1) + (bounds[j][2] - bounds[j][0]) * (bounds[j][3] - bounds[j][1]) - inter
+            if inter / union > iou_threshold:
+                duplicate = True
+                break
+        if not duplicate:
+            kept.append(i)
+    return sorted(kept)
+
+
+def test_suppress_duplicate_boxes_matches_reference():
+    rng = np.random.default_rng(1)
+    bounds = []
+    for _ in range(300):
+        x = rng.uniform(0, 1000)
+        y = rng.uniform(0, 3000)
+        w = rng.uniform(20, 300)
+        h = rng.uniform(15, 40)
+        # 每个文本框附带几个轻微偏移的重复识别结果
+        for _ in range(rng.integers(1, 4)):
+            dx, dy = rng.normal(0, 4, 2)
+            bounds.append([x + dx, y + dy, x + dx + w, y + dy + h])
+    scores = rng.uniform(0.3, 1.0, len(bounds)).tolist()
+
+    keep = suppress_duplicate_boxes(bounds, scores, iou_threshold=0.5)
+    assert keep.tolist() == _suppress_reference(bounds, scores, 0.5)
+
+
+def test_suppress_duplicate_boxes_keeps_repeated_text_rows():
+    # 同一位置的两次识别只保留置信度高的，不同行的相同文本全部保留
+    bounds = [[10, 10, 90, 30], [11, 11, 91, 31], [10, 50, 90, 70], [10, 90, 90, 110]]
+    scores = [0.7, 0.95, 0.9, 0.9]
+    assert suppress_duplicate_boxes(bounds, scores).tolist() == [1, 2, 3]
+    assert len(suppress_duplicate_boxes([], [])) == 0
+
+
+def test_low_confidence_boxes_selects_whole_cells():
+    row_idx = [0, 0, 1, 1, 2, -1]
+    col_idx = [0, 0, 0, 1, 1, 0]
+    confidences = [0.9, 0.5, 0.6, 0.95, 0.7, 0.1]
+    # 单元格(0,0)平均0.7，(1,0)为0.6，(2,1)为0.7；网格外的文本框不参与
+    assert low_confidence_boxes(row_idx, col_idx, confidences, 0.75).tolist() == [0, 1, 2, 4]
+    assert low_confidence_boxes(row_idx, col_idx, confidences, 0.65).tolist() == [2]
+    assert len(low_confidence_boxes([-1], [-1], [0.1], 0.75)) == 0
+
+
+def test_detect_merged_cells_from_line_mask():
+    import cv2
+
+    rows = [0, 40, 80, 120, 160]
+    cols = [0, 100, 200, 300]
+    image = np.full((161, 301), 255, dtype=np.uint8)
+    cv2.rectangle(image, (0, 0), (300, 160), 0, 1)
+    # 第0列的第1、2行合并（缺少y=80处的横线段），第0行的第1、2列合并（缺少x=200处的竖线段）
+    for y in (40, 120):
+        cv2.line(image, (0, y), (300, y), 0, 1)
+    cv2.line(image, (100, 80), (300, 80), 0, 1)
+    cv2.line(image, (100, 0), (100, 160), 0, 1)
+    cv2.line(image, (200, 40), (200, 160), 0, 1)
+
+    h_mask, v_mask = grid_line_masks(image, min_vertical_length=20)
+    assert detect_merged_cells(h_mask, v_mask, rows, cols) == [
+        {"start_row": 0, "end_row": 0, "start_col": 1, "end_col": 2},
+        {"start_row": 1, "end_row": 2, "start_col": 0, "end_col": 0},
+    ]
+    assert detect_merged_cells(h_mask, v_mask, [0, 160], [0, 300]) == []
+
+
+def test_filter_merged_cells_drops_regions_with_several_texts():
+    merged = [
+        {"start_row": 1, "end_row": 3, "start_col": 0, "end_col": 0},
+        {"start_row": 1, "end_row": 3, "start_col": 2, "end_col": 2},
+        {"start_row": 0, "end_row": 0, "start_col": 1, "end_col": 2},
+    ]
+    # 第0列只有一处文字；第2列每行都有文字（无边框的备注列）
+    row_idx = [2, 2, 1, 2, 3, 0, -1]
+    col_idx = [0, 0, 2, 2, 2, 1, -1]
+    assert filter_merged_cells(merged, row_idx, col_idx) == [merged[0], merged[2]]
+    assert filter_merged_cells([], row_idx, col_idx) == []
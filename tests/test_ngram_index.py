@@ -0,0 +1,159 @@
+import asyncio
+import json
+import os
+import threading
+
+from app.services.matcher.catalog_index import MaterialCatalog
+from app.services.matcher.fuzzy import get_scorer
+from app.services.matcher.matcher import MaterialMatcher
+from app.services.matcher.ngram_index import NgramIndex, tokenize
+from app.utils.text_normalizer import match_key
+
+MATERIALS = os.path.join(os.path.dirname(__file__), "test_data", "materials.json")
+
+KEYS = [match_key(name) for name in
+        ["镀锌钢管 DN100", "不锈钢球阀 DN50 PN16 316L", "无缝钢管 89*4", "沟槽卡箍 DN100", "阀"]]
+
+
+def _index():
+    index = NgramIndex(max_posting=100)
+    index.build(enumerate(KEYS))
+    return index
+
+
+def test_tokenize_cjk_grams_and_spec_tokens():
+    assert tokenize(match_key("镀锌钢管 DN100")) == {"镀锌", "锌钢", "钢管", "镀锌钢", "锌钢管", "dn100"}
+    assert {"89*4", "89", "4", "无缝"} <= tokenize("无缝钢管89*4")
+    assert tokenize("阀") == {"阀"}
+
+
+def test_candidates_ranked_by_shared_grams():
+    index = _index()
+
+    assert list(index.candidates(match_key("镀锌钢管DN100"), 10)) == [0, 2, 3]
+    # 只取共有n-gram最多的一项
+    assert list(index.candidates(match_key("镀锌钢管DN100"), 1)) == [0]
+    assert list(index.candidates("完全无关", 10)) == []
+
+
+def test_frequent_grams_are_skipped_unless_nothing_else():
+    index = NgramIndex(max_posting=2)
+    index.build(enumerate(["钢管a", "钢管b", "钢管c", "钢管d"]))
+
+    # "钢管"出现4次超过上限，只用区分度高的"b"
+    assert list(index.candidates("钢管b", 10)) == [1]
+    # 只有高频n-gram时仍返回候选
+    assert list(index.candidates("钢管", 10)) == [0, 1, 2, 3]
+
+
+def test_add_replace_and_remove():
+    index = _index()
+    index.add(5, "沟槽弯头")
+    index.add(0, "沟槽三通")  # 替换原有条目
+    index.remove(3)
+
+    assert len(index) == 5
+    assert list(index.candidates("沟槽弯头", 10)) == [0, 5]
+    assert list(index.candidates("镀锌钢管", 10)) == [2]
+
+    index.compact()
+    assert len(index) == 5 and len(index._keys) == 5
+    assert list(index.candidates("沟槽弯头", 10)) == [0, 5]
+
+
+def test_snapshot_reconciles_with_current_catalog(tmp_path):
+    path = str(tmp_path / "ngram.npz")
+    _index().save(path, ["C0", "C1", "C2", "C3", "C4"])
+
+    # 目录重新加载后下标变化：C1删除，C3名称修改，新增C9
+    codes = ["C4", "C3", "C2", "C0", "C9"]
+    keys = [KEYS[4], "沟槽弯头", KEYS[2], KEYS[0], "法兰盘"]
+    index = NgramIndex(max_posting=100)
+
+    assert index.load(path, {code: i for i, code in enumerate(codes)}, keys) == 4
+    assert len(index) == 5
+    assert list(index.candidates(match_key("镀锌钢管DN100"), 10)) == [2, 3]
+    assert list(index.candidates("沟槽弯头", 10)) == [1]
+    assert list(index.candidates("法兰", 10)) == [4]
+    assert list(index.candidates("球阀", 10)) == []
+
+    assert index.load(str(tmp_path / "missing.npz"), {}, []) is None
+
+
+def test_catalog_uses_candidates_for_fuzzy_match(monkeypatch, tmp_path):
+    monkeypatch.setattr("app.core.config.settings.MATERIAL_NGRAM_SNAPSHOT", str(tmp_path / "ngram.npz"))
+    with open(MATERIALS, encoding="utf-8") as f:
+        docs = json.load(f)
+    catalog = MaterialCatalog()
+    catalog.build(docs)
+    assert os.path.exists(tmp_path / "ngram.npz")
+    matcher = MaterialMatcher(catalog)
+    expected = asyncio.run(matcher._fuzzy_match_many(["沟槽90度弯头", "完全无关"]))
+
+    monkeypatch.setattr("app.core.config.settings.MATERIAL_NGRAM_MIN_ENTRIES", 0)
+    assert catalog.fuzzy_candidates(match_key("沟槽90度弯头")) is not None
+    assert asyncio.run(matcher._fuzzy_match_many(["沟槽90度弯头", "完全无关"])) == expected
+    assert asyncio.run(matcher._fuzzy_match("沟槽90度弯头")) == expected[0]
+
+    # 增量更新同步到n-gram索引
+    catalog.upsert({"material_code": "P999", "material_name": "沟槽90度弯头件"})
+    assert asyncio.run(matcher._fuzzy_match("沟槽90度弯头"))["material_code"] == "P999"
+
+    # 从快照恢复
+    rebuilt = MaterialCatalog()
+    rebuilt.build(docs)
+    assert len(rebuilt.ngrams) == len(rebuilt)
+
+
+def test_fuzzy_result_is_bound_to_the_searched_catalog(monkeypatch):
+    with open(MATERIALS, encoding="utf-8") as f:
+        docs = json.load(f)
+    catalog = MaterialCatalog()
+    catalog.build(docs)
+    matcher = MaterialMatcher(catalog)
+    view = catalog.fuzzy_view()
+    expected = asyncio.run(matcher._fuzzy_match("沟槽90度弯头"))
+
+    # 打分期间目录重新加载，物料顺序变化且删除了一条
+    catalog.build(list(reversed(docs[1:])))
+    code, score = matcher._fuzzy_search(match_key("沟槽90度弯头"), get_scorer(), view)
+    assert code == expected["material_code"]
+    assert matcher._fuzzy_result((code, score))["material"] == catalog.get(code)
+    # 已被删除的物料不作为匹配结果
+    assert matcher._fuzzy_result((docs[0]["material_code"], 90.0)) is None
+
+
+def test_candidates_while_index_is_updated_from_another_thread():
+    keys = [f"钢管{i % 50}型dn{i}" for i in range(3000)]
+    index = NgramIndex(max_posting=5000)
+    index.build(enumerate(keys))
+    errors = []
+    done = threading.Event()
+
+    def query():
+        try:
+            while not done.is_set():
+                for slot in index.candidates("钢管7型dn7", 50):
+                    assert 0 <= slot < 4000
+        except Exception as e:
+            errors.append(e)
+
+    readers = [threading.Thread(target=query) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    try:
+        # 反复替换和删除条目，期间会多次整体重建倒排表
+        for round_ in range(3):
+            for i in range(3000):
+                index.add(i, f"{keys[i]}改{round_}")
+            for i in range(3000, 4000):
+                index.add(i, f"阀门dn{i}")
+                index.remove(i)
+    finally:
+        done.set()
+        for reader in readers:
+            reader.join()
+
+    assert errors == []
+    assert len(index) == 3000
+    assert list(index.candidates("钢管7型dn7改2", 1)) == [7]
@@ -0,0 +1,326 @@
+import asyncio
+
+import cv2
+import numpy as np
+
+from app.models.ocr import FileType, OCRTask, TableCell, TableRow, TableStructure, TaskFile, TaskStatus
+from app.services.ocr.ocr_service import OCRService, _downscale_strips
+
+
+class _FakeEngine:
+    """只记录调用的识别模型，每个文本行图像返回固定读数"""
+
+    def __init__(self, readings):
+        self.readings = readings
+        self.calls = []
+
+    def text_recognizer(self, crops):
+        self.calls.append(len(crops))
+        return self.readings[:len(crops)], 0.0
+
+
+def _box(x1, y1, x2, y2):
+    return [[x1, y1], [x2, y1], [x2, y2], [x1, y2]]
+
+
+def test_retry_low_confidence_cells_in_one_batch():
+    service = OCRService(connect_db=False)
+    service._ocr = _FakeEngine([("DN100", 0.6), ("DN100", 0.97), ("球阀", 0.5), ("球阀", 0.4)])
+
+    image = np.full((200, 300, 3), 255, dtype=np.uint8)
+    results = [
+        [_box(10, 10, 90, 40), ["DN1O0", 0.55]],
+        [_box(110, 10, 190, 40), ["闸阀", 0.99]],
+        [_box(10, 110, 90, 140), ["球阀", 0.7]],
+    ]
+    retried, stats = service._retry_low_confidence_cells(image, [0, 100, 200], [0, 100, 200], results)
+
+    # 两个低置信度单元格、每个两种预处理版本，只调用一次识别模型
+    assert service._ocr.calls == [4]
+    assert stats == {"cells": 2, "boxes": 2, "improved": 1}
+    assert retried[0][1] == ["DN100", 0.97]
+    assert retried[1] is results[1] and retried[2] is results[2]
+
+
+def test_extract_cell_content_fills_spans():
+    service = OCRService(connect_db=False)
+    rows, cols = [0, 40, 80, 120], [0, 100, 200]
+    results = [
+        [_box(10, 5, 60, 30), ["名称", 0.9]],
+        [_box(110, 5, 160, 30), ["规格", 0.9]],
+        # 跨两行的合并单元格，文本位于下半部分
+        [_box(10, 90, 60, 110), ["球阀", 0.8]],
+        [_box(110, 50, 160, 70), ["DN50", 0.9]],
+        [_box(110, 90, 160, 110), ["DN65", 0.9]],
+    ]
+    merged = [{"start_row": 1, "end_row": 2, "start_col": 0, "end_col": 0}]
+    cells = service.extract_cell_content(None, [rows, cols], results, normalized=True, merged_cells=merged)
+
+    by_position = {(cell.row, cell.column): cell for cell in cells}
+    assert set(by_position) == {(0, 0), (0, 1), (1, 0), (1, 1), (2, 1)}
+    assert by_position[(1, 0)].text == "球阀"
+    assert (by_position[(1, 0)].row_span, by_position[(1, 0)].col_span) == (2, 1)
+    assert by_position[(2, 1)].row_span == 1
+
+
+def test_decode_image_file_from_memory_map(tmp_path):
+    import cv2
+    from app.services.ocr.ocr_service import _decode_image_file
+
+    image = np.zeros((20, 30, 3), dtype=np.uint8)
+    image[5:10, 5:25] = (0, 128, 255)
+    path = tmp_path / "table.png"
+    cv2.imwrite(str(path), image)
+
+    assert np.array_equal(_decode_image_file(str(path)), image)
+    empty = tmp_path / "empty.png"
+    empty.write_bytes(b"")
+    assert _decode_image_file(str(empty)) is None
+    assert _decode_image_file(str(tmp_path / "missing.png")) is None
+
+
+class _FakeOCR:
+    """记录每次整图/区域识别的输入尺寸，按调用顺序返回预设结果"""
+
+    def __init__(self, passes):
+        self.passes = list(passes)
+        self.shapes = []
+
+    def ocr(self, image, cls=True):
+        self.shapes.append(image.shape[:2])
+        return [self.passes.pop(0) if self.passes else []]
+
+
+def _settings(monkeypatch, **values):
+    for name, value in values.items():
+        monkeypatch.setattr(f"app.core.config.settings.{name}", value)
+
+
+def test_score_ocr_pass(monkeypatch):
+    _settings(monkeypatch, OCR_PASS_LOW_CONFIDENCE=0.75)
+    service = OCRService(connect_db=False)
+    results = [
+        [_box(10, 10, 90, 30), ["名称", 0.95]],
+        [_box(10, 50, 90, 70), ["球阀", 0.55]],
+        [_box(110, 50, 190, 70), ["DN50", 0.9]],
+    ]
+
+    score = service._score_ocr_pass(results, [0, 40, 80, 120, 160])
+    assert score["mean_confidence"] == (0.95 + 0.55 + 0.9) / 3
+    assert score["low_confidence_ratio"] == 1 / 3
+    # 4行中只有前两行有文本框
+    assert score["grid_coverage"] == 0.5
+
+    assert service._score_ocr_pass([], [0, 40]) == {
+        "mean_confidence": 0.0, "low_confidence_ratio": 1.0, "grid_coverage": 0.0
+    }
+
+
+def test_find_retry_regions_pads_and_merges(monkeypatch):
+    _settings(monkeypatch, OCR_PASS_LOW_CONFIDENCE=0.75, OCR_PASS_REGION_PADDING=5,
+              TABLE_MIN_ROW_HEIGHT=20)
+    service = OCRService(connect_db=False)
+    results = [
+        [_box(10, 10, 90, 30), ["名称", 0.95]],
+        # 两个相邻的低置信度框，外扩后重叠，合并为一个区域
+        [_box(2, 50, 60, 70), ["球阀", 0.5]],
+        [_box(62, 50, 120, 70), ["DN50", 0.6]],
+    ]
+
+    regions = service._find_retry_regions(results, [0, 40, 80, 90, 140], (150, 200, 3))
+    # 第3行高度不足TABLE_MIN_ROW_HEIGHT不补识别；第4行没有文本框，按整行补识别
+    assert regions == [[0, 45, 125, 75], [0, 85, 200, 145]]
+
+
+def test_adaptive_pass_skips_retry_when_first_pass_is_good(monkeypatch):
+    _settings(monkeypatch, OCR_PASS_MODE="adaptive", OCR_PASS_MIN_MEAN_CONFIDENCE=0.85,
+              OCR_PASS_LOW_CONFIDENCE=0.75, OCR_PASS_MAX_LOW_RATIO=0.1,
+              OCR_PASS_MIN_GRID_COVERAGE=0.7, OCR_PASS_MAX_REGION_RATIO=0.5,
+              OCR_PASS_REGION_PADDING=0)
+    image = np.full((80, 200, 3), 255, dtype=np.uint8)
+    good = [[_box(10, 10, 90, 30), ["名称", 0.95]], [_box(10, 50, 90, 70), ["球阀", 0.9]]]
+
+    service = OCRService(connect_db=False)
+    service._ocr = _FakeOCR([good])
+    results, stats = service._recognize(image, image, image, 1.0, [0, 40, 80])
+    assert stats["passes"] == 1 and len(service._ocr.shapes) == 1
+    assert results == good
+
+    # 第二行置信度低：只对该文本框区域补充识别预处理图和二值图
+    weak = [good[0], [_box(10, 50, 90, 70), ["球阀", 0.4]]]
+    service._ocr = _FakeOCR([weak, [], []])
+    results, stats = service._recognize(image, image, image, 1.0, [0, 40, 80])
+    assert stats["passes"] == 3 and stats["retry_regions"] == 1
+    assert service._ocr.shapes == [(80, 200), (20, 80), (20, 80)]
+
+
+def _table(texts, retry=None):
+    """每个文本一行的识别结果"""
+    stats = {"cell_retry": retry} if retry else {}
+    return TableStructure(
+        cells=[TableCell(text=text, row=i, column=0) for i, text in enumerate(texts)],
+        merged_cells=[{"start_row": 0, "end_row": 1, "start_col": 0, "end_col": 0}],
+        column_roles={"material_name": 0},
+        data_rows=[TableRow(row_index=i, material_name=text) for i, text in enumerate(texts)],
+        stats=stats
+    )
+
+
+def test_merge_results_offsets_rows_and_sums_cell_retry():
+    merged = OCRService(connect_db=False).merge_results([
+        _table(["球阀", "闸阀"], {"cells": 2, "boxes": 3, "improved": 1}),
+        _table(["弯头"]),
+        _table(["三通", "法兰", "卡箍"], {"cells": 1, "boxes": 1, "improved": 1}),
+    ])
+
+    assert merged.stats["row_offsets"] == [0, 2, 3]
+    assert merged.stats["cell_retry"] == {"cells": 3, "boxes": 4, "improved": 2}
+    assert len(merged.stats["sources"]) == 3
+    assert [(cell.row, cell.text) for cell in merged.cells] == [
+        (0, "球阀"), (1, "闸阀"), (2, "弯头"), (3, "三通"), (4, "法兰"), (5, "卡箍")
+    ]
+    assert [row.row_index for row in merged.data_rows] == [0, 1, 2, 3, 4, 5]
+    assert [m["start_row"] for m in merged.merged_cells] == [0, 2, 3]
+
+
+class _TaskCollection:
+    """只支持任务处理用到的按task_id查找和$set（含 files.{i}.字段 路径）"""
+
+    def __init__(self, task):
+        self.doc = task.dict()
+
+    async def find_one(self, query):
+        return self.doc if query["task_id"] == self.doc["task_id"] else None
+
+    async def update_one(self, query, update):
+        for path, value in update["$set"].items():
+            target = self.doc
+            *parents, field = path.split(".")
+            for part in parents:
+                target = target[int(part)] if isinstance(target, list) else target[part]
+            target[field] = value
+
+
+def _run_task(monkeypatch, outcomes):
+    """按文件路径返回识别结果或抛出异常，返回处理后的任务"""
+    async def recognize(file_path, file_type, file_hash=None):
+        outcome = outcomes[file_path]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    service = OCRService(connect_db=False)
+    monkeypatch.setattr(service, "_recognize_file", recognize)
+    task = OCRTask(
+        task_id="t1",
+        files=[TaskFile(file_path=path, file_type=FileType.IMAGE) for path in outcomes],
+        status=TaskStatus.PENDING
+    )
+    service.collection = _TaskCollection(task)
+    asyncio.run(service._process_task("t1"))
+    return OCRTask(**service.collection.doc)
+
+
+def test_task_completes_with_partial_results_when_one_file_fails(monkeypatch):
+    task = _run_task(monkeypatch, {
+        "a.png": _table(["球阀", "闸阀"]),
+        "b.png": RuntimeError("decode failed"),
+        "c.png": _table(["弯头"]),
+    })
+
+    assert [f.status for f in task.files] == [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.COMPLETED]
+    assert task.files[1].error_message == "decode failed" and task.files[1].result is None
+    assert [cell.text for cell in task.files[2].result.cells] == ["弯头"]
+    # 任务结果只合并成功的文件
+    assert task.status == TaskStatus.COMPLETED
+    assert [(cell.row, cell.text) for cell in task.result.cells] == [(0, "球阀"), (1, "闸阀"), (2, "弯头")]
+
+
+def test_task_fails_when_every_file_fails(monkeypatch):
+    task = _run_task(monkeypatch, {"a.png": RuntimeError("x"), "b.png": ValueError("y")})
+
+    assert [f.status for f in task.files] == [TaskStatus.FAILED, TaskStatus.FAILED]
+    assert task.status == TaskStatus.FAILED
+    assert task.error_message == "All files failed to process"
+
+
+def test_downscale_strips_matches_whole_image_resize():
+    rows, cols = np.mgrid[0:2500, 0:3000]
+    image = np.dstack([rows % 251, cols % 241, (rows + cols) % 255]).astype(np.uint8)
+
+    small, scale = _downscale_strips(image, 1000, strip_rows=700)
+    assert scale == 1000 / 3000 and small.shape == (833, 1000, 3)
+    # 条带边界处的插值与整图缩小略有差异
+    whole = cv2.resize(image, (1000, 833), interpolation=cv2.INTER_AREA)
+    assert np.abs(small.astype(int) - whole).mean() < 2
+
+    same, scale = _downscale_strips(image[:100, :500], 1000)
+    assert scale == 1.0 and np.array_equal(same, image[:100, :500])
+
+
+def test_tiled_image_grid_is_detected_on_downscaled_copy(monkeypatch, tmp_path):
+    _settings(monkeypatch, OCR_PASS_MODE="adaptive", OCR_PREPROCESS_PROFILE="none",
+              TABLE_LINE_DETECTOR="morphology")
+    # 4000像素宽的表格：行线间隔200，列线间隔1000
+    image = np.full((2000, 4000, 3), 255, dtype=np.uint8)
+    for y in range(100, 2000, 200):
+        cv2.line(image, (100, y), (3900, y), (0, 0, 0), 4)
+    for x in range(100, 4000, 1000):
+        cv2.line(image, (x, 100), (x, 1900), (0, 0, 0), 4)
+    array_path = str(tmp_path / "image.npy")
+    np.save(array_path, image)
+    tiles = [{"results": [[_box(150, 150, 900, 250), ["球阀", 0.95]],
+                          [_box(1150, 1550, 1900, 1650), ["DN100", 0.9]]],
+              "stats": {"dropped": 0}}]
+
+    result = OCRService(connect_db=False)._process_tiled_image(array_path, tiles)
+
+    assert {(cell.row, cell.column, cell.text) for cell in result.cells} == {(1, 1, "球阀"), (8, 2, "DN100")}
+
+
+class _StubPool:
+    async def run(self, method, *args, wait=False):
+        return _table(["球阀"])
+
+
+def test_cache_errors_do_not_fail_recognition(monkeypatch):
+    from app.services.ocr.ocr_service import ocr_result_cache
+
+    async def broken(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(ocr_result_cache, "enabled", True)
+    monkeypatch.setattr(ocr_result_cache, "get", broken)
+    monkeypatch.setattr(ocr_result_cache, "put", broken)
+    monkeypatch.setattr("app.services.ocr.ocr_service.ocr_worker_pool", _StubPool())
+
+    result = asyncio.run(OCRService(connect_db=False)._recognize_file("a.xlsx", FileType.EXCEL, "abc"))
+    assert [cell.text for cell in result.cells] == ["球阀"]
+
+
+def test_cloud_routed_result_is_not_cached(monkeypatch):
+    from app.services.ocr.ocr_service import ocr_result_cache
+    stored = []
+
+    async def miss(key):
+        return None
+
+    async def put(key, result):
+        stored.append(key)
+
+    async def recognize_image(self, image_path):
+        result = _table(["球阀"])
+        result.stats["engine"] = "cloud"
+        return result
+
+    monkeypatch.setattr(ocr_result_cache, "enabled", True)
+    monkeypatch.setattr(ocr_result_cache, "get", miss)
+    monkeypatch.setattr(ocr_result_cache, "put", put)
+    monkeypatch.setattr(OCRService, "_recognize_image", recognize_image)
+    monkeypatch.setattr("app.services.ocr.ocr_service.ocr_worker_pool", _StubPool())
+
+    service = OCRService(connect_db=False)
+    asyncio.run(service._recognize_file("a.jpg", FileType.IMAGE, "abc"))
+    assert stored == []
+    asyncio.run(service._recognize_file("a.xlsx", FileType.EXCEL, "abc"))
+    assert len(stored) == 1
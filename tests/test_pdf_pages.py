@@ -0,0 +1,41 @@
+import fitz
+import numpy as np
+
+from app.services.ocr.pdf_pages import iter_pdf_pages, pdf_page_count
+
+
+def _pdf(tmp_path, pages=3, width=200, height=100):
+    """生成每页尺寸为 width x height 点的PDF，第0页填充红色"""
+    path = str(tmp_path / "table.pdf")
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page(width=width, height=height)
+        if i == 0:
+            page.draw_rect(page.rect, color=(1, 0, 0), fill=(1, 0, 0))
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def test_page_count(tmp_path):
+    assert pdf_page_count(_pdf(tmp_path, pages=3)) == 3
+
+
+def test_pages_are_bgr_uint8_at_requested_dpi(tmp_path):
+    path = _pdf(tmp_path)
+
+    pages = list(iter_pdf_pages(path, dpi=72))
+    assert [number for number, _ in pages] == [0, 1, 2]
+    for _, image in pages:
+        assert image.dtype == np.uint8 and image.shape == (100, 200, 3)
+        assert image.flags["C_CONTIGUOUS"]
+    # 红色页面按BGR顺序输出
+    assert tuple(pages[0][1][50, 100]) == (0, 0, 255)
+    assert tuple(pages[1][1][50, 100]) == (255, 255, 255)
+
+
+def test_output_size_scales_with_dpi(tmp_path):
+    path = _pdf(tmp_path)
+
+    [(number, image)] = list(iter_pdf_pages(path, dpi=144, page_numbers=[2]))
+    assert number == 2 and image.shape == (200, 400, 3)
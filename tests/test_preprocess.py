@@ -0,0 +1,102 @@
+import cv2
+import numpy as np
+import pytest
+
+from app.services.ocr.preprocess import _deskew, estimate_skew_angle, preprocess, stage_timer
+
+
+def _table(lines=True):
+    """白底黑字的合成表格，600x900"""
+    image = np.full((600, 900), 255, dtype=np.uint8)
+    if lines:
+        for y in range(50, 560, 50):
+            cv2.line(image, (50, y), (850, y), 0, 2)
+        for x in (50, 300, 600, 850):
+            cv2.line(image, (x, 50), (x, 550), 0, 2)
+    for y in range(80, 560, 50):
+        cv2.putText(image, "DN100 PN16 abc", (60, y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 2)
+    return image
+
+
+def test_stage_timer_records_milliseconds():
+    timings = {}
+    with stage_timer(timings, "step"):
+        pass
+    assert list(timings) == ["step"] and timings["step"] >= 0
+
+
+@pytest.mark.parametrize("profile, stages", [
+    ("none", ["resize", "gray"]),
+    ("full", ["resize", "gray", "denoise", "contrast", "binarize", "morphology", "deskew", "sharpen"]),
+])
+def test_profile_stages(profile, stages):
+    report = {}
+    result = preprocess(cv2.cvtColor(_table(), cv2.COLOR_GRAY2BGR), profile=profile, report=report)
+
+    assert report["profile"] == profile
+    assert list(report["timings_ms"]) == stages
+    assert all(ms >= 0 for ms in report["timings_ms"].values())
+    assert report["total_ms"] >= 0
+    assert result.ndim == 2 and result.shape == (600, 900)
+
+
+def test_fast_profile_skips_stages_for_clean_scan():
+    report = {}
+    preprocess(_table(), profile="fast", report=report)
+
+    assert list(report["timings_ms"]) == ["resize", "gray", "quality", "binarize", "deskew"]
+    assert report["skipped"] == ["denoise", "contrast", "morphology", "sharpen"]
+    assert set(report["quality"]) == {"noise", "contrast", "sharpness"}
+
+
+def test_fast_profile_denoises_noisy_scan():
+    rng = np.random.default_rng(0)
+    noisy = np.clip(_table().astype(np.int16) + rng.normal(0, 40, (600, 900)), 0, 255).astype(np.uint8)
+    report = {}
+    preprocess(noisy, profile="fast", report=report)
+
+    assert {"denoise", "morphology"} <= set(report["timings_ms"])
+    assert "denoise" not in report["skipped"]
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        preprocess(_table(), profile="extreme")
+
+
+def _rotate(image, angle):
+    """按OpenCV约定旋转（正角度为逆时针），空白处填充白色"""
+    height, width = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width // 2, height // 2), angle, 1.0)
+    return cv2.warpAffine(image, matrix, (width, height), borderValue=255)
+
+
+@pytest.mark.parametrize("lines", [True, False], ids=["table_lines", "text_only"])
+@pytest.mark.parametrize("rotation", [-5, -2, 2, 5])
+def test_estimate_skew_angle_sign_and_magnitude(rotation, lines):
+    # 估计的是校正角度：逆时针倾斜N度的图片需要旋转-N度
+    angle = estimate_skew_angle(_rotate(_table(lines), rotation))
+    assert angle == pytest.approx(-rotation, abs=0.3)
+
+
+def test_estimate_skew_angle_of_straight_table_is_zero():
+    assert estimate_skew_angle(_table()) == pytest.approx(0.0, abs=0.1)
+
+
+@pytest.mark.parametrize("rotation", [-4, 4])
+def test_deskew_reports_angle_and_straightens(monkeypatch, rotation):
+    monkeypatch.setattr("app.core.config.settings.OCR_DESKEW_MIN_ANGLE", 0.5)
+    report = {}
+    straightened = _deskew(_rotate(_table(), rotation), report)
+
+    assert report["skew_angle"] == pytest.approx(-rotation, abs=0.3)
+    assert estimate_skew_angle(straightened) == pytest.approx(0.0, abs=0.3)
+
+
+def test_deskew_keeps_image_below_min_angle(monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.OCR_DESKEW_MIN_ANGLE", 0.5)
+    image = _rotate(_table(), 0.2)
+    report = {}
+
+    assert _deskew(image, report) is image
+    assert abs(report["skew_angle"]) <= 0.5
@@ -0,0 +1,108 @@
+import asyncio
+import os
+
+from app.models.ocr import TableCell, TableStructure
+from app.services.ocr.result_cache import OCRResultCache, settings_fingerprint
+
+
+def _result(text):
+    return TableStructure(cells=[TableCell(text=text, row=0, column=0, confidence=0.9)])
+
+
+def _cache(tmp_path, max_bytes=1024 * 1024):
+    return OCRResultCache(cache_dir=str(tmp_path), max_bytes=max_bytes, use_db=False)
+
+
+def test_get_returns_stored_result_and_counts_hits(tmp_path):
+    cache = _cache(tmp_path)
+    key = cache.key_for("abc")
+
+    async def run():
+        assert await cache.get(key) is None
+        await cache.put(key, _result("DN100"))
+        return await cache.get(key), await cache.stats()
+
+    result, stats = asyncio.run(run())
+    assert result == _result("DN100")
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["bytes"] == os.path.getsize(tmp_path / f"{key}.json")
+
+
+def test_existing_files_are_indexed_on_first_use(tmp_path):
+    key = _cache(tmp_path).key_for("abc")
+    asyncio.run(_cache(tmp_path).put(key, _result("DN100")))
+
+    # 新实例从缓存目录重建索引
+    assert asyncio.run(_cache(tmp_path).get(key)) == _result("DN100")
+
+
+def test_fingerprint_changes_only_for_output_settings(monkeypatch):
+    fingerprint = settings_fingerprint()
+
+    monkeypatch.setattr("app.core.config.settings.OCR_ROUTER_WINDOW", 7)
+    monkeypatch.setattr("app.core.config.settings.OCR_CACHE_MAX_BYTES", 1)
+    assert settings_fingerprint() == fingerprint
+
+    monkeypatch.setattr("app.core.config.settings.OCR_ENGINE_MODE", "cloud")
+    assert settings_fingerprint() != fingerprint
+
+    monkeypatch.setattr("app.core.config.settings.OCR_ENGINE_MODE", "auto")
+    monkeypatch.setattr("app.core.config.settings.OCR_PREPROCESS_PROFILE", "none")
+    assert settings_fingerprint() != fingerprint
+
+
+def test_fingerprint_change_misses_old_entries(monkeypatch, tmp_path):
+    cache = _cache(tmp_path)
+    asyncio.run(cache.put(cache.key_for("abc"), _result("DN100")))
+
+    monkeypatch.setattr("app.core.config.settings.TABLE_MIN_ROW_HEIGHT", 999)
+    changed = _cache(tmp_path)
+    assert changed.key_for("abc") != cache.key_for("abc")
+    assert asyncio.run(changed.get(changed.key_for("abc"))) is None
+
+
+def test_evicts_least_recently_used_by_size(tmp_path):
+    size = len(_result("a").model_dump_json().encode("utf-8"))
+    cache = _cache(tmp_path, max_bytes=size * 2 + size // 2)
+
+    async def run():
+        await cache.put("a", _result("a"))
+        await cache.put("b", _result("b"))
+        assert await cache.get("a") is not None  # a变为最近使用
+        await cache.put("c", _result("c"))
+        return [await cache.get(key) is not None for key in "abc"], await cache.stats()
+
+    present, stats = asyncio.run(run())
+    assert present == [True, False, True]
+    assert not os.path.exists(tmp_path / "b.json")
+    assert stats["entries"] == 2 and stats["bytes"] <= cache.max_bytes
+
+
+def test_concurrent_puts_and_gets_keep_index_consistent(tmp_path):
+    size = len(_result("k0").model_dump_json().encode("utf-8"))
+    cache = _cache(tmp_path, max_bytes=size * 5)
+
+    async def run():
+        keys = [f"k{i}" for i in range(20)]
+        await asyncio.gather(*(cache.put(key, _result(key)) for key in keys),
+                             *(cache.get(key) for key in keys))
+        return await cache.stats()
+
+    stats = asyncio.run(run())
+    files = [name for name in os.listdir(tmp_path) if name.endswith(".json")]
+    assert stats["entries"] == len(files) <= 5
+    assert stats["bytes"] <= cache.max_bytes
+
+
+def test_concurrent_puts_of_the_same_key(tmp_path):
+    cache = _cache(tmp_path)
+
+    async def run():
+        await asyncio.gather(*(cache.put("same", _result(f"v{i}")) for i in range(20)))
+        return await cache.get("same"), await cache.stats()
+
+    for _ in range(5):
+        result, stats = asyncio.run(run())
+        assert result.cells[0].text.startswith("v")
+        assert stats["entries"] == 1
+    assert sorted(os.listdir(tmp_path)) == ["same.json"]
@@ -0,0 +1,46 @@
+import pytest
+
+from app.utils.spec_parser import ParsedSpec, parse_spec, spec_key
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ("DN100*80", "DN100*80"),
+    ("dn 100x80", "DN100*80"),
+    ("ＤＮ１００×８０", "DN100*80"),
+    ("Φ100", "DN100"),
+    ("φ89*4", "DN89*4"),
+    ("4寸", "DN100"),
+    ('1-1/2"', "DN40"),
+    ("1 1/2″", "DN40"),
+    ('1/2"', "DN15"),
+    ("4分", "DN15"),
+    ("PN16", "PN16"),
+    ("PN1.6", "PN16"),
+    ("1.6MPa", "PN16"),
+    ("16公斤", "PN16"),
+    ("Class150", "CL150"),
+    ("100mm", "L100"),
+    ("1.5米", "L1500"),
+    ("L=100", "L100"),
+    ("DN50 PN16 316L", "DN50;PN16;316L"),
+    ("316L PN1.6 DN50", "DN50;PN16;316L"),
+    ("DN20*500mm", "DN20;L500"),
+    ("DN20x500mm", "DN20;L500"),
+    ("DN20 * 0.5m", "DN20;L500"),
+    ("DN100*80*500mm", "DN100*80;L500"),
+])
+def test_spec_key(spec, expected):
+    assert spec_key(spec) == expected
+
+
+def test_parse_spec_fields():
+    assert parse_spec('Q235B 2" 6米') == ParsedSpec(("50",), None, "Q235B", "6000")
+    # 型号中的数字和材质前缀不误识别
+    assert parse_spec("DN304").material is None
+    assert parse_spec("1.6MPa").length is None
+    assert parse_spec("max100mm").length is None
+
+
+@pytest.mark.parametrize("spec", ["", None, "160个/件", "6型", "个"])
+def test_unparsable_spec(spec):
+    assert spec_key(spec) is None
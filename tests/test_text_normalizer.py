@@ -0,0 +1,64 @@
+import re
+
+from app.utils.text_normalizer import match_key, normalize_many, normalize_text
+
+
+def _normalize_reference(text):
+    """原OCRService._normalize_text的逐步实现"""
+    if not text:
+        return ""
+    text = " ".join(text.split())
+    result = ""
+    for char in text:
+        code = ord(char)
+        if 0xFF01 <= code <= 0xFF5E:
+            result += chr(code - 0xFEE0)
+        elif code == 0x3000:
+            result += " "
+        else:
+            result += char
+    text = result
+
+    def replace_dn(match):
+        return 'DN' + '*'.join(p for p in match.groups() if p)
+    text = re.sub(r'[Dd][Nn]?\s*(\d+)(?:\s*[×xX*]\s*(\d+))*', replace_dn, text)
+
+    for old, new in {'pcs': '个', 'PCS': '个', '件': '个', 'SET': '套', 'set': '套',
+                     '米': 'm', 'M': 'm'}.items():
+        text = text.replace(old, new)
+    for cn, ar in {'一': '1', '二': '2', '三': '3', '四': '4', '五': '5', '六': '6',
+                   '七': '7', '八': '8', '九': '9', '十': '10', '零': '0'}.items():
+        text = text.replace(cn, ar)
+    text = text.replace('。', '.')
+    while re.search(r'(\d+)[,，](\d{3})', text):
+        text = re.sub(r'(\d+)[,，](\d{3})', r'\1\2', text)
+    return text.strip(".,;:!?()[]{}\"'").strip()
+
+
+SAMPLES = [
+    "",
+    "  闸阀   DN100 ",
+    "ｄｎ１００×８０　沟槽三通",
+    "dn 50 x 40 x 32",
+    "D25弯头",
+    "数量：1,234,567 pcs",
+    "1,2,345",
+    "单价１２，５００。５０元",
+    "十二米PVC-M管",
+    "SET (套)",
+    "（球阀）",
+    "\"DN15\".",
+    "四通DN200*150",
+]
+
+
+def test_normalize_text_matches_reference():
+    for text in SAMPLES:
+        assert normalize_text(text) == _normalize_reference(text), text
+    assert normalize_many(SAMPLES) == [_normalize_reference(text) for text in SAMPLES]
+
+
+def test_match_key_keeps_material_words():
+    assert match_key("ＤＮ100  管件") == "dn100 管件"
+    assert match_key("dn 100x80 沟槽三通") == match_key("DN100*80 沟槽三通")
+    assert match_key("") == ""
@@ -0,0 +1,230 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.models.ocr import TableCell, TableStructure
+from app.services.ocr import worker_pool
+from app.services.ocr.ocr_service import OCRService
+from app.services.ocr.worker_pool import OCRQueueFullError, OCRWorkerPool, measure_service_time
+
+
+class _BlockingService:
+    """代替工作进程中的OCRService：每个任务等待放行后返回"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = 0
+        self.running = 0
+        self.max_running = 0
+        self.warm_up_fails = False
+        self._lock = threading.Lock()
+
+    def _process_image_ocr(self, path):
+        self.started += 1
+        self.release.wait(5)
+        return f"ok:{path}"
+
+    def _process_excel(self, path):
+        return f"excel:{path}"
+
+    def warm_up(self):
+        if self.warm_up_fails:
+            raise RuntimeError("model missing")
+        return {"pid": 1}
+
+    def _process_pdf_page(self, path, page_number):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.01)
+        with self._lock:
+            self.running -= 1
+        return TableStructure(cells=[TableCell(text=f"{path}:{page_number}", row=0, column=0)])
+
+
+def _pool(monkeypatch, max_workers=2, max_queued=1):
+    service = _BlockingService()
+    monkeypatch.setattr(worker_pool, "_worker_service", service)
+    pool = OCRWorkerPool(max_workers=max_workers, max_queued=max_queued)
+    # 用线程池代替进程池，任务在测试进程内执行
+    pool._executor = ThreadPoolExecutor(max_workers=max_workers)
+    return pool, service
+
+
+def test_capacity_counts_running_and_queued_jobs(monkeypatch):
+    pool, _ = _pool(monkeypatch, max_workers=2, max_queued=1)
+    assert pool.capacity == 3
+    assert pool.has_capacity(3) and not pool.has_capacity(4)
+    pool.shutdown()
+
+
+def test_run_rejects_when_queue_is_full(monkeypatch):
+    pool, service = _pool(monkeypatch, max_workers=2, max_queued=1)
+
+    async def run():
+        jobs = [asyncio.ensure_future(pool.run("_process_image_ocr", str(i))) for i in range(3)]
+        await asyncio.sleep(0.05)
+        assert pool.pending == 3 and not pool.has_capacity()
+        with pytest.raises(OCRQueueFullError):
+            await pool.run("_process_image_ocr", "overflow")
+        service.release.set()
+        return await asyncio.gather(*jobs)
+
+    try:
+        assert asyncio.run(run()) == ["ok:0", "ok:1", "ok:2"]
+    finally:
+        pool.shutdown()
+    assert pool.pending == 0 and pool.has_capacity(3)
+
+
+def test_pending_is_released_when_job_fails(monkeypatch):
+    pool, _ = _pool(monkeypatch)
+
+    with pytest.raises(AttributeError):
+        asyncio.run(pool.run("_missing_method"))
+    pool.shutdown()
+    assert pool.pending == 0
+
+
+def test_waiting_jobs_queue_for_a_slot_instead_of_failing(monkeypatch):
+    pool, service = _pool(monkeypatch, max_workers=1, max_queued=1)
+    service.release.set()
+    peak = 0
+
+    async def run():
+        nonlocal peak
+        jobs = [asyncio.ensure_future(pool.run("_process_image_ocr", str(i), wait=True)) for i in range(6)]
+        await asyncio.sleep(0)
+        assert pool.status()["waiting"] == 4
+        # 排队的内部识别占满容量时，新任务仍被拒绝
+        with pytest.raises(OCRQueueFullError):
+            await pool.run("_process_image_ocr", "overflow")
+        while not all(job.done() for job in jobs):
+            peak = max(peak, pool.pending)
+            await asyncio.sleep(0.001)
+        return [job.result() for job in jobs]
+
+    try:
+        assert asyncio.run(run()) == [f"ok:{i}" for i in range(6)]
+    finally:
+        pool.shutdown()
+    assert peak <= pool.capacity
+    assert pool.pending == 0 and pool.status()["waiting"] == 0
+
+
+def test_cancelled_waiter_passes_slot_on(monkeypatch):
+    pool, service = _pool(monkeypatch, max_workers=1, max_queued=0)
+
+    async def run():
+        first = asyncio.ensure_future(pool.run("_process_image_ocr", "a", wait=True))
+        await asyncio.sleep(0.01)
+        cancelled = asyncio.ensure_future(pool.run("_process_image_ocr", "b", wait=True))
+        waiting = asyncio.ensure_future(pool.run("_process_image_ocr", "c", wait=True))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        service.release.set()
+        return await first, await waiting
+
+    try:
+        assert asyncio.run(run()) == ("ok:a", "ok:c")
+    finally:
+        pool.shutdown()
+    assert pool.status()["waiting"] == 0
+
+
+def test_pdfs_in_one_task_share_pool_capacity(monkeypatch):
+    pool, service = _pool(monkeypatch, max_workers=2, max_queued=0)
+    monkeypatch.setattr("app.services.ocr.ocr_service.ocr_worker_pool", pool)
+    monkeypatch.setattr("app.services.ocr.ocr_service.pdf_page_count", lambda path: 4)
+    ocr_service = OCRService(connect_db=False)
+
+    async def run():
+        # 三个PDF共12页同时提交，超出容量的页等待空位而不是失败
+        return await asyncio.gather(*(ocr_service._recognize_pdf(f"{name}.pdf") for name in "abc"))
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        pool.shutdown()
+    assert [[cell.text for cell in result.cells] for result in results] == [
+        [f"{name}.pdf:{page}" for page in range(4)] for name in "abc"
+    ]
+    assert service.max_running <= 2
+    assert pool.pending == 0
+
+
+def test_only_engine_jobs_mark_pool_ready(monkeypatch):
+    pool, service = _pool(monkeypatch)
+    service.release.set()
+
+    try:
+        asyncio.run(pool.run("_process_excel", "a.xlsx"))
+        assert not pool.ready and pool.first_ocr_seconds is None
+        asyncio.run(pool.run("_process_image_ocr", "a.png"))
+        assert pool.ready and pool.first_ocr_seconds is not None
+    finally:
+        pool.shutdown()
+
+
+def test_warm_up_failure_is_reported_in_status(monkeypatch):
+    pool, service = _pool(monkeypatch)
+    service.warm_up_fails = True
+
+    try:
+        with pytest.raises(RuntimeError):
+            asyncio.run(pool.warm_up())
+        status = pool.status()
+        assert not status["ready"] and not status["warming_up"]
+        assert status["warm_up_error"] == "RuntimeError: model missing"
+
+        # 失败后可以重试，成功时清除错误
+        service.warm_up_fails = False
+        asyncio.run(pool.warm_up())
+        assert pool.status()["ready"] and pool.status()["warm_up_error"] is None
+    finally:
+        pool.shutdown()
+
+
+def test_service_time_excludes_waiting_for_a_slot(monkeypatch):
+    pool, service = _pool(monkeypatch, max_workers=1, max_queued=0)
+
+    async def run():
+        first = asyncio.ensure_future(pool.run("_process_image_ocr", "a", wait=True))
+        await asyncio.sleep(0.01)
+        with measure_service_time() as seconds:
+            second = asyncio.ensure_future(pool.run("_process_excel", "b.xlsx", wait=True))
+            await asyncio.sleep(0.2)
+            service.release.set()
+            await asyncio.gather(first, second)
+        return seconds
+
+    try:
+        seconds = asyncio.run(run())
+    finally:
+        pool.shutdown()
+    # 只记录代码块内提交的任务，且不含等待首个任务的0.2秒
+    assert len(seconds) == 1 and seconds[0] < 0.1
+
+
+def test_timed_out_job_holds_its_worker_until_it_finishes(monkeypatch):
+    pool, service = _pool(monkeypatch, max_workers=1, max_queued=0)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pool.run("_process_image_ocr", "slow"), timeout=0.05)
+        # 等待已取消，但工作进程仍在执行该任务
+        assert pool.pending == 1 and not pool.has_capacity()
+        waiting = asyncio.ensure_future(pool.run("_process_image_ocr", "next", wait=True))
+        await asyncio.sleep(0.05)
+        assert not waiting.done() and service.started == 1
+        service.release.set()
+        return await waiting
+
+    try:
+        assert asyncio.run(run()) == "ok:next"
+    finally:
+        pool.shutdown()
+    assert pool.pending == 0